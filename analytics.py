@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from config import GameConfig
+from game_log import ReplayGame, read_log
+
+MAX_TRICKS = 512
+CHECKPOINT_EVERY = 1000
+
+# Агрегати: назва -> форма масиву. Усі лічильники int64, тож їх можна просто додавати
+TABLES = {
+    "plays": (111, 111),          # [карта, хвіст ряду, куди вона пішла]
+    "takes": (111, 111),          # те саме, але лише для взятих рядів
+    "trick_plays": (MAX_TRICKS,),
+    "trick_takes": (MAX_TRICKS,),
+    "trick_penalty": (MAX_TRICKS,),
+    "elim_points": (256,),
+    "elim_trick": (MAX_TRICKS,),
+    "games": (1,),
+}
+
+
+def config_fingerprint():
+    return {
+        "MAX_PENALTY_POINTS": GameConfig.MAX_PENALTY_POINTS,
+        "CARDS_PER_PLAYER": GameConfig.CARDS_PER_PLAYER,
+        "NUM_ROWS": GameConfig.NUM_ROWS,
+        "PENALTY_WEIGHTS": list(GameConfig.PENALTY_WEIGHTS),
+    }
+
+
+class AnalyticsReplay(ReplayGame):
+    def __init__(self, record, tables):
+        self.tables = tables
+        super().__init__(record)
+
+    def _count(self, value, tail, take, penalty):
+        t = min(self.trick, MAX_TRICKS - 1)
+        self.tables["plays"][value, tail] += 1
+        self.tables["trick_plays"][t] += 1
+        if take:
+            self.tables["takes"][value, tail] += 1
+            self.tables["trick_takes"][t] += 1
+            self.tables["trick_penalty"][t] += penalty
+
+    def finish_placements(self):
+        # Хвіст ряду беремо до застосування ходу, як його бачили гравці
+        placements = self.pending_placements
+        tails = {row: row.tail for _, _, row, _ in placements}
+        before = {player: player.penalty_points for player, _, _, _ in placements}
+        super().finish_placements()
+        for player, card, row, take in placements:
+            self._count(card.value, tails[row], take, player.penalty_points - before[player])
+
+    def pick_row_for_player(self, row):
+        self._count(self.selected_card.value, row.tail, True, row.penalty)
+        super().pick_row_for_player(row)
+
+    def end_round(self):
+        super().end_round()
+        for p in self.players:
+            if self.eliminated_at.get(p.name) == self.trick:
+                self.tables["elim_points"][min(p.penalty_points, 255)] += 1
+                self.tables["elim_trick"][min(self.trick, MAX_TRICKS - 1)] += 1
+
+
+class Aggregates:
+    # Кожен запис пише нове покоління таблиць поруч зі старим, а checkpoint.json
+    # атомарно перемикається на нього разом з позиціями в журналах
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.checkpoint_path = os.path.join(directory, "checkpoint.json")
+        self.checkpoint = {"config": config_fingerprint(), "logs": {}, "generation": 0}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                self.checkpoint = json.load(f)
+            if self.checkpoint["config"] != config_fingerprint():
+                raise ValueError(f"{directory} was built with a different GameConfig")
+        self._open()
+        self._remove_stale()
+
+    def _path(self, name, generation):
+        return os.path.join(self.directory, f"{name}.{generation}.npy")
+
+    def _open(self):
+        generation = self.checkpoint["generation"]
+        self.tables = {}
+        for name, shape in TABLES.items():
+            path = self._path(name, generation)
+            if os.path.exists(path):
+                self.tables[name] = np.load(path, mmap_mode="r")
+            else:
+                self.tables[name] = np.zeros(shape, dtype=np.int64)
+
+    def _remove_stale(self):
+        # Файли інших поколінь - старі або недописані перед збоєм
+        current = {os.path.basename(self._path(name, self.checkpoint["generation"])) for name in TABLES}
+        for entry in os.listdir(self.directory):
+            if entry.endswith(".npy") and entry not in current:
+                os.remove(os.path.join(self.directory, entry))
+
+    def save(self, tables, logs):
+        generation = self.checkpoint["generation"] + 1
+        for name, data in tables.items():
+            with open(self._path(name, generation), "wb") as f:
+                np.save(f, data)
+                f.flush()
+                os.fsync(f.fileno())
+        checkpoint = dict(self.checkpoint, logs=logs, generation=generation)
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+        self.checkpoint = checkpoint
+        self._open()
+        self._remove_stale()
+
+    def ingest(self, log_path, every=CHECKPOINT_EVERY):
+        # Зведення копиться в пам'яті пачками і переноситься у файли разом з позицією в журналі
+        key = os.path.abspath(log_path)
+        offset = self.checkpoint["logs"].get(key)
+        batch = {name: np.zeros(shape, dtype=np.int64) for name, shape in TABLES.items()}
+        pending = 0
+        for record in read_log(log_path, offset):
+            AnalyticsReplay(record, batch).run()
+            batch["games"][0] += 1
+            offset = record.end
+            pending += 1
+            if pending >= every:
+                self._commit(batch, key, offset)
+                pending = 0
+        if pending:
+            self._commit(batch, key, offset)
+
+    def _commit(self, batch, key, offset):
+        self.save({name: self.tables[name] + counts for name, counts in batch.items()},
+                  dict(self.checkpoint["logs"], **{key: offset}))
+        for counts in batch.values():
+            counts[...] = 0
+
+    def merge(self, other):
+        if other.checkpoint["config"] != self.checkpoint["config"]:
+            raise ValueError("cannot merge aggregates built with different GameConfig")
+        logs = dict(self.checkpoint["logs"])
+        for key, offset in other.checkpoint["logs"].items():
+            if key in logs:
+                raise ValueError(f"{key} was aggregated on both sides")
+            logs[key] = offset
+        self.save({name: table + other.tables[name] for name, table in self.tables.items()}, logs)
+
+    def report(self):
+        t = self.tables
+        games = int(t["games"][0])
+        print(f"games: {games}")
+        if not games:
+            return
+        plays = t["plays"].sum(axis=1)
+        takes = t["takes"].sum(axis=1)
+        rate = np.divide(takes, plays, out=np.zeros(111), where=plays > 0)
+        print("take probability by card value (1..110, step 10):",
+              " ".join(f"{v}:{rate[v]:.2f}" for v in range(1, 111, 10)))
+        tricks = np.nonzero(t["trick_plays"])[0]
+        if len(tricks):
+            last = min(tricks[-1] + 1, 40)
+            mean = t["trick_penalty"][:last] / np.maximum(t["trick_plays"][:last], 1)
+            print("mean penalty per card played, tricks 0..%d:" % (last - 1), np.round(mean, 2))
+        elim = t["elim_points"]
+        if elim.sum():
+            over = np.arange(256) - GameConfig.MAX_PENALTY_POINTS
+            print(f"eliminations: {elim.sum()}, mean overshoot of MAX_PENALTY_POINTS: "
+                  f"{(elim * over).sum() / elim.sum():.1f}, "
+                  f"mean elimination trick: {(t['elim_trick'] * np.arange(MAX_TRICKS)).sum() / elim.sum():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate game logs into memory-mapped tables")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="add logs to an aggregate directory (resumable)")
+    build.add_argument("directory")
+    build.add_argument("logs", nargs="+")
+    merge = sub.add_parser("merge", help="add other aggregate directories into one")
+    merge.add_argument("directory")
+    merge.add_argument("others", nargs="+")
+    report = sub.add_parser("report", help="print a summary")
+    report.add_argument("directory")
+    args = parser.parse_args()
+
+    agg = Aggregates(args.directory)
+    if args.command == "build":
+        for path in args.logs:
+            agg.ingest(path)
+    elif args.command == "merge":
+        for other in args.others:
+            agg.merge(Aggregates(other))
+    agg.report()
+
+
+if __name__ == "__main__":
+    main()
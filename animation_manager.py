@@ -1,49 +1,187 @@
+import numpy as np
+
 from config import GameConfig
-from card import CardAnimation
+from card import FACE_CACHE
+
+# Стан слота у пулі твінів
+FREE = 0
+PENDING = 1  # чекає, поки завершиться попередній твін ланцюжка
+ACTIVE = 2
+
+# Вид твіна
+MOVE = 0
+FLIP = 1
+
+# Криві згладжування; кожна рахується одразу для всіх твінів з таким id
+LINEAR = 0
+EASE_IN_OUT = 1
+EASE_IN = 2
+EASINGS = {
+    LINEAR: lambda t: t,
+    EASE_IN_OUT: lambda t: np.where(t < 0.5, 4*t*t*t, 1 - (2 - 2*t)**3 / 2),
+    EASE_IN: lambda t: t*t*t,
+}
+
 
 class AnimationManager:
-    def __init__(self, game):
-        self.animations = []
-        self.pending_placements = []
+    # Усі твіни лежать у суцільних масивах (structure of arrays) і крокують одним
+    # векторним оновленням; слоти повторно використовуються з пулу
+    def __init__(self, game, capacity=32):
         self.game = game
-        
+        self.pending_placements = []
+        self.hidden_rows = frozenset()
+        self.capacity = 0
+        self.start = np.zeros((0, 2))
+        self.end = np.zeros((0, 2))
+        self.progress = np.zeros(0)
+        self.previous = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.delay = np.zeros(0, dtype=np.int32)
+        self.easing = np.zeros(0, dtype=np.int8)
+        self.kind = np.zeros(0, dtype=np.int8)
+        self.state = np.zeros(0, dtype=np.int8)
+        self.next = np.zeros(0, dtype=np.int32)
+        self.linger = np.zeros(0, dtype=bool)
+        self.cards = []
+        self.free = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        extra = capacity - self.capacity
+        for name in ("start", "end", "progress", "previous", "speed", "delay", "easing", "kind", "state", "next", "linger"):
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate([arr, np.zeros((extra,) + arr.shape[1:], dtype=arr.dtype)]))
+        self.cards += [None] * extra
+        self.free += range(capacity - 1, self.capacity - 1, -1)
+        self.capacity = capacity
+
+    def tween(self, card, start, end, ticks, easing=EASE_IN_OUT, delay=0, kind=MOVE, linger=True, after=None):
+        # after - твін, після якого цей стартує (ланцюжок); delay рахується від його старту
+        if not self.free:
+            self._grow(self.capacity * 2)
+        slot = self.free.pop()
+        self.start[slot] = start
+        self.end[slot] = end
+        self.progress[slot] = self.previous[slot] = 0.0
+        self.speed[slot] = 1.0 / max(ticks, 1)
+        self.delay[slot] = delay
+        self.easing[slot] = easing
+        self.kind[slot] = kind
+        self.linger[slot] = linger
+        self.next[slot] = -1
+        self.cards[slot] = card
+        if after is None:
+            self.state[slot] = ACTIVE
+        else:
+            self.state[slot] = PENDING
+            self.next[after] = slot
+        return slot
+
+    def release(self, slot):
+        self.state[slot] = FREE
+        self.cards[slot] = None
+        self.free.append(slot)
+
+    def clear(self):
+        for slot in np.flatnonzero(self.state != FREE):
+            self.release(slot)
+        # Слоти видаються за зростанням номера, тож порядок малювання = порядок створення
+        self.free.sort(reverse=True)
+
     def create_card_animations(self, placements):
-        self.animations = []
+        self.clear()
         self.pending_placements = placements
-        
-        cx = GameConfig.WIDTH//2
-        cy = GameConfig.HEIGHT//2
-        reveal_count = len(placements)
-        reveal_start_x = cx - (reveal_count*(GameConfig.CARD_WIDTH+10))//2
+
+        layout = self.game.layout()
+        flip_ticks = GameConfig.FLIP_TICKS
+        fly_ticks = round(1 / GameConfig.ANIMATION_SPEED)
+        collapse_ticks = GameConfig.COLLAPSE_TICKS
+        row_index = {id(row): i for i, row in enumerate(self.game.rows)}
+        # Скільки карт у ряду буде на момент приземлення, і що там уже лежить
+        lengths = {id(row): len(row.cards) for row in self.game.rows}
+        landed = {id(row): [] for row in self.game.rows}
+        hidden = set()
 
         for i, (player, card, row_obj, take_row) in enumerate(placements):
-            row_index = self.game.rows.index(row_obj)
-            row_x = GameConfig.WIDTH//2 - 2*(GameConfig.CARD_WIDTH+20) + row_index*(GameConfig.CARD_WIDTH+100) + 20
-            
-            final_y = GameConfig.HEIGHT//2 - 2*(GameConfig.CARD_HEIGHT+10) + 10
-            if not take_row:
-                final_y += len(row_obj.cards)*(GameConfig.CARD_HEIGHT//2)
-
-            start_x = reveal_start_x + i*(GameConfig.CARD_WIDTH+10)
-            start_y = cy - GameConfig.CARD_HEIGHT//2
-
-            anim = CardAnimation(player, card, (start_x, start_y), 
-                               (row_x, final_y), take_row, row_obj)
-            self.animations.append(anim)
-    
+            r = row_index[id(row_obj)]
+            start = layout.reveal[i]
+            launch = flip_ticks + i*GameConfig.ANIMATION_STAGGER
+
+            if take_row:
+                # Ряд збирається до рахунку гравця, поки карта летить на його місце
+                hud = layout.hud[self.game.players.index(player)]
+                if r not in hidden:
+                    hidden.add(r)
+                    for j, old in enumerate(row_obj.cards):
+                        self.tween(old, layout.row_slot(r, j), hud, collapse_ticks,
+                                   EASE_IN, delay=launch + j, linger=False)
+                for slot, arrival in landed[id(row_obj)]:
+                    self.tween(self.cards[slot], self.end[slot], hud, collapse_ticks, EASE_IN,
+                               delay=max(launch - arrival, 0), linger=False, after=slot)
+                lengths[id(row_obj)] = 0
+                landed[id(row_obj)] = []
+            end = layout.row_slot(r, lengths[id(row_obj)])
+            lengths[id(row_obj)] += 1
+
+            if player.is_human:
+                fly = self.tween(card, start, end, fly_ticks, delay=launch)
+            else:
+                # Карти ботів спершу перевертаються на місці, потім летять
+                flip = self.tween(card, start, start, flip_ticks, LINEAR, kind=FLIP)
+                fly = self.tween(card, start, end, fly_ticks, delay=i*GameConfig.ANIMATION_STAGGER, after=flip)
+            landed[id(row_obj)].append((fly, launch + fly_ticks))
+        self.hidden_rows = frozenset(hidden)
+
     def update(self):
-        if not self.animations:
-            return True
-            
-        done = True
-        for anim in self.animations:
-            if not anim.update():
-                done = False
-        return done
-        
-    def draw(self, surface):
-        for anim in self.animations:
-            anim.draw(surface)
-            
+        active = self.state == ACTIVE
+        waiting = active & (self.delay > 0)
+        self.delay[waiting] -= 1
+        running = active & ~waiting & (self.progress < 1.0)
+        self.previous[active] = self.progress[active]
+        self.progress[running] = np.minimum(self.progress[running] + self.speed[running], 1.0)
+        for slot in np.flatnonzero(running & (self.progress >= 1.0)):
+            nxt = self.next[slot]
+            if nxt >= 0:
+                self.state[nxt] = ACTIVE
+            if nxt >= 0 or not self.linger[slot]:
+                self.release(slot)
+        active = self.state == ACTIVE
+        busy = (self.state == PENDING) | (active & ((self.progress < 1.0) | (self.delay > 0)))
+        return not busy.any()
+
+    def positions(self, alpha=1.0):
+        # Кадр малюється між двома кроками логіки: інтерполюємо прогрес, потім згладжуємо
+        t = self.previous + (self.progress - self.previous)*alpha
+        eased = np.empty_like(t)
+        for easing_id, fn in EASINGS.items():
+            mask = self.easing == easing_id
+            eased[mask] = fn(t[mask])
+        pos = self.start + (self.end - self.start)*eased[:, None]
+        return pos.astype(np.int32), t
+
+    def items(self, alpha=1.0):
+        # (слот, карта, x, y, t) для всіх видимих твінів, у порядку слотів
+        pos, t = self.positions(alpha)
+        visible = np.flatnonzero(self.state == ACTIVE)
+        return [(slot, self.cards[slot], int(pos[slot, 0]), int(pos[slot, 1]), float(t[slot]), self.kind[slot])
+                for slot in visible]
+
+    def draw_item(self, surface, card, x, y, t, kind):
+        if kind == FLIP:
+            # Перевертання: карта стискається до ребра і розгортається вже лицем;
+            # ширини квантуються, тож стиснуті варіанти беруться з кешу
+            step = max(1, round(abs(1 - 2*t) * GameConfig.FLIP_WIDTHS))
+            face = FACE_CACHE.get_flip(card.value, card.penalty, t >= 0.5, step)
+            surface.blit(face, (x + (GameConfig.CARD_WIDTH - face.get_width())//2, y))
+        else:
+            card.draw(surface, x, y, face_up=True)
+
+    def draw(self, surface, alpha=1.0):
+        for _, card, x, y, t, kind in self.items(alpha):
+            self.draw_item(surface, card, x, y, t, kind)
+
     def get_results(self):
-        return self.animations, self.pending_placements 
\ No newline at end of file
+        cards = [self.cards[slot] for slot in np.flatnonzero(self.state != FREE)]
+        self.clear()
+        self.hidden_rows = frozenset()
+        return cards, self.pending_placements
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pygame
+
+from config import GameConfig
+
+# Дрібні спрайти пакуються в один атлас; фон зберігається окремо
+SPRITES = ["card_back"] + [f"frog_{i}" for i in range(1, 7)]
+BACKGROUND = "background"
+CACHE_FORMAT = 2
+ATLAS_WIDTH = 256
+
+ASSETS_READY = pygame.event.custom_type()
+
+
+def card_size(size):
+    # Розміри рахуються від size, а не від GameConfig: завантажувач для нового
+    # розміру вікна працює у фоні, поки гра ще малює старий
+    scale = GameConfig.scale_for(*size)
+    return GameConfig.px(GameConfig.BASE_CARD_WIDTH, scale), GameConfig.px(GameConfig.BASE_CARD_HEIGHT, scale)
+
+
+def source_key(directory, size):
+    # Кеш дійсний, поки не змінились самі PNG, розмір вікна чи формат кешу
+    card = card_size(size)
+    digest = hashlib.sha1(f"{CACHE_FORMAT}:{size[0]}x{size[1]}:{card[0]}x{card[1]}".encode())
+    for name in [BACKGROUND] + SPRITES:
+        with open(os.path.join(directory, name + ".png"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def touch(path):
+    # Час доступу для LRU кешу. Явні наносекунди: mtime, що ставить сама ФС,
+    # буває грубим, і ключі, записані підряд, виходять одночасними
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def pack(sizes, width=ATLAS_WIDTH):
+    # Полицями: спрайти в ряд, поки влазять, далі нова полиця
+    width = max([width] + [w for w, _ in sizes.values()])
+    regions, x, y, shelf = {}, 0, 0, 0
+    for name, (w, h) in sorted(sizes.items(), key=lambda item: -item[1][1]):
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        regions[name] = (x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+    return regions, (width, y + shelf)
+
+
+class AssetLoader:
+    # Картинки готуються у фоновому потоці, поки вже показується меню; у потоці
+    # лише читання й декодування, а перетворення у формат екрана - в головному
+    def __init__(self, directory=".", cache_dir=None, size=None):
+        self.directory = directory
+        self.cache_dir = cache_dir or GameConfig.ASSET_CACHE_DIR
+        self.size = size or (GameConfig.WIDTH, GameConfig.HEIGHT)
+        self.done = threading.Event()
+        self.thread = None
+        self.result = None
+        self.error = None
+        self.from_cache = False
+        self.installed = False
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = self.load()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+            if pygame.display.get_init():
+                pygame.event.post(pygame.event.Event(ASSETS_READY))
+
+    def load(self):
+        key = source_key(self.directory, self.size)
+        cached = self.read_cache(key)
+        if cached is not None:
+            self.from_cache = True
+            return cached
+        built = self.build()
+        self.write_cache(key, *built)
+        return built
+
+    def build(self):
+        background = pygame.image.load(os.path.join(self.directory, BACKGROUND + ".png"))
+        if background.get_size() != self.size:
+            background = pygame.transform.smoothscale(background, self.size)
+        # Спрайти масштабуються під розмір карт один раз, тут
+        sprite = GameConfig.px(GameConfig.BASE_SPRITE_SIZE, GameConfig.scale_for(*self.size))
+        sizes = {name: (sprite, sprite) for name in SPRITES}
+        sizes["card_back"] = card_size(self.size)
+        sprites = {}
+        for name in SPRITES:
+            image = pygame.image.load(os.path.join(self.directory, name + ".png"))
+            if image.get_size() != sizes[name]:
+                image = pygame.transform.smoothscale(image, sizes[name])
+            sprites[name] = image
+        regions, atlas_size = pack({name: s.get_size() for name, s in sprites.items()})
+        atlas = pygame.Surface(atlas_size, pygame.SRCALPHA, 32)
+        for name, sprite in sprites.items():
+            atlas.blit(sprite, regions[name][:2])
+        return background, atlas, regions
+
+    def cache_paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".bg", base + ".atlas"
+
+    def read_cache(self, key):
+        index_path, bg_path, atlas_path = self.cache_paths(key)
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            with open(bg_path, "rb") as f:
+                background = pygame.image.frombytes(f.read(), tuple(index["background"]), "RGBX")
+            with open(atlas_path, "rb") as f:
+                atlas = pygame.image.frombytes(f.read(), tuple(index["atlas"]), "RGBA")
+            touch(index_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return background, atlas, {name: tuple(r) for name, r in index["regions"].items()}
+
+    def write_cache(self, key, background, atlas, regions):
+        # Пошкоджений чи недописаний кеш просто перебудується наступного разу
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.evict(keep=GameConfig.ASSET_CACHE_KEYS - 1)
+            index_path, bg_path, atlas_path = self.cache_paths(key)
+            for path, data in ((bg_path, pygame.image.tobytes(background, "RGBX")),
+                               (atlas_path, pygame.image.tobytes(atlas, "RGBA"))):
+                with open(path + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(path + ".tmp", path)
+            index = {"background": background.get_size(), "atlas": atlas.get_size(), "regions": regions}
+            with open(index_path + ".tmp", "w") as f:
+                json.dump(index, f)
+            os.replace(index_path + ".tmp", index_path)
+            touch(index_path)
+        except OSError:
+            pass
+
+    def evict(self, keep):
+        # Лишає keep ключів, прочитаних чи записаних найпізніше (за часом індексу);
+        # недописані записи без індексу видаляються завжди
+        entries, used = {}, {}
+        for name in os.listdir(self.cache_dir):
+            key = name.split(".", 1)[0]
+            entries.setdefault(key, []).append(name)
+            if name == key + ".json":
+                used[key] = os.stat(os.path.join(self.cache_dir, name)).st_mtime_ns
+        fresh = sorted(used, key=used.get, reverse=True)[:keep]
+        for key, names in entries.items():
+            if key not in fresh:
+                for name in names:
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def install(self):
+        # Чекає на потік, якщо той ще не закінчив, і віддає картинки в GameConfig
+        if self.installed:
+            return
+        if self.thread is None:
+            self._run()
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        background, atlas, regions = self.result
+        atlas = atlas.convert_alpha()
+        GameConfig.BACKGROUND_IMG = background.convert()
+        GameConfig.CARD_BACK_IMG = atlas.subsurface(regions["card_back"])
+        GameConfig.FROG_IMAGES = {i: atlas.subsurface(regions[f"frog_{i}"]) for i in range(1, 7)}
+        GameConfig.ASSET_VERSION += 1
+        self.installed = True
@@ -0,0 +1,230 @@
+import argparse
+import time
+
+import numpy as np
+
+from config import GameConfig
+from player import Player
+from rng import STREAM_DECK, STREAM_PENALTY, STREAM_RANDOM_BOT, draw_penalties, philox
+from rules import GameRules
+
+FULL_ROW = GameConfig.ROW_LIMIT
+MAX_PLAYERS = 16
+NO_CARD = 255
+
+# Випадкові ходи беруться блоками на CHUNK_TRICKS ходів уперед: на кожен хід
+# спершу числа для карт усіх місць, потім для рядів
+CHUNK_TRICKS = 64
+
+
+class BatchSimulator:
+    # Гра i - та сама, що GameRules(seed=seed, game=games[i]): колоди й штрафи
+    # тягнуться з тих самих потоків rng.py. seed може бути і списком, свій на кожну гру
+    def __init__(self, seed, games, num_players, num_rows=None, cards_per_player=None):
+        self.indices = list(games)
+        self.num_games = len(self.indices)
+        self.seeds = list(seed) if np.iterable(seed) else [seed] * self.num_games
+        self.num_players = num_players
+        self.num_rows = num_rows or GameConfig.NUM_ROWS
+        self.cards_per_player = cards_per_player or GameConfig.CARDS_PER_PLAYER
+        if num_players > MAX_PLAYERS:
+            raise ValueError(f"at most {MAX_PLAYERS} players per game")
+        if num_players * self.cards_per_player + self.num_rows > 110:
+            raise ValueError("not enough cards in the deck for this table")
+
+        n, p, r = self.num_games, num_players, self.num_rows
+        self.games = np.arange(n)
+        self.penalties = np.zeros((n, 111), dtype=np.int16)
+        self.stack = np.zeros((n, 110), dtype=np.int16)
+        self.used = np.zeros(n, dtype=np.int64)
+        self.hands = np.zeros((n, p, 111), dtype=bool)
+        self.row_tail = np.zeros((n, r), dtype=np.int16)
+        self.row_len = np.zeros((n, r), dtype=np.int16)
+        self.row_penalty = np.zeros((n, r), dtype=np.int16)
+        self.points = np.zeros((n, p), dtype=np.int32)
+        self.alive = np.ones((n, p), dtype=bool)
+        self.eliminated_at = np.full((n, p), -1, dtype=np.int32)
+        self.trick = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        keys = list(zip(self.seeds, self.indices))
+        self.decks = [philox(s, i, STREAM_DECK) for s, i in keys]
+        self.penalty_streams = [philox(s, i, STREAM_PENALTY) for s, i in keys]
+        self.bot_streams = None
+        self.drawn = None
+        self.chunk = np.full(n, -1, dtype=np.int64)
+
+        self.generate_decks(self.games)
+        self.deal(self.games)
+
+    def generate_decks(self, g):
+        # Як GameRules.generate_deck і shuffle_deck; pop() бере з кінця перестановки
+        for i in g:
+            self.penalties[i, 1:] = draw_penalties(self.penalty_streams[i])
+            self.stack[i] = self.decks[i].permutation(110)[::-1] + 1
+        self.used[g] = 0
+
+    def uniforms(self, g, kind):
+        # Потік читається послідовно, блок за блоком, як і в ReferenceGame
+        if self.bot_streams is None:
+            self.bot_streams = [philox(s, i, STREAM_RANDOM_BOT) for s, i in zip(self.seeds, self.indices)]
+            self.drawn = np.zeros((self.num_games, CHUNK_TRICKS, 2, self.num_players))
+        chunk = self.trick[g] // CHUNK_TRICKS
+        for i in g[chunk != self.chunk[g]]:
+            self.drawn[i] = self.bot_streams[i].random(self.drawn[i].shape)
+        self.chunk[g] = chunk
+        return self.drawn[g, self.trick[g] % CHUNK_TRICKS, kind]
+
+    def deal(self, g):
+        alive = self.alive[g]
+        alive_count = alive.sum(axis=1)
+        need = alive_count * self.cards_per_player + self.num_rows
+        short = g[110 - self.used[g] < need]
+        if len(short):
+            self.generate_decks(short)
+
+        used = self.used[g]
+        rank = np.cumsum(alive, axis=1) - 1
+        pos = used[:, None, None] + rank[:, :, None] * self.cards_per_player + np.arange(self.cards_per_player)
+        pos = np.minimum(pos, 109)
+        dealt = np.take_along_axis(self.stack[g], pos.reshape(len(g), -1), axis=1).reshape(pos.shape)
+
+        hands = np.zeros((len(g), self.num_players, 111), dtype=bool)
+        mask = np.broadcast_to(alive[:, :, None], dealt.shape)
+        gi, pi, _ = np.nonzero(mask)
+        hands[gi, pi, dealt[mask]] = True
+        self.hands[g] = hands
+
+        row_pos = used[:, None] + alive_count[:, None] * self.cards_per_player + np.arange(self.num_rows)
+        tails = np.take_along_axis(self.stack[g], row_pos, axis=1)
+        self.row_tail[g] = tails
+        self.row_len[g] = 1
+        self.row_penalty[g] = np.take_along_axis(self.penalties[g], tails.astype(np.int64), axis=1)
+        self.used[g] = used + need
+
+    def choose_cards(self, g, playing):
+        hands = self.hands[g]
+        count = hands.sum(axis=2)
+        u = self.uniforms(g, 0)
+        idx = (u * count).astype(np.int64)
+        # idx-та карта в руці за зростанням значення
+        ranks = np.cumsum(hands, axis=2, dtype=np.int8)
+        cards = np.argmax(ranks > idx.astype(np.int8)[:, :, None], axis=2)
+        return np.where(playing, cards, NO_CARD).astype(np.int16)
+
+    def choose_rows(self, g, available):
+        # Ряд на випадок, якщо карта нікуди не лягає: випадковий серед доступних
+        pick = (self.uniforms(g, 1) * available.sum(axis=1)[:, None]).astype(np.int64)
+        return np.argmax(np.cumsum(available, axis=1)[:, None, :] > pick[:, :, None], axis=2)
+
+    def play_trick(self):
+        g = self.games[~self.done]
+        if not len(g):
+            return False
+        n = len(g)
+        playing = self.alive[g]
+        cards = self.choose_cards(g, playing)
+        self.hands[g[:, None], np.arange(self.num_players), np.minimum(cards, 110)] &= ~playing
+
+        tail = self.row_tail[g]
+        full = self.row_len[g] >= FULL_ROW
+        any_full = full.any(axis=1)
+
+        # Цільовий ряд з мінімальною різницею рахується по стану до ходу
+        diff = cards[:, :, None].astype(np.int32) - tail[:, None, :]
+        diff = np.where((diff > 0) & ~full[:, None, :], diff, 1 << 20)
+        target = np.argmin(diff, axis=2)
+        take = np.min(diff, axis=2) == 1 << 20
+
+        available = ~full
+        available[~available.any(axis=1)] = True
+        target = np.where(take, self.choose_rows(g, available), target)
+
+        order = np.argsort(cards, axis=1, kind="stable")
+        lowest = order[:, 0]
+        forced = np.nonzero(any_full)[0]
+        target[forced, lowest[forced]] = np.argmax(full[forced], axis=1)
+        take[forced, lowest[forced]] = True
+
+        for k in range(self.num_players):
+            j = order[:, k]
+            sel = np.nonzero(playing[np.arange(n), j])[0]
+            gg, jj = g[sel], j[sel]
+            row = target[sel, jj]
+            card = cards[sel, jj].astype(np.int64)
+            pen = self.penalties[gg, card]
+            took = take[sel, jj]
+            self.points[gg, jj] += np.where(took, self.row_penalty[gg, row], 0)
+            self.row_len[gg, row] = np.where(took, 1, self.row_len[gg, row] + 1)
+            self.row_penalty[gg, row] = np.where(took, pen, self.row_penalty[gg, row] + pen)
+            self.row_tail[gg, row] = card
+
+        self.trick[g] += 1
+        self.end_round(g)
+        return True
+
+    def end_round(self, g):
+        out = self.alive[g] & (self.points[g] > GameConfig.MAX_PENALTY_POINTS)
+        gi, pi = np.nonzero(out)
+        self.eliminated_at[g[gi], pi] = self.trick[g[gi]]
+        self.alive[g] &= ~out
+
+        finished = self.alive[g].sum(axis=1) <= 1
+        self.done[g[finished]] = True
+        g = g[~finished]
+        empty = (self.alive[g] & ~self.hands[g].any(axis=2)).any(axis=1)
+        if empty.any():
+            self.deal(g[empty])
+
+    def run(self, max_tricks=10000):
+        for _ in range(max_tricks):
+            if not self.play_trick():
+                break
+        return self.points, self.alive
+
+
+class ReferenceGame(GameRules):
+    # Скалярна гра з тими ж потоками випадковості, що й BatchSimulator
+    def __init__(self, seed, game, num_players):
+        super().__init__(seed=seed, game=game)
+        self.num_bots = num_players
+        self.bot_stream = philox(seed, game, STREAM_RANDOM_BOT)
+        self.drawn = []
+
+    def setup_players(self, human=False, strategies=None):
+        self.players = [Player(f"Bot {i+1}") for i in range(self.num_bots)]
+        self.active_players = len(self.players)
+
+    def _pick(self, kind, player, count):
+        counter = (self.trick * 2 + kind) * self.num_bots + self.players.index(player)
+        while len(self.drawn) <= counter:
+            self.drawn.extend(self.bot_stream.random(CHUNK_TRICKS * 2 * self.num_bots).tolist())
+        return int(self.drawn[counter] * count)
+
+    def choose_bot_cards(self):
+        for p in self.get_alive_players():
+            if p not in self.player_cards_placed:
+                hand = sorted(p.hand, key=lambda c: c.value)
+                self.player_cards_placed[p] = hand[self._pick(0, p, len(hand))]
+
+    def choose_row_for_bot(self, player, rows):
+        return rows[self._pick(1, player, len(rows))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many bot-only games at once")
+    parser.add_argument("games", type=int, nargs="?", default=10000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sim = BatchSimulator(args.seed, range(args.games), args.players)
+    sim.run()
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:.0f} games/s)")
+    print("mean penalty per seat:", np.round(sim.points.mean(axis=0), 2))
+    print("win rate per seat:", np.round((sim.alive & sim.done[:, None]).mean(axis=0), 3))
+
+
+if __name__ == "__main__":
+    main()
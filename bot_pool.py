@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import GameConfig
+
+
+def lowest_card(player):
+    return min(player.hand, key=lambda c: c.value)
+
+
+def cheapest_row(rows):
+    return min(rows, key=lambda r: r.penalty)
+
+
+class BotPool:
+    # Рішення ботів рахуються у фоні, а цикл кадрів лише забирає готові.
+    # Потоки, а не процеси: ботам потрібен живий стіл, а важкі стратегії
+    # (numpy, montecarlo з workers) самі відпускають GIL або мають свій пул процесів
+    def __init__(self, workers=None, deadline=None):
+        workers = workers or min(8, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="bot")
+        self.deadline = GameConfig.BOT_DEADLINE if deadline is None else deadline
+        self.tasks = {}
+        # Прострочені рішення, які вже рахуються: зупинити потік не можна, тож
+        # поки вони не закінчать, той самий бот нового пошуку не отримує
+        self.zombies = {}
+        self.max_zombies = max(1, workers // 2)
+        self.missed = 0
+        self.failed = 0
+
+    def submit(self, key, fn, fallback):
+        # fallback - дешевий хід на випадок, якщо бот не встиг чи впав
+        if key in self.tasks:
+            return
+        self.reap()
+        if key in self.zombies or len(self.zombies) >= self.max_zombies:
+            # Повільний бот не займає всіх потоків: одразу дешевий хід на наступному poll
+            self.tasks[key] = (None, 0, fallback)
+        else:
+            self.tasks[key] = (self.executor.submit(fn), time.perf_counter() + self.deadline, fallback)
+
+    def busy(self, key):
+        return key in self.tasks
+
+    def reap(self):
+        self.zombies = {key: future for key, future in self.zombies.items() if not future.done()}
+
+    def poll(self):
+        # Готові і прострочені рішення; прострочений потік дорахує сам, результат відкинемо
+        now = time.perf_counter()
+        done = {}
+        for key, (future, expires, fallback) in list(self.tasks.items()):
+            if future is None:
+                self.missed += 1
+                done[key] = fallback()
+            elif future.done():
+                try:
+                    done[key] = future.result()
+                except Exception:
+                    self.failed += 1
+                    done[key] = fallback()
+            elif now >= expires:
+                if not future.cancel():
+                    self.zombies[key] = future
+                self.missed += 1
+                done[key] = fallback()
+            else:
+                continue
+            del self.tasks[key]
+        return done
+
+    def clear(self):
+        for key, (future, _, _) in self.tasks.items():
+            if future is not None and not future.cancel():
+                self.zombies[key] = future
+        self.tasks = {}
+
+    def shutdown(self):
+        self.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,58 @@
+import random
+
+
+class RandomBot:
+    name = "random"
+
+    def __init__(self, rng=None):
+        self.rng = rng or random
+
+    def choose_card(self, game, player):
+        return self.rng.choice(player.hand)
+
+    def choose_row(self, game, player, rows):
+        return self.rng.choice(rows)
+
+
+class LowestCardBot(RandomBot):
+    name = "lowest"
+
+    def choose_card(self, game, player):
+        return min(player.hand, key=lambda c: c.value)
+
+    def choose_row(self, game, player, rows):
+        return min(rows, key=lambda r: r.penalty)
+
+
+class HighestCardBot(LowestCardBot):
+    name = "highest"
+
+    def choose_card(self, game, player):
+        return max(player.hand, key=lambda c: c.value)
+
+
+class ClosestFitBot(LowestCardBot):
+    name = "closest"
+
+    # Грає карту, яка лягає найближче до хвоста ряду, що ще не заповнений
+    def choose_card(self, game, player):
+        best, best_gap = None, None
+        for card in player.hand:
+            row = game.can_place_card_in_rows(card)
+            if row is None:
+                continue
+            gap = card.value - row.last_card_value + 100 * len(row.cards)
+            if best_gap is None or gap < best_gap:
+                best, best_gap = card, gap
+        return best or super().choose_card(game, player)
+
+
+STRATEGIES = {
+    cls.name: cls for cls in (RandomBot, LowestCardBot, HighestCardBot, ClosestFitBot)
+}
+
+
+def make_bot(name, rng=None):
+    if name not in STRATEGIES:
+        raise ValueError(f"unknown strategy {name!r}, expected one of {', '.join(STRATEGIES)}")
+    return STRATEGIES[name](rng)
@@ -1,58 +1,107 @@
-import pygame
+from collections import OrderedDict
 from config import GameConfig
 
 class Card:
+    __slots__ = ("value", "penalty", "_rect")
+
     def __init__(self, value, penalty):
         self.value = value
         self.penalty = penalty
-        self.rect = pygame.Rect(0, 0, GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT)
-        
+        self._rect = None
+
+    @property
+    def rect(self):
+        # Rect створюється лише рендером, щоб правила працювали без pygame
+        if self._rect is None:
+            import pygame
+            self._rect = pygame.Rect(0, 0, GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT)
+        return self._rect
+
     def draw(self, surface, x, y, highlight=False, face_up=True):
         self.rect.topleft = (x, y)
-        if not face_up:
-            surface.blit(GameConfig.CARD_BACK_IMG, (x, y))
-            if highlight:
-                pygame.draw.rect(surface, GameConfig.YELLOW, self.rect, 2, border_radius=5)
-            else:
-                pygame.draw.rect(surface, GameConfig.BLACK, self.rect, 2, border_radius=5)
-            return
-        
-        color = GameConfig.YELLOW if highlight else GameConfig.WHITE
-        pygame.draw.rect(surface, color, self.rect, border_radius=5)
-        pygame.draw.rect(surface, GameConfig.BLACK, self.rect, 2, border_radius=5)
-
-        frog_img = GameConfig.FROG_IMAGES.get(self.penalty)
-        if frog_img:
-            fw, fh = frog_img.get_width(), frog_img.get_height()
-            fx = x + (GameConfig.CARD_WIDTH - fw)//2
-            fy = y + (GameConfig.CARD_HEIGHT - fh)//2
-            surface.blit(frog_img, (fx, fy))
-
-        val_text = GameConfig.FONT.render(str(self.value), True, GameConfig.BLACK)
-        penalty_text = GameConfig.FONT.render(str(self.penalty), True, GameConfig.RED)
-        surface.blit(val_text, (x+GameConfig.CARD_WIDTH//2 - val_text.get_width()//2, y+5))
-        surface.blit(penalty_text, (x+GameConfig.CARD_WIDTH//2 - penalty_text.get_width()//2, y+GameConfig.CARD_HEIGHT-30))
-
-class CardAnimation:
-    def __init__(self, player, card, start_pos, end_pos, take_row, row_obj):
-        self.player = player
-        self.card = card
-        self.start_pos = start_pos
-        self.end_pos = end_pos
-        self.take_row = take_row
-        self.row_obj = row_obj
-        self.progress = 0.0
-        self.speed = GameConfig.ANIMATION_SPEED
-
-    def update(self):
-        self.progress += self.speed
-        if self.progress > 1.0:
-            self.progress = 1.0
-        return self.progress >= 1.0
-
-    def draw(self, surface):
-        sx, sy = self.start_pos
-        ex, ey = self.end_pos
-        x = sx + (ex - sx)*self.progress
-        y = sy + (ey - sy)*self.progress
-        self.card.draw(surface, x, y, face_up=True) 
\ No newline at end of file
+        surface.blit(FACE_CACHE.get(self.value, self.penalty, highlight, face_up), (x, y))
+
+
+def render_card_face(value, penalty, highlight=False, face_up=True):
+    import pygame
+    surface = pygame.Surface((GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT), pygame.SRCALPHA)
+    rect = surface.get_rect()
+    border, radius = GameConfig.px(2), GameConfig.px(5)
+    if not face_up:
+        surface.blit(GameConfig.CARD_BACK_IMG, (0, 0))
+        if highlight:
+            pygame.draw.rect(surface, GameConfig.YELLOW, rect, border, border_radius=radius)
+        else:
+            pygame.draw.rect(surface, GameConfig.BLACK, rect, border, border_radius=radius)
+        return surface.convert_alpha() if pygame.display.get_surface() else surface
+
+    color = GameConfig.YELLOW if highlight else GameConfig.WHITE
+    pygame.draw.rect(surface, color, rect, border_radius=radius)
+    pygame.draw.rect(surface, GameConfig.BLACK, rect, border, border_radius=radius)
+
+    frog_img = GameConfig.FROG_IMAGES.get(penalty)
+    if frog_img:
+        fw, fh = frog_img.get_width(), frog_img.get_height()
+        surface.blit(frog_img, ((GameConfig.CARD_WIDTH - fw)//2, (GameConfig.CARD_HEIGHT - fh)//2))
+
+    val_text = GameConfig.FONT.render(str(value), True, GameConfig.BLACK)
+    penalty_text = GameConfig.FONT.render(str(penalty), True, GameConfig.RED)
+    surface.blit(val_text, (GameConfig.CARD_WIDTH//2 - val_text.get_width()//2, GameConfig.px(5)))
+    surface.blit(penalty_text, (GameConfig.CARD_WIDTH//2 - penalty_text.get_width()//2, GameConfig.CARD_HEIGHT - GameConfig.px(30)))
+    return surface.convert_alpha() if pygame.display.get_surface() else surface
+
+
+class CardFaceCache:
+    # Готові поверхні карт: кожен варіант рендериться один раз, далі лише blit
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.faces = OrderedDict()
+        self.epoch = None
+        self.hits = 0
+        self.misses = 0
+
+    def current_epoch(self):
+        return (GameConfig.ASSET_VERSION, GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT,
+                id(GameConfig.FONT), id(GameConfig.CARD_BACK_IMG))
+
+    def get(self, value, penalty, highlight, face_up):
+        key = (value, penalty, highlight, True) if face_up else (0, 0, highlight, False)
+        return self._lookup(key, render_card_face, value, penalty, highlight, face_up)
+
+    def get_flip(self, value, penalty, face_up, step):
+        # Карта, стиснута по ширині до step / FLIP_WIDTHS: для перевертання, без
+        # transform.scale на кожен кадр
+        if step >= GameConfig.FLIP_WIDTHS:
+            return self.get(value, penalty, False, face_up)
+        key = ("flip", value, penalty, step) if face_up else ("flip", 0, 0, step)
+        return self._lookup(key, self._render_flip, value, penalty, face_up, step)
+
+    def _render_flip(self, value, penalty, face_up, step):
+        import pygame
+        width = max(1, GameConfig.CARD_WIDTH * step // GameConfig.FLIP_WIDTHS)
+        return pygame.transform.scale(self.get(value, penalty, False, face_up), (width, GameConfig.CARD_HEIGHT))
+
+    def _lookup(self, key, render, *args):
+        epoch = self.current_epoch()
+        if epoch != self.epoch:
+            # Змінились шрифти, картинки чи розмір карт - старі поверхні вже не годяться
+            self.faces.clear()
+            self.epoch = epoch
+        face = self.faces.get(key)
+        if face is not None:
+            self.hits += 1
+            self.faces.move_to_end(key)
+            return face
+        self.misses += 1
+        face = render(*args)
+        self.faces[key] = face
+        if len(self.faces) > self.max_size:
+            self.faces.popitem(last=False)
+        return face
+
+    def clear(self):
+        self.faces.clear()
+        self.epoch = None
+
+
+FACE_CACHE = CardFaceCache(GameConfig.CARD_CACHE_SIZE)
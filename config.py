@@ -1,9 +1,12 @@
-import pygame
-
 class GameConfig:
-    # Window dimensions
+    # Window dimensions. Макет задано для 1200x800, на інших екранах усе
+    # множиться на SCALE; RENDER_SCALE < 1 малює в меншому буфері і розтягує його
     WIDTH = 1200
     HEIGHT = 800
+    BASE_WIDTH = 1200
+    BASE_HEIGHT = 800
+    SCALE = 1.0
+    RENDER_SCALE = 1.0
     
     # Colors
     WHITE = (255, 255, 255)
@@ -17,21 +20,50 @@ class GameConfig:
     # Cards constants
     CARD_WIDTH = 70
     CARD_HEIGHT = 100
+    BASE_CARD_WIDTH = 70
+    BASE_CARD_HEIGHT = 100
+    BASE_SPRITE_SIZE = 60
     
     # Game rules
     MAX_PENALTY_POINTS = 60
     CARDS_PER_PLAYER = 10
     NUM_ROWS = 4
+    ROW_LIMIT = 5
     
-    # Animation
+    # Animation: FPS - частота кадрів, LOGIC_HZ - кроків логіки на секунду;
+    # REVEAL_DELAY і ANIMATION_SPEED рахуються в кроках логіки
+    FPS = 60
+    LOGIC_HZ = 30
+    IDLE_WAIT_MS = 500
     REVEAL_DELAY = 60
     ANIMATION_SPEED = 0.05
+    ANIMATION_STAGGER = 2
+    FLIP_TICKS = 8
+    FLIP_WIDTHS = 8  # скільки стиснутих ширин карти кешується для перевертання
+    COLLAPSE_TICKS = 12
+
+    # Bots: скільки секунд бот може думати у фоні, поки не зіграє дешевий хід
+    BOT_DEADLINE = 2.0
+
+    # Network: адреса сервера (host:port або шлях до unix-сокета) і таймери столу в секундах
+    SERVER_ADDRESS = "127.0.0.1:7777"
+    TABLE_SEATS = 4
+    LOBBY_SECONDS = 5.0
+    TURN_SECONDS = 30.0
+    REVEAL_SECONDS = REVEAL_DELAY / LOGIC_HZ
+    ANIMATE_SECONDS = 1.5
+    MAX_SEND_BUFFER = 1 << 20
     
     # Fonts
     FONT = None
     BIG_FONT = None
     
     # Images
+    ASSET_VERSION = 0
+    CARD_CACHE_SIZE = 512
+    ASSET_CACHE_DIR = ".asset_cache"
+    ASSET_CACHE_KEYS = 4  # скільки розмірів вікна тримає кеш картинок
+    RESIZE_DEBOUNCE = 0.25  # секунди тиші після останнього VIDEORESIZE
     BACKGROUND_IMG = None
     CARD_BACK_IMG = None
     FROG_IMAGES = {}
@@ -40,21 +72,31 @@ class GameConfig:
     PENALTY_WEIGHTS = [6, 5, 4, 3, 2, 1]
     PENALTY_VALUES = range(1, 7)
     
+    @classmethod
+    def set_resolution(cls, width, height):
+        cls.WIDTH, cls.HEIGHT = width, height
+        cls.SCALE = cls.scale_for(width, height)
+        cls.CARD_WIDTH = cls.px(cls.BASE_CARD_WIDTH)
+        cls.CARD_HEIGHT = cls.px(cls.BASE_CARD_HEIGHT)
+
+    @classmethod
+    def scale_for(cls, width, height):
+        return min(width / cls.BASE_WIDTH, height / cls.BASE_HEIGHT)
+
+    @classmethod
+    def px(cls, value, scale=None):
+        # Розмір з макета 1200x800 у пікселях поточної (або заданої) роздільності
+        return max(1, round(value * (cls.SCALE if scale is None else scale)))
+
     @classmethod
     def init_fonts(cls):
-        cls.FONT = pygame.font.SysFont(None, 32)
-        cls.BIG_FONT = pygame.font.SysFont(None, 64)
+        import pygame
+        cls.FONT = pygame.font.SysFont(None, cls.px(32))
+        cls.BIG_FONT = pygame.font.SysFont(None, cls.px(64))
+        cls.ASSET_VERSION += 1
     
     @classmethod
     def init_images(cls):
-        cls.BACKGROUND_IMG = pygame.image.load("background.png").convert()
-        cls.CARD_BACK_IMG = pygame.image.load("card_back.png").convert_alpha()
-        for i in range(1, 7):
-            cls.FROG_IMAGES[i] = pygame.image.load(f"frog_{i}.png").convert_alpha()
-    
-    @classmethod
-    def get_penalty_distribution(cls):
-        distribution = []
-        for v, w in zip(cls.PENALTY_VALUES, cls.PENALTY_WEIGHTS):
-            distribution.extend([v]*w)
-        return distribution 
\ No newline at end of file
+        # Синхронно; main() натомість вантажить картинки у фоні, поки показує меню
+        from assets import AssetLoader
+        AssetLoader().install()
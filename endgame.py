@@ -0,0 +1,203 @@
+import itertools
+import random
+import time
+from collections import OrderedDict
+
+from bots import STRATEGIES
+from monte_carlo import MonteCarloBot, TableView
+from state import cheapest_row, iter_bits
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class TranspositionTable:
+    def __init__(self, capacity=200000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+
+    def get(self, key):
+        self.lookups += 1
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        # Найдавніше використані записи викидаються, пам'ять обмежена
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def state_key(state, me):
+    return (me, state.penalties, state.rows, state.hands, state.points, state.alive)
+
+
+class EndgameSolver:
+    # Точний розв'язок останніх ходів: суперники грають випадково, бот - оптимально
+    def __init__(self, table=None, max_nodes=50000):
+        self.table = table if table is not None else TranspositionTable()
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.deadline = None
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def estimate(self, state, me):
+        # Верхня оцінка кількості вузлів дерева до кінця роздачі
+        players = sum(1 for i in iter_bits(state.alive) if state.hands[i])
+        total, level = 1, 1
+        for t in range(state.hands[me].bit_count(), 0, -1):
+            level *= t ** players
+            total += level
+        return total
+
+    def outcomes(self, state, cards, me, row=None):
+        asked = []
+
+        def choose(s, player, candidates):
+            if player != me:
+                return cheapest_row(s, player, candidates)
+            if row is not None:
+                return row
+            asked.append(candidates)
+            return candidates[0]
+
+        child = state.play_trick(cards, choose)
+        if row is not None or not asked:
+            return [child]
+        return [child] + [state.play_trick(cards, lambda s, p, c, r=r: r if p == me else cheapest_row(s, p, c))
+                          for r in asked[0][1:]]
+
+    def value(self, state, me):
+        if not state.is_alive(me) or not state.hands[me]:
+            return 0.0
+        key = state_key(state, me)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+        best = min(self.card_values(state, me).values())
+        self.table.put(key, best)
+        return best
+
+    def card_values(self, state, me):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        opponents = [i for i in iter_bits(state.alive) if i != me and state.hands[i]]
+        choices = [list(iter_bits(state.hands[i])) for i in opponents]
+        combos = list(itertools.product(*choices))
+        cards = [0] * state.num_players
+        values = {}
+        for card in iter_bits(state.hands[me]):
+            cards[me] = card
+            total = 0.0
+            for combo in combos:
+                for i, v in zip(opponents, combo):
+                    cards[i] = v
+                total += min(child.points[me] - state.points[me] + self.value(child, me)
+                             for child in self.outcomes(state, cards, me))
+            values[card] = total / len(combos)
+        return values
+
+    def solve(self, state, me, deadline=None):
+        self.deadline = deadline
+        start = time.perf_counter()
+        try:
+            return self.card_values(state, me)
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.deadline = None
+
+    def row_values(self, state, cards, me, rows, deadline=None):
+        self.deadline = deadline
+        start = time.perf_counter()
+        try:
+            return {
+                r: sum(child.points[me] - state.points[me] + self.value(child, me)
+                       for child in self.outcomes(state, cards, me, row=r))
+                for r in rows
+            }
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.deadline = None
+
+
+class EndgameBot(MonteCarloBot):
+    name = "endgame"
+
+    def __init__(self, rng=None, budget=0.05, workers=0, depth=3, table=None):
+        super().__init__(rng, budget, workers)
+        self.depth = depth
+        self.solver = EndgameSolver(table)
+
+    def _solve_samples(self, view, deadline, solve):
+        rng = random.Random(self.rng.getrandbits(32))
+        totals, samples = {}, 0
+        while time.perf_counter() < deadline:
+            state = view.determinize(rng)
+            if self.solver.estimate(state, view.me) > self.solver.max_nodes:
+                return None, 0
+            try:
+                values = solve(state)
+            except SearchTimeout:
+                break
+            for k, v in values.items():
+                totals[k] = totals.get(k, 0.0) + v
+            samples += 1
+        return totals, samples
+
+    def choose_card(self, game, player):
+        if len(player.hand) > self.depth or len(player.hand) == 1:
+            return super().choose_card(game, player)
+        self.observe(game, player)
+        deadline = time.perf_counter() + self.budget
+        view = TableView(game, player, self.seen)
+        totals, samples = self._solve_samples(view, deadline, lambda s: self.solver.solve(s, view.me, deadline))
+        self.last_samples = samples
+        if not samples:
+            # Дерево завелике для бюджету - повертаємось до евристики
+            return super().choose_card(game, player)
+        best = min(totals, key=totals.get)
+        return next(c for c in player.hand if c.value == best)
+
+    def choose_row(self, game, player, rows):
+        if len(player.hand) > self.depth:
+            return super().choose_row(game, player, rows)
+        deadline = time.perf_counter() + self.budget
+        revealed = {game.players.index(p): c.value for p, c in game.player_cards_placed.items()}
+        view = TableView(game, player, self.seen, revealed)
+        cards = [revealed.get(i, 0) for i in range(len(game.players))]
+        indices = [game.rows.index(r) for r in rows]
+        totals, samples = self._solve_samples(
+            view, deadline, lambda s: self.solver.row_values(s, cards, view.me, indices, deadline))
+        if not samples:
+            return super().choose_row(game, player, rows)
+        return game.rows[min(totals, key=totals.get)]
+
+    def stats(self):
+        return {
+            "nodes": self.solver.nodes,
+            "nodes_per_second": self.solver.nodes_per_second,
+            "table_size": len(self.solver.table),
+            "hit_rate": self.solver.table.hit_rate,
+        }
+
+
+STRATEGIES[EndgameBot.name] = EndgameBot
@@ -0,0 +1,283 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from batch_sim import NO_CARD, BatchSimulator
+from player import Player
+from rules import GameRules
+
+MAGIC = b"SFGL"
+VERSION = 1
+FLUSH_SIZE = 1 << 16
+
+# Події журналу: гра (сід, номер, склад), хід (карта кожного гравця), взятий ряд, кінець гри
+EV_GAME = 1
+EV_TRICK = 2
+EV_ROW = 3
+EV_END = 4
+
+_HEADER = struct.Struct("<4sB")
+_GAME = struct.Struct("<BQIB")
+
+
+class GameLogWriter:
+    def __init__(self, path, flush_size=FLUSH_SIZE):
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(_HEADER.pack(MAGIC, VERSION))
+        self.flush_size = flush_size
+        self.buffer = bytearray()
+        # Кінець останньої завершеної гри в буфері: на диск потрапляють лише цілі ігри
+        self.complete = 0
+
+    def start_game(self, game):
+        if game.streams is None:
+            raise ValueError("only seeded games can be logged")
+        self.buffer += _GAME.pack(EV_GAME, game.streams.seed, game.streams.game, len(game.players))
+        for p in game.players:
+            name = p.name.encode()[:255]
+            self.buffer += bytes((p.is_human, len(name)))
+            self.buffer += name
+
+    def trick(self, game):
+        placed = game.player_cards_placed
+        self.buffer.append(EV_TRICK)
+        self.buffer += bytes(placed[p].value if p in placed else 0 for p in game.players)
+
+    def row(self, game, player, row):
+        self.buffer += bytes((EV_ROW, game.players.index(player), game.rows.index(row)))
+
+    def end_game(self, game):
+        self.buffer.append(EV_END)
+        self.complete = len(self.buffer)
+        # Пишемо на диск пачками, а не на кожну подію
+        if self.complete >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        # Недограна гра лишається в буфері до свого EV_END
+        if self.complete:
+            with memoryview(self.buffer) as view:
+                self.file.write(view[:self.complete])
+            del self.buffer[:self.complete]
+            self.complete = 0
+        self.file.flush()
+
+    def close(self):
+        # Недограна гра відкидається: дописаний пізніше журнал лишається цілим
+        self.flush()
+        self.buffer.clear()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecord:
+    __slots__ = ("seed", "game", "roster", "events", "tricks", "end")
+
+    def __init__(self, seed, game, roster, events, tricks, end):
+        self.seed = seed
+        self.game = game
+        self.roster = roster
+        self.events = events
+        self.tricks = tricks
+        self.end = end
+
+
+def read_log(path, offset=None):
+    # Файл відображається в пам'ять, тож навіть великі журнали не читаються цілком
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} game log")
+    pos = offset or _HEADER.size
+    while pos < len(data):
+        tag, seed, game, num_players = _GAME.unpack_from(data, pos)
+        if tag != EV_GAME:
+            raise ValueError(f"corrupt game log at byte {pos}")
+        pos += _GAME.size
+        roster = []
+        for _ in range(num_players):
+            human, size = data[pos], data[pos + 1]
+            roster.append((bool(human), bytes(data[pos + 2:pos + 2 + size]).decode()))
+            pos += 2 + size
+        start, tricks = pos, []
+        while pos < len(data) and data[pos] != EV_END:
+            if data[pos] == EV_TRICK:
+                tricks.append(pos - start)
+                pos += 1 + num_players
+            elif data[pos] == EV_ROW:
+                pos += 3
+            else:
+                raise ValueError(f"corrupt game log at byte {pos}")
+        if pos >= len(data):
+            # Незавершена гра в кінці файлу (наприклад, процес впав) - пропускаємо
+            return
+        pos += 1
+        yield GameRecord(seed, game, roster, data[start:pos - 1], tricks, pos)
+
+
+class ReplayGame(GameRules):
+    def __init__(self, record):
+        super().__init__(seed=record.seed, game=record.game)
+        self.record = record
+        self.pos = 0
+        self.start_game(sum(not human for human, _ in record.roster))
+
+    def setup_players(self, human=True, strategies=None):
+        self.players = [Player(name, is_human=is_human) for is_human, name in self.record.roster]
+        self.active_players = len(self.players)
+
+    def _next_row(self):
+        events = self.record.events
+        if events[self.pos] != EV_ROW:
+            raise ValueError("game log is out of sync with the rules")
+        row = events[self.pos + 2]
+        self.pos += 3
+        return self.rows[row]
+
+    def choose_row_for_bot(self, player, rows):
+        return self._next_row()
+
+    def play_trick(self):
+        events = self.record.events
+        if self.pos >= len(events):
+            return False
+        cards = events[self.pos + 1:self.pos + 1 + len(self.players)]
+        self.pos += 1 + len(self.players)
+        self.player_cards_placed = placed = {}
+        for p, value in zip(self.players, cards):
+            if value:
+                for c in p.hand:
+                    if c.value == value:
+                        placed[p] = c
+                        break
+        self.handle_card_placement_prep()
+        self.handle_card_placement_final()
+        if self.state == "pick_row":
+            self.pick_row_for_player(self._next_row())
+        return True
+
+    def run(self):
+        while self.play_trick():
+            pass
+        return self
+
+    def seek(self, trick):
+        # Стан після trick ходів; назад - лише переграванням з початку
+        if trick < self.trick:
+            return ReplayGame(self.record).seek(trick)
+        while self.trick < trick and self.play_trick():
+            pass
+        return self
+
+
+def decode(record):
+    # Уся гра одним проходом по її байтах: карти (хід x місце) і ряди, вибрані замість
+    # цільового (-1 - гравець ряд не вибирав)
+    num_players = len(record.roster)
+    events = np.frombuffer(record.events, dtype=np.uint8)
+    starts = np.asarray(record.tricks, dtype=np.int64)
+    cards = events[starts[:, None] + 1 + np.arange(num_players)].astype(np.int16)
+    rows = np.full(cards.shape, -1, dtype=np.int16)
+    # Між двома ходами лежать лише події рядів, по 3 байти
+    first = starts + 1 + num_players
+    counts = (np.append(starts[1:], len(events)) - first) // 3
+    if counts.any():
+        trick = np.repeat(np.arange(len(starts)), counts)
+        pos = np.repeat(first, counts) + 3 * (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+        rows[trick, events[pos + 1]] = events[pos + 2]
+    return cards, rows
+
+
+class BatchReplay(BatchSimulator):
+    # Ігри ботів з журналу, переграні разом векторними правилами batch_sim:
+    # колоди ті самі, що в GameRules, карти й ряди беруться з журналу
+    def __init__(self, records):
+        super().__init__([r.seed for r in records], [r.game for r in records], len(records[0].roster))
+        decoded = [decode(r) for r in records]
+        self.lengths = np.array([len(cards) for cards, _ in decoded])
+        shape = (self.num_games, self.lengths.max() + 1, self.num_players)
+        self.logged_cards = np.full(shape, NO_CARD, dtype=np.int16)
+        self.logged_rows = np.zeros(shape, dtype=np.int16)
+        for i, (cards, rows) in enumerate(decoded):
+            self.logged_cards[i, :len(cards)] = cards
+            self.logged_rows[i, :len(rows)] = rows
+
+    def choose_cards(self, g, playing):
+        return np.where(playing, self.logged_cards[g, self.trick[g]], NO_CARD).astype(np.int16)
+
+    def choose_rows(self, g, available):
+        return self.logged_rows[g, self.trick[g]]
+
+    def run(self):
+        super().run()
+        if not self.done.all() or (self.trick != self.lengths).any():
+            raise ValueError("game log is out of sync with the rules")
+        return self.points, self.alive
+
+
+def replay_points(records, batch_size=4096):
+    # Штрафи наприкінці кожної гри. Ігри ботів - пачками через BatchReplay;
+    # з людьми - по одній через ReplayGame, бо вибір ряду людиною обриває хід
+    results = [None] * len(records)
+    groups = {}
+    for i, record in enumerate(records):
+        if any(human for human, _ in record.roster):
+            results[i] = [p.penalty_points for p in ReplayGame(record).run().players]
+        else:
+            groups.setdefault(len(record.roster), []).append(i)
+    for indices in groups.values():
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start:start + batch_size]
+            points, _ = BatchReplay([records[i] for i in chunk]).run()
+            for i, row in zip(chunk, points.tolist()):
+                results[i] = row
+    return results
+
+
+def record_games(path, count, num_bots, seed):
+    with GameLogWriter(path) as log:
+        for index in range(count):
+            game = GameRules(seed=seed, game=index)
+            game.recorder = log
+            game.start_game(num_bots, human=False)
+            game.play_until_over()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay binary game logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="play bot games and log them")
+    rec.add_argument("path")
+    rec.add_argument("--games", type=int, default=1000)
+    rec.add_argument("--bots", type=int, default=4)
+    rec.add_argument("--seed", type=int, default=0)
+    rep = sub.add_parser("replay", help="replay every game in a log without rendering")
+    rep.add_argument("path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "record":
+        record_games(args.path, args.games, args.bots, args.seed)
+        count = args.games
+        print(f"log size: {os.path.getsize(args.path)} bytes")
+    else:
+        count = len(replay_points(list(read_log(args.path))))
+    elapsed = time.perf_counter() - start
+    print(f"{args.command}: {count} games in {elapsed:.2f}s ({count / elapsed:.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
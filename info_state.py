@@ -0,0 +1,96 @@
+from config import GameConfig
+from state import to_bits
+
+ALL_CARDS = to_bits(range(1, 111))
+
+
+class InfoState:
+    # Що знає один бот: невидимі карти, відкриті карти суперників, хвости, штрафи
+    # і заповненість рядів. Гра повідомляє про кожну карту, тож стан не перебудовується
+    __slots__ = ("seat", "seen", "unseen", "played", "penalties", "tails", "row_penalty", "lengths")
+
+    def __init__(self, seat):
+        self.seat = seat
+        self.seen = 0
+        self.unseen = ALL_CARDS
+        self.played = []
+        self.penalties = bytearray(111)
+        self.tails = []
+        self.row_penalty = []
+        self.lengths = []
+
+    def deal(self, game, fresh=False):
+        # Нова роздача; fresh - колоду перетасовано заново, тож усе бачене повертається в гру
+        if fresh:
+            self.seen = 0
+            self.penalties = bytearray(111)
+        self.played = [0] * len(game.players)
+        self.tails = [r.tail for r in game.rows]
+        self.row_penalty = [r.penalty for r in game.rows]
+        self.lengths = [len(r.cards) for r in game.rows]
+        for r in game.rows:
+            for c in r.cards:
+                self.see(c)
+        own = 0
+        player = game.players[self.seat]
+        # У вибулого гравця лишається стара рука, в роздачі її вже немає
+        for c in player.hand if player.alive else ():
+            self.penalties[c.value] = c.penalty
+            own |= 1 << c.value
+        self.unseen = ALL_CARDS & ~self.seen & ~own
+
+    def copy(self):
+        other = InfoState(self.seat)
+        other.seen = self.seen
+        other.unseen = self.unseen
+        other.played = list(self.played)
+        other.penalties = bytearray(self.penalties)
+        other.tails = list(self.tails)
+        other.row_penalty = list(self.row_penalty)
+        other.lengths = list(self.lengths)
+        return other
+
+    def see(self, card):
+        bit = 1 << card.value
+        self.seen |= bit
+        self.unseen &= ~bit
+        self.penalties[card.value] = card.penalty
+
+    def reveal(self, seat, card):
+        self.see(card)
+        self.played[seat] |= 1 << card.value
+
+    def place(self, row, card):
+        self.tails[row] = card.value
+        self.row_penalty[row] += card.penalty
+        self.lengths[row] += 1
+
+    def take(self, row, card):
+        self.tails[row] = card.value
+        self.row_penalty[row] = card.penalty
+        self.lengths[row] = 1
+
+    def room(self, row):
+        # Скільки карт ще влізе в ряд, поки він не стане повним
+        return GameConfig.ROW_LIMIT - self.lengths[row]
+
+    def target(self, value):
+        # Той самий ряд, що й RowIndex.find, але за індексом
+        best = None
+        for i, tail in enumerate(self.tails):
+            if tail < value and self.lengths[i] < GameConfig.ROW_LIMIT and (best is None or tail > self.tails[best]):
+                best = i
+        return best
+
+    def unseen_between(self, low, high):
+        # Невидимі карти строго між low і high
+        if high - low < 2:
+            return 0
+        return (self.unseen >> (low + 1) & (1 << (high - low - 1)) - 1).bit_count()
+
+    def unseen_below(self, value):
+        return (self.unseen & (1 << value) - 1).bit_count()
+
+    @property
+    def unseen_count(self):
+        return self.unseen.bit_count()
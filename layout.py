@@ -0,0 +1,70 @@
+import pygame
+
+from config import GameConfig
+
+# Види прямокутників у просторовому індексі
+ROW = 0
+HAND = 1
+BUTTON = 2
+
+MENU_BUTTONS = 9
+
+
+class Layout:
+    # Усі координати столу рахуються тут один раз на зміну стану; малювання,
+    # анімація і кліки беруть їх звідси, а не з власних формул
+    def __init__(self, num_rows, hand_size, reveal_count, num_players, cell=64):
+        W, H = GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT
+        px = GameConfig.px
+        self.key = layout_key(num_rows, hand_size, reveal_count, num_players)
+
+        row_y = GameConfig.HEIGHT//2 - 2*(H+px(10))
+        self.rows = [pygame.Rect(GameConfig.WIDTH//2 - 2*(W+px(20)) + i*(W+px(100)), row_y, W+px(40), H+px(150))
+                     for i in range(num_rows)]
+        self.rows_area = self.rows[0].unionall(self.rows) if self.rows else pygame.Rect(0, 0, 0, 0)
+
+        hand_y = GameConfig.HEIGHT - H - px(50)
+        self.hand = [pygame.Rect(px(50) + i*(W+px(5)), hand_y, W, H) for i in range(hand_size)]
+        self.hand_area = pygame.Rect(px(50), hand_y, max(hand_size*(W+px(5)) - px(5), W), H)
+
+        reveal_x = GameConfig.WIDTH//2 - (reveal_count*(W+px(10)))//2
+        self.reveal = [(reveal_x + i*(W+px(10)), GameConfig.HEIGHT//2 - H//2) for i in range(reveal_count)]
+
+        self.hud = [(px(10), px(10) + px(30)*i) for i in range(num_players)]
+        self.hud_area = pygame.Rect(0, 0, GameConfig.WIDTH//2, px(10) + px(30)*num_players)
+
+        size, margin = px(50), px(20)
+        buttons_x = (GameConfig.WIDTH - (size + margin)*MENU_BUTTONS + margin) // 2
+        self.buttons = [pygame.Rect(buttons_x + i*(size + margin), GameConfig.HEIGHT//2 + px(50), size, size)
+                        for i in range(MENU_BUTTONS)]
+        self.row_step = px(20), px(10)
+
+        # Рівномірна сітка: точка одразу дає клітинку з кількома кандидатами
+        self.cell = cell
+        self.cols = GameConfig.WIDTH // cell + 1
+        self.cells = [[] for _ in range(self.cols * (GameConfig.HEIGHT // cell + 1))]
+        for kind, rects in ((ROW, self.rows), (HAND, self.hand), (BUTTON, self.buttons)):
+            for index, rect in enumerate(rects):
+                for cy in range(rect.top // cell, (rect.bottom - 1) // cell + 1):
+                    for cx in range(rect.left // cell, (rect.right - 1) // cell + 1):
+                        self.cells[cy*self.cols + cx].append((kind, index, rect))
+
+    def row_slot(self, row, j):
+        # Місце j-ї карти в ряду
+        rect = self.rows[row]
+        dx, dy = self.row_step
+        return rect.x + dx, rect.y + dy + j*(GameConfig.CARD_HEIGHT//2)
+
+    def hit(self, pos, kind):
+        x, y = pos
+        if not (0 <= x < GameConfig.WIDTH and 0 <= y < GameConfig.HEIGHT):
+            return None
+        for k, index, rect in self.cells[(y // self.cell)*self.cols + x // self.cell]:
+            if k == kind and rect.collidepoint(x, y):
+                return index
+        return None
+
+
+def layout_key(num_rows, hand_size, reveal_count, num_players):
+    return (num_rows, hand_size, reveal_count, num_players,
+            GameConfig.WIDTH, GameConfig.HEIGHT, GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT)
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from config import GameConfig
+from server import parse_address
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = []
+        self.last_move = {}
+        self.games = 0
+        self.messages = 0
+        self.errors = 0
+
+
+async def open_connection(address):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(target)
+    return await asyncio.open_connection(*target)
+
+
+async def play(address, stats, games, seats, think, rng, name):
+    # Один гравець: ходить випадковою картою після паузи think. Затримка сервера - від
+    # останнього ходу людей за столом до відповіді (reveal чи trick після вибору ряду)
+    try:
+        reader, writer = await open_connection(address)
+    except OSError:
+        stats.errors += 1
+        return
+    send = lambda **m: writer.write(json.dumps(m, separators=(",", ":")).encode() + b"\n")
+    send(op="join", name=name, seats=seats)
+    table = seat = None
+    played = 0
+    try:
+        async for line in reader:
+            message = json.loads(line)
+            stats.messages += 1
+            op = message["op"]
+            if op == "joined":
+                table, seat = message["table"], message["seat"]
+            elif op == "state" and message["state"] == "round" and message["played"] is None:
+                if message["hand"] and message["players"][seat][2]:
+                    if think:
+                        await asyncio.sleep(rng.uniform(0, think))
+                    send(op="play", card=rng.choice(message["hand"])[0])
+                    stats.last_move[table] = time.perf_counter()
+            elif op == "pick_row":
+                send(op="row", row=0)
+                stats.last_move[table] = time.perf_counter()
+            elif op in ("reveal", "trick") and table in stats.last_move:
+                stats.latencies.append(time.perf_counter() - stats.last_move.pop(table))
+            elif op == "over":
+                stats.games += 1
+                played += 1
+                if played >= games:
+                    break
+                send(op="join", name=name, seats=seats)
+    except (OSError, ValueError):
+        stats.errors += 1
+    writer.close()
+
+
+async def run(address, clients, games, seats, think, ramp):
+    stats = LoadStats()
+    start = time.perf_counter()
+    tasks = []
+    for i in range(clients):
+        tasks.append(asyncio.create_task(play(address, stats, games, seats, think, random.Random(i), f"load-{i}")))
+        if ramp and i % 100 == 99:
+            await asyncio.sleep(ramp)
+    await asyncio.gather(*tasks)
+    return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the table server")
+    parser.add_argument("address", nargs="?", default=GameConfig.SERVER_ADDRESS)
+    parser.add_argument("--clients", type=int, default=1000, help="concurrent players")
+    parser.add_argument("--seats", type=int, default=GameConfig.TABLE_SEATS, help="seats per table")
+    parser.add_argument("--games", type=int, default=1, help="games each client plays")
+    parser.add_argument("--think", type=float, default=0.0, help="max random think time per card, seconds")
+    parser.add_argument("--ramp", type=float, default=0.01, help="pause after every 100 connections")
+    args = parser.parse_args()
+    stats, elapsed = asyncio.run(run(args.address, args.clients, args.games, args.seats, args.think, args.ramp))
+    lat = [x * 1000 for x in stats.latencies] or [float("nan")] * 2
+    q = statistics.quantiles(lat, n=100)
+    print(f"{args.clients} clients, {stats.games} games, {len(stats.latencies)} tricks in {elapsed:.1f}s "
+          f"({len(stats.latencies) / elapsed:.0f} tricks/s, {stats.messages} messages, {stats.errors} errors)")
+    print(f"last move -> server reply latency ms: p50 {q[49]:.1f}  p95 {q[94]:.1f}  p99 {q[98]:.1f}  max {max(lat):.1f}")
+
+
+if __name__ == "__main__":
+    main()
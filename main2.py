@@ -1,18 +1,77 @@
+import argparse
+import copy
 import pygame
-import sys
 import random
+import sys
+import time
 from pygame.locals import *
 from config import GameConfig
-from card import Card
-from player import Player, Row
+from rules import GameRules
 from animation_manager import AnimationManager
-
-pygame.init()
-SCREEN = pygame.display.set_mode((GameConfig.WIDTH, GameConfig.HEIGHT))
-pygame.display.set_caption("Samurai Frog Card Placement Game")
-
-GameConfig.init_fonts()
-GameConfig.init_images()
+from game_log import GameLogWriter
+from renderer import DirtyRenderer, LayerCache
+from profiler import FrameProfiler
+from timestep import FixedStep
+from layout import BUTTON, HAND, ROW, Layout, layout_key
+from assets import ASSETS_READY, AssetLoader
+from bot_pool import BotPool, cheapest_row, lowest_card
+import endgame  # noqa: F401  реєструє стратегії montecarlo і endgame
+import risk_bot  # noqa: F401  реєструє стратегію risk
+from bots import make_bot
+
+# SCREEN - поверхня, на якій малює гра; WINDOW - вікно. Вони різні лише коли
+# RENDER_SCALE < 1: тоді кадр малюється в меншому буфері і розтягується
+SCREEN = None
+WINDOW = None
+
+def init_display(load_images=True, size=None, render_scale=None):
+    global WINDOW
+    pygame.init()
+    WINDOW = pygame.display.set_mode(size or (GameConfig.WIDTH, GameConfig.HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Samurai Frog Card Placement Game")
+    set_resolution(WINDOW.get_size(), render_scale, load_images)
+
+def internal_size(size):
+    return max(1, round(size[0] * GameConfig.RENDER_SCALE)), max(1, round(size[1] * GameConfig.RENDER_SCALE))
+
+def set_resolution(size, render_scale=None, load_images=True):
+    # Усі розміри, шрифти і картинки перераховуються один раз тут, а не щокадру
+    global SCREEN
+    if render_scale is not None:
+        GameConfig.RENDER_SCALE = render_scale
+    internal = internal_size(size)
+    SCREEN = WINDOW if internal == WINDOW.get_size() else pygame.Surface(internal).convert()
+    GameConfig.set_resolution(*internal)
+    GameConfig.init_fonts()
+    if load_images:
+        GameConfig.init_images()
+
+def present(rects):
+    if SCREEN is WINDOW:
+        pygame.display.update(rects)
+        return
+    # Розтягуємо у вікно лише змінені ділянки
+    kx = WINDOW.get_width() / SCREEN.get_width()
+    ky = WINDOW.get_height() / SCREEN.get_height()
+    bounds = WINDOW.get_rect()
+    out = []
+    for r in rects:
+        dst = pygame.Rect(int(r.x * kx), int(r.y * ky), 0, 0)
+        dst.width = min(int(-(-r.right * kx // 1)), bounds.right) - dst.x
+        dst.height = min(int(-(-r.bottom * ky // 1)), bounds.bottom) - dst.y
+        if dst.width > 0 and dst.height > 0 and r.width > 0 and r.height > 0:
+            pygame.transform.scale(SCREEN.subsurface(r), dst.size, WINDOW.subsurface(dst))
+            out.append(dst)
+    pygame.display.update(out)
+
+def to_screen(pos):
+    # Координати вікна (миша) -> координати буфера, в якому малює гра
+    if SCREEN is WINDOW:
+        return pos
+    return (pos[0] * SCREEN.get_width() // WINDOW.get_width(), pos[1] * SCREEN.get_height() // WINDOW.get_height())
+
+def mouse_pos():
+    return to_screen(pygame.mouse.get_pos())
 
 class Button:
     def __init__(self, x, y, width, height, text, font=None):
@@ -27,8 +86,8 @@ class Button:
         text_color = GameConfig.BLACK
         
         # Малюємо фон кнопки
-        pygame.draw.rect(surface, bg_color, self.rect, border_radius=10)
-        pygame.draw.rect(surface, GameConfig.BLACK, self.rect, 2, border_radius=10)
+        pygame.draw.rect(surface, bg_color, self.rect, border_radius=GameConfig.px(10))
+        pygame.draw.rect(surface, GameConfig.BLACK, self.rect, GameConfig.px(2), border_radius=GameConfig.px(10))
         
         # Малюємо текст
         text_surface = self.font.render(self.text, True, text_color)
@@ -43,133 +102,99 @@ class Button:
                 return True
         return False
 
-class Game:
-    def __init__(self):
-        self.players = []
-        self.rows = [Row() for _ in range(GameConfig.NUM_ROWS)]
-        self.deck = []
+class Game(GameRules):
+    def __init__(self, seed=None):
+        # Кожна гра має сід, щоб її можна було записати й відтворити
+        super().__init__(seed=random.getrandbits(63) if seed is None else seed)
         self.discard = []
-        self.state = "menu"
-        self.selected_card = None
-        self.selected_player = None
         self.selected_row = None
-        self.leaderboard = []
-        self.player_cards_placed = {}
-        self.num_bots = 0
         self.reveal_timer = 0
+        self.alpha = 1.0
         self.animation_manager = AnimationManager(self)
         self.animation_cards = []
-        self.pending_placements = []
         self.menu_buttons = []
+        self.layers = LayerCache()
+        self._layout = None
+        # BotPool: боти думають у фоні; без нього (тести, повтори) - синхронно
+        self.bots = None
+        self.bot_strategy = None
+        self.row_choices = {}
         self.setup_menu()
-        
-    def generate_deck(self):
-        self.deck = []
-        penalty_distribution = GameConfig.get_penalty_distribution()
-        for v in range(1, 111):
-            penalty = random.choice(penalty_distribution)
-            self.deck.append(Card(v, penalty))
-
-    def shuffle_deck(self):
-        random.shuffle(self.deck)
-
-    def setup_players(self):
-        self.players = [Player("Player 1", is_human=True)]
-        for i in range(self.num_bots):
-            self.players.append(Player(f"Bot {i+1}"))
-        self.active_players = len(self.players)
-
-    def start_new_play(self):
-        cards_needed = GameConfig.CARDS_PER_PLAYER * len(self.get_alive_players()) + GameConfig.NUM_ROWS
-        if len(self.deck) < cards_needed:
-            self.generate_deck()
-            self.shuffle_deck()
-        for p in self.players:
-            if p.alive:
-                p.hand = [self.deck.pop() for _ in range(GameConfig.CARDS_PER_PLAYER)]
-        self.rows = [Row() for _ in range(GameConfig.NUM_ROWS)]
-        for row in self.rows:
-            row.add_card(self.deck.pop())
-        self.state = "round"
-        self.player_cards_placed = {}
 
-    def get_alive_players(self):
-        return [p for p in self.players if p.alive]
-
-    def all_players_placed(self):
-        alive = self.get_alive_players()
-        return len(self.player_cards_placed) == len(alive)
+    def setup_players(self, human=True, strategies=None):
+        if strategies is None and self.bot_strategy:
+            first = 1 if human else 0
+            strategies = [make_bot(self.bot_strategy, self.streams.bot(first + i)) for i in range(self.num_bots)]
+        super().setup_players(human, strategies)
+
+    def snapshot(self):
+        # Бот у потоці читає власну копію стола: ряди, руки й InfoState копіюються,
+        # тож людина може походити чи карти розкластись, поки він думає
+        view = copy.copy(self)
+        view.rows = [r.copy() for r in self.rows]
+        view.players = []
+        for p in self.players:
+            q = p.copy()
+            if getattr(p.strategy, "info", None) is not None:
+                q.strategy = copy.copy(p.strategy)
+                q.strategy.info = p.strategy.info.copy()
+            view.players.append(q)
+        seats = dict(zip(self.players, view.players))
+        view.player_cards_placed = {seats[p]: c for p, c in self.player_cards_placed.items()}
+        view.pending_placements = []
+        view.trackers = []
+        view.recorder = None
+        view._row_index = None
+        return view
+
+    def choose_bot_cards(self):
+        if self.bots is None:
+            return super().choose_bot_cards()
+        view = None
+        for seat, p in enumerate(self.players):
+            if not p.alive or p.is_human or p in self.player_cards_placed or self.bots.busy(("card", p)):
+                continue
+            view = view or self.snapshot()
+            # Карти в копії руки ті самі об'єкти, тож вибір можна шукати в p.hand
+            self.bots.submit(("card", p), lambda q=view.players[seat]: q.choose_card(view), lambda p=p: lowest_card(p))
+        self.collect_bots()
+
+    def collect_bots(self):
+        # Рішення з іншої роздачі чи гри (рука вже інша) відкидаються
+        for (kind, p), choice in self.bots.poll().items():
+            if kind == "card":
+                if p.alive and p in self.players and p not in self.player_cards_placed and choice in p.hand:
+                    self.player_cards_placed[p] = choice
+            elif self.state == "reveal" and p in self.player_cards_placed:
+                self.row_choices[p] = self.rows[choice]
+
+    def bots_thinking(self):
+        return self.bots is not None and bool(self.bots.tasks)
 
     def handle_card_placement_prep(self):
-        self.state = "reveal"
+        super().handle_card_placement_prep()
         self.reveal_timer = 0
-
-    def handle_card_placement_final(self):
-        placements = sorted(self.player_cards_placed.items(), key=lambda x: x[1].value)
-        self.pending_placements = []
-        
-        # Знаходимо ряди з 5 картами
-        full_rows = [row for row in self.rows if len(row.cards) >= 5]
-        
-        if full_rows:
-            # Якщо є повний ряд, гравець з найменшою картою мусить його взяти
-            player, card = placements[0]  # Беремо гравця з найменшою картою
-            self.pending_placements.append((player, card, full_rows[0], True))
-            
-            # Інші гравці розміщують картини за звичайними правилами
-            for player, card in placements[1:]:
-                placed_row = self.can_place_card_in_rows(card)
-                if placed_row:
-                    self.pending_placements.append((player, card, placed_row, False))
-                else:
-                    if player.is_human:
-                        self.state = "pick_row"
-                        self.selected_card = card
-                        self.selected_player = player
-                        return
-                    else:
-                        # Бот вибирає випадковий ряд, крім повних
-                        available_rows = [r for r in self.rows if len(r.cards) < 5]
-                        if not available_rows:
-                            available_rows = self.rows
-                        chosen_row = random.choice(available_rows)
-                        self.pending_placements.append((player, card, chosen_row, True))
-        else:
-            # Якщо немає повних рядів, звичайна логіка розміщення
-            for player, card in placements:
-                placed_row = self.can_place_card_in_rows(card)
-                if placed_row:
-                    self.pending_placements.append((player, card, placed_row, False))
-                else:
-                    if player.is_human:
-                        self.state = "pick_row"
-                        self.selected_card = card
-                        self.selected_player = player
-                        return
-                    else:
-                        chosen_row = random.choice(self.rows)
-                        self.pending_placements.append((player, card, chosen_row, True))
-        
+        self.row_choices = {}
+        if self.bots is not None:
+            # Ряди боти вибирають, поки гравці роздивляються відкриті карти
+            view = self.snapshot()
+            for p, rows in self.rows_to_choose():
+                if p.strategy is None:
+                    continue  # випадковий ряд зі спільного rng стола береться як і раніше, в головному потоці
+                # Бот вибирає серед рядів копії, а назад повертається номер ряду
+                mine = [view.rows[self.rows.index(r)] for r in rows]
+                q = view.players[self.players.index(p)]
+                self.bots.submit(("row", p), lambda q=q, rows=mine: view.rows.index(GameRules.choose_row_for_bot(view, q, rows)),
+                                 lambda rows=rows: self.rows.index(cheapest_row(rows)))
+
+    def choose_row_for_bot(self, player, rows):
+        if player in self.row_choices:
+            return self.row_choices.pop(player)
+        return super().choose_row_for_bot(player, rows)
+
+    def resolve_placements(self):
         # Починаємо анімацію тільки якщо всі картини розміщені
-        if self.pending_placements:
-            self.start_animation()
-
-    def can_place_card_in_rows(self, card):
-        possible_rows = []
-        for r in self.rows:
-            if r.last_card_value is None:
-                continue
-            # Якщо в ряду 5 карт, цей ряд не можна вибрати для розміщення
-            if len(r.cards) >= 5:
-                continue
-            if card.value > r.last_card_value:
-                possible_rows.append(r)
-        if possible_rows:
-            # Знаходимо ряд з мінімальною різницею
-            diffs = [(r, card.value - r.last_card_value) for r in possible_rows]
-            diffs.sort(key=lambda x: x[1])
-            return diffs[0][0]
-        return None
+        self.start_animation()
 
     def start_animation(self):
         self.animation_manager.create_card_animations(self.pending_placements)
@@ -179,243 +204,321 @@ class Game:
         if self.animation_manager.update():
             self.animation_cards, self.pending_placements = self.animation_manager.get_results()
             self.finish_placements()
+            self.animation_cards = []
             self.end_round()
 
-    def finish_placements(self):
-        for anim in self.animation_cards:
-            player = anim.player
-            card = anim.card
-            take_row = anim.take_row
-            row_obj = anim.row_obj
-            if take_row:
-                penalty_cards = row_obj.reset_with_card(card)
-                player.remove_card_from_hand(card)
-                for c in penalty_cards:
-                    player.penalty_points += c.penalty
-            else:
-                row_obj.add_card(card)
-                player.remove_card_from_hand(card)
-
-        self.animation_cards = []
-        self.pending_placements = []
-
-    def pick_row_for_player(self, row):
-        penalty_cards = row.reset_with_card(self.selected_card)
-        self.selected_player.remove_card_from_hand(self.selected_card)
-        for c in penalty_cards:
-            self.selected_player.penalty_points += c.penalty
-        self.selected_card = None
-        self.selected_player = None
-        self.end_round()
-
-    def end_round(self):
-        for p in self.players:
-            if p.alive and p.penalty_points > GameConfig.MAX_PENALTY_POINTS:
-                p.alive = False
-                self.leaderboard.append((p.name, p.penalty_points))
-
-        alive_count = sum(p.alive for p in self.players)
-        if alive_count == 1:
-            self.state = "leaderboard"
-            return
-
-        still_have_cards = any(len(p.hand) > 0 and p.is_human for p in self.get_alive_players())
-        if not still_have_cards:
-            self.start_new_play()
-        else:
-            self.player_cards_placed = {}
-            self.state = "round"
+    def layout(self):
+        # Розкладка перераховується лише коли змінюється кількість рядів, карт чи гравців
+        hand = self.players[0].hand if self.players else ()
+        key = layout_key(len(self.rows), len(hand), len(self.player_cards_placed), len(self.players))
+        if self._layout is None or self._layout.key != key:
+            self._layout = Layout(len(self.rows), len(hand), len(self.player_cards_placed), len(self.players))
+        return self._layout
 
-    def draw_reveal_cards(self):
-        cx = GameConfig.WIDTH//2
-        cy = GameConfig.HEIGHT//2
+    def draw_reveal_cards(self, surface):
         chosen = list(self.player_cards_placed.items())
         chosen.sort(key=lambda x: x[1].value)
-        count = len(chosen)
-        start_x = cx - (count*(GameConfig.CARD_WIDTH+10))//2
-        for i, (p, c) in enumerate(chosen):
+        for (p, c), (x, y) in zip(chosen, self.layout().reveal):
             face_up = p.is_human or self.reveal_timer > GameConfig.REVEAL_DELAY
-            c.draw(SCREEN, start_x+i*(GameConfig.CARD_WIDTH+10), cy - GameConfig.CARD_HEIGHT//2, face_up=face_up)
+            c.draw(surface, x, y, face_up=face_up)
 
-    def draw_rows(self):
-        row_y = GameConfig.HEIGHT//2 - 2*(GameConfig.CARD_HEIGHT+10)
+    def hidden_rows(self):
+        # Ряди, які під час анімації забирають: їхні карти малює аніматор
+        return self.animation_manager.hidden_rows if self.state == "animate" else frozenset()
+
+    def draw_rows(self, surface):
+        hidden = self.hidden_rows()
+        layout = self.layout()
         for i, row in enumerate(self.rows):
-            row_x = GameConfig.WIDTH//2 - 2*(GameConfig.CARD_WIDTH+20) + i*(GameConfig.CARD_WIDTH+100)
-            pygame.draw.rect(SCREEN, GameConfig.GRAY, 
-                           (row_x, row_y, GameConfig.CARD_WIDTH+40, GameConfig.CARD_HEIGHT+150), 
-                           border_radius=5)
-            cy = row_y+10
-            for card in row.cards:
-                card.draw(SCREEN, row_x+20, cy)
-                cy += GameConfig.CARD_HEIGHT//2
-            if self.state == "pick_row" and self.selected_player and self.selected_player.is_human:
-                mx, my = pygame.mouse.get_pos()
-                rect = pygame.Rect(row_x, row_y, GameConfig.CARD_WIDTH+40, GameConfig.CARD_HEIGHT+150)
-                if rect.collidepoint(mx, my):
-                    pygame.draw.rect(SCREEN, GameConfig.YELLOW, rect, 4, border_radius=5)
-
-    def draw_player_info(self):
-        info_y = 10
-        for p in self.players:
+            pygame.draw.rect(surface, GameConfig.GRAY, layout.rows[i], border_radius=GameConfig.px(5))
+            if i in hidden:
+                continue
+            for j, card in enumerate(row.cards):
+                card.draw(surface, *layout.row_slot(i, j))
+
+    def draw_player_info(self, surface):
+        for p, pos in zip(self.players, self.layout().hud):
             color = GameConfig.BLACK if p.alive else GameConfig.RED
             txt = GameConfig.FONT.render(f"{p.name}: {p.penalty_points} pts {'(OUT)' if not p.alive else ''}", True, color)
-            SCREEN.blit(txt, (10, info_y))
-            info_y += 30
-
-    def draw_hand(self):
-        human = self.players[0]
-        x_start = 50
-        y_start = GameConfig.HEIGHT - GameConfig.CARD_HEIGHT - 50
-        if self.state == "round" and human.alive and human not in self.player_cards_placed:
-            for i, c in enumerate(human.hand):
-                mx, my = pygame.mouse.get_pos()
-                highlight = pygame.Rect(x_start+i*(GameConfig.CARD_WIDTH+5), y_start, 
-                                     GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT).collidepoint(mx, my)
-                c.draw(SCREEN, x_start+i*(GameConfig.CARD_WIDTH+5), y_start, highlight=highlight, face_up=True)
+            surface.blit(txt, pos)
+
+    def draw_hand(self, surface):
+        for c, rect in zip(self.players[0].hand, self.layout().hand):
+            c.draw(surface, rect.x, rect.y, face_up=True)
+
+    def human_can_place(self):
+        human = self.players[0] if self.players else None
+        return self.state == "round" and human is not None and human.alive and human not in self.player_cards_placed
+
+    def draw_menu_title(self, surface):
+        title = GameConfig.BIG_FONT.render("Select number of bot samurai frogs:", True, GameConfig.WHITE)
+        surface.blit(title, (GameConfig.WIDTH//2 - title.get_width()//2, GameConfig.HEIGHT//2 - GameConfig.px(50)))
+
+    def draw_pick_row_message(self, surface):
+        msg = "Select a row to take."
+        txt = GameConfig.BIG_FONT.render(msg, True, GameConfig.BLACK)
+        surface.blit(txt, (GameConfig.WIDTH//2 - txt.get_width()//2, GameConfig.px(50)))
+
+    def draw_leaderboard(self, surface):
+        surface.fill(GameConfig.BLUE)
+        leaderboard_text = GameConfig.BIG_FONT.render("Leaderboard", True, GameConfig.WHITE)
+        surface.blit(leaderboard_text, (GameConfig.WIDTH//2 - leaderboard_text.get_width()//2, GameConfig.px(50)))
+        sorted_leaderboard = sorted(self.leaderboard, key=lambda x: x[1])
+        start_y = GameConfig.px(200)
+        for i, (name, points) in enumerate(sorted_leaderboard):
+            line = f"{i+1}. {name}: {points} pts"
+            line_surf = GameConfig.FONT.render(line, True, GameConfig.WHITE)
+            surface.blit(line_surf, (GameConfig.WIDTH//2 - line_surf.get_width()//2, start_y))
+            start_y += GameConfig.px(40)
+
+    def blit_rows(self, surface):
+        key = (tuple(tuple((c.value, c.penalty) for c in r.cards) for r in self.rows), self.hidden_rows())
+        self.layers.blit(surface, "rows", key, self.draw_rows, self.layout().rows_area)
+
+    def blit_player_info(self, surface):
+        key = tuple((p.name, p.penalty_points, p.alive) for p in self.players)
+        self.layers.blit(surface, "hud", key, self.draw_player_info, self.layout().hud_area)
+
+    def blit_hand(self, surface):
+        key = tuple((c.value, c.penalty) for c in self.players[0].hand)
+        self.layers.blit(surface, "hand", key, self.draw_hand, self.layout().hand_area)
+
+    def draw_scene(self, surface):
+        # Статична частина кадру: фон і готові шари, що змінюються лише разом зі станом гри
+        if GameConfig.BACKGROUND_IMG is None:
+            # Картинки ще вантажаться у фоні
+            surface.fill(GameConfig.BLACK)
         else:
-            for i, c in enumerate(human.hand):
-                c.draw(SCREEN, x_start+i*(GameConfig.CARD_WIDTH+5), y_start, face_up=True)
-
-    def draw_animation(self):
-        self.draw_rows()
-        self.draw_player_info()
-        self.draw_hand()
-        self.animation_manager.draw(SCREEN)
-
-    def draw(self):
-        SCREEN.blit(GameConfig.BACKGROUND_IMG, (0, 0))
+            surface.blit(GameConfig.BACKGROUND_IMG, (0, 0))
 
         if self.state == "menu":
-            title = GameConfig.BIG_FONT.render("Select number of bot samurai frogs:", True, GameConfig.WHITE)
-            SCREEN.blit(title, (GameConfig.WIDTH//2 - title.get_width()//2, GameConfig.HEIGHT//2 - 50))
-            
-            # Малюємо кнопки
-            for button in self.menu_buttons:
-                button.draw(SCREEN)
-        
+            area = pygame.Rect(0, GameConfig.HEIGHT//2 - GameConfig.px(50), GameConfig.WIDTH, GameConfig.BIG_FONT.get_linesize())
+            self.layers.blit(surface, "menu", (), self.draw_menu_title, area)
+
         elif self.state in ["round", "pick_row"]:
-            self.draw_hand()
-            self.draw_rows()
-            self.draw_player_info()
+            self.blit_hand(surface)
+            self.blit_rows(surface)
+            self.blit_player_info(surface)
             if self.state == "pick_row":
-                msg = "Select a row to take."
-                txt = GameConfig.BIG_FONT.render(msg, True, GameConfig.BLACK)
-                SCREEN.blit(txt, (GameConfig.WIDTH//2 - txt.get_width()//2, 50))
+                area = pygame.Rect(0, GameConfig.px(50), GameConfig.WIDTH, GameConfig.BIG_FONT.get_linesize())
+                self.layers.blit(surface, "pick_row", (), self.draw_pick_row_message, area)
 
         elif self.state == "reveal":
-            self.draw_rows()
-            self.draw_player_info()
-            self.draw_hand()
-            self.draw_reveal_cards()
+            self.blit_rows(surface)
+            self.blit_player_info(surface)
+            self.blit_hand(surface)
+            self.draw_reveal_cards(surface)
 
         elif self.state == "animate":
-            self.draw_animation()
+            self.blit_rows(surface)
+            self.blit_player_info(surface)
+            self.blit_hand(surface)
 
         elif self.state == "leaderboard":
-            SCREEN.fill(GameConfig.BLUE)
-            leaderboard_text = GameConfig.BIG_FONT.render("Leaderboard", True, GameConfig.WHITE)
-            SCREEN.blit(leaderboard_text, (GameConfig.WIDTH//2 - leaderboard_text.get_width()//2, 50))
-            sorted_leaderboard = sorted(self.leaderboard, key=lambda x: x[1])
-            start_y = 200
-            for i, (name, points) in enumerate(sorted_leaderboard):
-                line = f"{i+1}. {name}: {points} pts"
-                line_surf = GameConfig.FONT.render(line, True, GameConfig.WHITE)
-                SCREEN.blit(line_surf, (GameConfig.WIDTH//2 - line_surf.get_width()//2, start_y))
-                start_y += 40
-
-    def update(self, events):
+            self.layers.blit(surface, "leaderboard", tuple(self.leaderboard), self.draw_leaderboard)
+
+    def scene_key(self):
+        # Якщо ключ не змінився, статичну частину можна не перемальовувати
+        return (self.state, self.trick, GameConfig.ASSET_VERSION, self.human_can_place(), len(self.leaderboard),
+                tuple((p.penalty_points, p.alive) for p in self.players),
+                tuple((len(r.cards), r.tail) for r in self.rows),
+                tuple(c.value for c in self.players[0].hand) if self.players else (),
+                tuple(c.value for c in self.player_cards_placed.values()))
+
+    def dynamic_items(self):
+        # Те, що змінюється від кадру до кадру: наведення мишею і карти в польоті.
+        # Ключ змінюється разом з виглядом, прямокутник - де елемент лежить
+        items = []
+        if self.state == "menu":
+            for i, button in enumerate(self.menu_buttons):
+                items.append((("button", i, button.is_hovered), button.rect, button.draw))
+        elif self.human_can_place():
+            layout = self.layout()
+            i = layout.hit(mouse_pos(), HAND)
+            if i is not None:
+                c, rect = self.players[0].hand[i], layout.hand[i]
+                items.append((("hand", i), rect, lambda s: c.draw(s, rect.x, rect.y, highlight=True)))
+        elif self.state == "pick_row" and self.selected_player and self.selected_player.is_human:
+            layout = self.layout()
+            i = layout.hit(mouse_pos(), ROW)
+            if i is not None:
+                rect = layout.rows[i]
+                items.append((("row", i), rect,
+                              lambda s: pygame.draw.rect(s, GameConfig.YELLOW, rect, GameConfig.px(4),
+                                                         border_radius=GameConfig.px(5))))
+        elif self.state == "animate":
+            manager = self.animation_manager
+            for slot, card, x, y, t, kind in manager.items(self.alpha):
+                rect = pygame.Rect(x, y, GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT)
+                look = round(t, 2) if kind else 0
+                items.append((("anim", slot, x, y, look), rect,
+                              lambda s, item=(card, x, y, t, kind): manager.draw_item(s, *item)))
+        return items
+
+    def draw(self, surface=None):
+        surface = surface or SCREEN
+        self.draw_scene(surface)
+        for _, _, draw in self.dynamic_items():
+            draw(surface)
+
+    def is_idle(self):
+        # Нічого не рухається і ніхто, крім людини, не має ходити - можна спати до вводу
+        if self.state in ("menu", "leaderboard", "pick_row"):
+            return True
         if self.state == "round":
-            alive_players = self.get_alive_players()
-            for p in alive_players:
-                if p not in self.player_cards_placed:
-                    if not p.is_human:
-                        chosen = p.choose_card()
-                        if chosen:
-                            self.player_cards_placed[p] = chosen
+            waiting = [p for p in self.get_alive_players() if p not in self.player_cards_placed]
+            return bool(waiting) and all(p.is_human for p in waiting) and not self.bots_thinking()
+        return False
+
+    def update(self, events=()):
+        if self.state == "round":
+            self.choose_bot_cards()
             if self.all_players_placed():
                 self.handle_card_placement_prep()
 
         elif self.state == "reveal":
             self.reveal_timer += 1
-            if self.reveal_timer > GameConfig.REVEAL_DELAY:
+            if self.bots is not None:
+                self.collect_bots()
+            if self.reveal_timer > GameConfig.REVEAL_DELAY and not self.bots_thinking():
                 self.handle_card_placement_final()
 
         elif self.state == "animate":
             self.animate_step()
 
     def setup_menu(self):
-        button_width = 50
-        button_height = 50
-        button_margin = 20
-        total_width = (button_width + button_margin) * 9 - button_margin
-        start_x = (GameConfig.WIDTH - total_width) // 2
-        y = GameConfig.HEIGHT // 2 + 50
-        
-        self.menu_buttons = []
-        for i in range(9):
-            x = start_x + i * (button_width + button_margin)
-            button = Button(x, y, button_width, button_height, str(i + 1))
-            self.menu_buttons.append(button)
-            
-def main():
+        self.menu_buttons = [Button(*rect, str(i + 1)) for i, rect in enumerate(self.layout().buttons)]
+
+    def on_resize(self):
+        # Нова роздільність: розкладка, шари й кнопки будуються заново
+        self._layout = None
+        self.layers.clear()
+        self.setup_menu()
+
+    def hover_menu(self, pos):
+        hovered = self.layout().hit(pos, BUTTON)
+        for i, button in enumerate(self.menu_buttons):
+            button.is_hovered = i == hovered
+
+def main(log_path=None, trace_path=None, size=None, render_scale=None, bot_strategy=None, connect=None, name=None):
+    init_display(load_images=False, size=size, render_scale=render_scale)
+    assets = AssetLoader().start()
     clock = pygame.time.Clock()
-    game = Game()
+    if connect:
+        from net_client import Connection
+        from remote_game import RemoteGame
+        game = RemoteGame(Connection(connect), name or "Player 1")
+    else:
+        game = Game()
+    game.bots = BotPool()
+    game.bot_strategy = bot_strategy
+    renderer = DirtyRenderer(game, SCREEN)
+    profiler = FrameProfiler(game, trace_path=trace_path)
+    stepper = FixedStep()
+    if log_path:
+        game.recorder = GameLogWriter(log_path)
     
+    # Під час перетягування вікна VIDEORESIZE приходять десятками: чекаємо тиші,
+    # будуємо картинки у фоні і перемикаємось, коли вони готові
+    resize_at = None
+    resizing = None
     running = True
     while running:
-        events = pygame.event.get()
+        idle = game.is_idle() and resize_at is None
+        if idle:
+            # Простій: блокуємось до вводу (або тайм-ауту), а не крутимо кадри
+            event = pygame.event.wait(GameConfig.IDLE_WAIT_MS)
+            events = [] if event.type == NOEVENT else [event]
+            events += pygame.event.get()
+            stepper.reset()
+        else:
+            events = pygame.event.get()
+        profiler.start_frame()
         for event in events:
             if event.type == QUIT:
                 running = False
+            elif event.type == ASSETS_READY:
+                assets.install()
+                if resizing is not None and resizing.done.is_set():
+                    # Вікно могли ще раз змінити, поки вантажилось - тоді чекаємо наступного
+                    if resizing.size == internal_size(WINDOW.get_size()):
+                        set_resolution(WINDOW.get_size(), load_images=False)
+                        resizing.install()
+                        assets = resizing
+                        game.on_resize()
+                        renderer.resize(SCREEN)
+                        profiler.overlay = None
+                    resizing = None
+            elif event.type == VIDEORESIZE:
+                resize_at = time.perf_counter() + GameConfig.RESIZE_DEBOUNCE
             elif event.type == MOUSEBUTTONDOWN and event.button == 1:
+                # Що під курсором, підказує просторовий індекс розкладки
+                layout = game.layout()
+                pos = to_screen(event.pos)
                 if game.state == "menu":
-                    for i, button in enumerate(game.menu_buttons):
-                        if button.handle_event(event):
-                            game.num_bots = i + 1
-                            game.state = "setup"
-                            game.generate_deck()
-                            game.shuffle_deck()
-                            game.setup_players()
-                            game.start_new_play()
-                            break
-                elif game.state == "round":
-                    human = game.players[0]
-                    if human.alive and human not in game.player_cards_placed:
-                        mx, my = event.pos
-                        x_start = 50
-                        y_start = GameConfig.HEIGHT - GameConfig.CARD_HEIGHT - 50
-                        for i, c in enumerate(human.hand):
-                            rect = pygame.Rect(x_start+i*(GameConfig.CARD_WIDTH+5), y_start, 
-                                            GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT)
-                            if rect.collidepoint(mx, my):
-                                game.player_cards_placed[human] = c
-                                if game.all_players_placed():
-                                    game.handle_card_placement_prep()
-                                break
+                    i = layout.hit(pos, BUTTON)
+                    if i is not None:
+                        game.start_game(i + 1)
+                elif game.human_can_place():
+                    i = layout.hit(pos, HAND)
+                    if i is not None:
+                        game.place_card(game.players[0], game.players[0].hand[i])
                 elif game.state == "pick_row":
-                    mx, my = event.pos
-                    row_y = GameConfig.HEIGHT//2 - 2*(GameConfig.CARD_HEIGHT+10)
-                    for i, row in enumerate(game.rows):
-                        row_x = GameConfig.WIDTH//2 - 2*(GameConfig.CARD_WIDTH+20) + i*(GameConfig.CARD_WIDTH+100)
-                        rect = pygame.Rect(row_x, row_y, GameConfig.CARD_WIDTH+40, GameConfig.CARD_HEIGHT+150)
-                        if rect.collidepoint(mx, my):
-                            game.pick_row_for_player(row)
-                            break
+                    i = layout.hit(pos, ROW)
+                    if i is not None:
+                        game.pick_row_for_player(game.rows[i])
             elif event.type == MOUSEMOTION and game.state == "menu":
                 # Оновлюємо стан наведення для кнопок
-                for button in game.menu_buttons:
-                    button.handle_event(event)
+                game.hover_menu(to_screen(event.pos))
             elif event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
                     running = False
-            
-        game.update(events)
-        game.draw()
-        pygame.display.flip()
-        clock.tick(30)
-
+                elif event.key == K_F3:
+                    # F3 - оверлей з часом кадру
+                    profiler.toggle()
+                    renderer.invalidate()
+        if game.state != "menu" and not assets.installed:
+            # Гру почали раніше, ніж довантажились карти - доведеться почекати
+            assets.install()
+        if resize_at is not None and time.perf_counter() >= resize_at:
+            resize_at = None
+            resizing = AssetLoader(size=internal_size(WINDOW.get_size())).start()
+        profiler.lap("events")
+
+        # Логіка йде фіксованими кроками за реальним часом, кадри - як встигають
+        for _ in range(stepper.advance()):
+            game.update(events)
+        game.alpha = stepper.alpha
+        profiler.lap("update")
+        # Оновлюємо на екрані лише змінені ділянки
+        rects = renderer.render()
+        profiler.lap("render")
+        if profiler.visible:
+            rects.append(profiler.draw(renderer))
+            profiler.lap("overlay")
+        present(rects)
+        profiler.lap("display")
+        profiler.end_frame()
+        if not idle:
+            clock.tick(GameConfig.FPS)
+
+    if game.recorder:
+        game.recorder.close()
+    game.bots.shutdown()
+    if connect:
+        game.connection.close()
+    profiler.close()
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Samurai Frog card game")
+    parser.add_argument("log", nargs="?", help="append played games to this binary log")
+    parser.add_argument("--trace", help="write a per-frame Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--size", type=lambda s: tuple(map(int, s.lower().split("x"))), help="window size, e.g. 800x480")
+    parser.add_argument("--render-scale", type=float, help="render at this fraction of the window size and upscale")
+    parser.add_argument("--bots", help="bot strategy, e.g. montecarlo (default: risk)")
+    parser.add_argument("--connect", metavar="ADDRESS", help="play at a table server (host:port or unix socket path)")
+    parser.add_argument("--name", help="player name at a network table")
+    args = parser.parse_args()
+    main(args.log, args.trace, args.size, args.render_scale, args.bots, args.connect, args.name)
@@ -0,0 +1,156 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from bots import STRATEGIES, LowestCardBot
+from config import GameConfig
+from state import GameState, iter_bits, to_bits
+
+_POOL = None
+_POOL_SIZE = 0
+
+
+def _get_pool(workers):
+    global _POOL, _POOL_SIZE
+    if _POOL is None or _POOL_SIZE != workers:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False)
+        _POOL = ProcessPoolExecutor(workers)
+        _POOL_SIZE = workers
+    return _POOL
+
+
+class TableView:
+    # Те, що бот бачить за столом: свою руку, ряди, очки і кількість карт у суперників
+    __slots__ = ("me", "hand", "rows", "known_penalties", "hand_sizes", "points", "alive", "unseen", "revealed")
+
+    def __init__(self, game, player, seen, revealed=None):
+        self.me = game.players.index(player)
+        self.hand = tuple(sorted(c.value for c in player.hand))
+        self.rows = tuple(bytes(c.value for c in r.cards) for r in game.rows)
+        self.known_penalties = {c.value: c.penalty for r in game.rows for c in r.cards}
+        self.known_penalties.update((c.value, c.penalty) for c in player.hand)
+        self.hand_sizes = tuple(len(p.hand) if p.alive else 0 for p in game.players)
+        self.points = tuple(p.penalty_points for p in game.players)
+        self.alive = to_bits(i for i, p in enumerate(game.players) if p.alive)
+        # Відкриті на столі карти суперників (player -> value) ще лежать у їхніх руках
+        self.revealed = revealed or {}
+        for p, c in game.player_cards_placed.items():
+            if c.value in self.revealed.values():
+                self.known_penalties[c.value] = c.penalty
+        known = seen | to_bits(self.hand) | to_bits(v for r in self.rows for v in r) | to_bits(self.revealed.values())
+        self.unseen = [v for v in range(1, 111) if not known >> v & 1]
+
+    def determinize(self, rng):
+        # Роздаємо невидимі карти суперникам і вгадуємо їхні штрафи
+        penalties = bytearray(111)
+        for v, pen in self.known_penalties.items():
+            penalties[v] = pen
+        weights = GameConfig.PENALTY_WEIGHTS
+        values = list(GameConfig.PENALTY_VALUES)
+        hidden = sum(self.hand_sizes) - len(self.hand) - sum(1 for i in self.revealed if i != self.me)
+        pool = rng.sample(self.unseen, min(len(self.unseen), hidden))
+        for v, pen in zip(pool, rng.choices(values, weights, k=len(pool))):
+            penalties[v] = pen
+        hands, pos = [], 0
+        for i, size in enumerate(self.hand_sizes):
+            if i == self.me:
+                hands.append(to_bits(self.hand))
+            elif i in self.revealed:
+                hands.append(to_bits(pool[pos:pos + size - 1]) | 1 << self.revealed[i])
+                pos += size - 1
+            else:
+                hands.append(to_bits(pool[pos:pos + size]))
+                pos += size
+        return GameState(bytes(penalties), self.rows,
+                         tuple(sum(penalties[v] for v in r) for r in self.rows),
+                         tuple(hands), self.points, self.alive)
+
+
+def random_rollout(state, me, first_card, rng):
+    start = state.points[me]
+    cards = [0] * state.num_players
+    card = first_card
+    while card:
+        for i in iter_bits(state.alive):
+            if i != me and state.hands[i]:
+                cards[i] = rng.choice(list(iter_bits(state.hands[i])))
+            else:
+                cards[i] = 0
+        cards[me] = card
+        state = state.play_trick(cards)
+        if not state.is_alive(me) or not state.hands[me]:
+            break
+        card = rng.choice(list(iter_bits(state.hands[me])))
+    return state.points[me] - start
+
+
+def run_samples(view, budget, seed, rollout=random_rollout, max_samples=None):
+    rng = random.Random(seed)
+    # Без бюджету рахує рівно max_samples розкладів, незалежно від швидкості машини
+    deadline = time.perf_counter() + budget if budget is not None else math.inf
+    totals = [0.0] * len(view.hand)
+    samples = 0
+    while max_samples is None or samples < max_samples:
+        state = view.determinize(rng)
+        # Усі кандидати грають на одному й тому ж розкладі карт
+        scores = []
+        for card in view.hand:
+            if time.perf_counter() >= deadline:
+                return totals, samples
+            scores.append(rollout(state, view.me, card, rng))
+        for k, score in enumerate(scores):
+            totals[k] += score
+        samples += 1
+    return totals, samples
+
+
+class MonteCarloBot(LowestCardBot):
+    name = "montecarlo"
+    tracks = True
+
+    def __init__(self, rng=None, budget=0.05, workers=0, samples=None):
+        super().__init__(rng)
+        self.budget = budget
+        self.workers = workers
+        self.samples = samples
+        self.seen = 0
+        self.last_samples = 0
+        self.info = None
+
+    def observe(self, game, player):
+        if self.info is not None:
+            self.seen = self.info.seen
+            return
+        if len(player.hand) == GameConfig.CARDS_PER_PLAYER:
+            self.seen = 0
+        for r in game.rows:
+            self.seen |= to_bits(c.value for c in r.cards)
+
+    def choose_card(self, game, player):
+        self.observe(game, player)
+        if len(player.hand) == 1:
+            return player.hand[0]
+        view = TableView(game, player, self.seen)
+        seed = self.rng.getrandbits(32)
+        if self.workers:
+            pool = _get_pool(self.workers)
+            share = -(-self.samples // self.workers) if self.samples else None
+            budget = self.budget * 0.8 if self.budget is not None else None
+            futures = [pool.submit(run_samples, view, budget, seed + i, max_samples=share) for i in range(self.workers)]
+            # Воркери, що не встигли в бюджет, просто не враховуються
+            done, _ = wait(futures, timeout=self.budget)
+            results = [f.result() for f in done]
+        else:
+            results = [run_samples(view, self.budget, seed, max_samples=self.samples)]
+
+        totals = [sum(r[0][k] for r in results) for k in range(len(view.hand))]
+        self.last_samples = sum(r[1] for r in results)
+        if not self.last_samples:
+            return super().choose_card(game, player)
+        best = view.hand[min(range(len(totals)), key=totals.__getitem__)]
+        return next(c for c in player.hand if c.value == best)
+
+
+STRATEGIES[MonteCarloBot.name] = MonteCarloBot
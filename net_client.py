@@ -0,0 +1,74 @@
+import json
+import queue
+import socket
+import struct
+import threading
+
+import pygame
+
+from server import parse_address
+from wire import FRAME, FRAME_MARK
+
+NET_MESSAGE = pygame.event.custom_type()
+
+
+class Connection:
+    # Сокет читається у фоновому потоці; повідомлення чекають у черзі, а подія
+    # NET_MESSAGE будить головний цикл, якщо той спить в event.wait
+    def __init__(self, address):
+        kind, target = parse_address(address)
+        if kind == "unix":
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(target)
+        else:
+            self.sock = socket.create_connection(target)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.messages = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self._read, name="net-reader", daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        # JSON-рядки і двійкові кадри wire.py йдуть упереміш; кадр починається з FRAME_MARK
+        try:
+            with self.sock.makefile("rb") as f:
+                while True:
+                    first = f.read(1)
+                    if not first:
+                        break
+                    if first[0] == FRAME_MARK:
+                        _, size = FRAME.unpack(first + f.read(FRAME.size - 1))
+                        data = f.read(size)
+                        if len(data) < size:
+                            break
+                        self.messages.put({"op": "wire", "data": data})
+                    else:
+                        self.messages.put(json.loads(first + f.readline()))
+                    self._notify()
+        except (OSError, ValueError, struct.error):
+            pass
+        self.closed = True
+        self._notify()
+
+    def _notify(self):
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(NET_MESSAGE))
+
+    def send(self, **message):
+        try:
+            self.sock.sendall(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        except OSError:
+            self.closed = True
+
+    def receive(self):
+        try:
+            return self.messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
@@ -1,36 +1,117 @@
 import random
+from bisect import bisect_left
+from config import GameConfig
 
 class Player:
-    def __init__(self, name, is_human=False):
+    __slots__ = ("name", "is_human", "strategy", "hand", "penalty_points", "alive")
+
+    def __init__(self, name, is_human=False, strategy=None):
         self.name = name
         self.is_human = is_human
+        self.strategy = strategy
         self.hand = []
         self.penalty_points = 0
         self.alive = True
 
-    def choose_card(self):
+    def choose_card(self, game=None):
         if not self.is_human and self.hand:
+            if self.strategy:
+                return self.strategy.choose_card(game, self)
             return random.choice(self.hand)
         return None
     
+    def copy(self):
+        # Окрема рука; самі карти незмінні, тож їх можна ділити
+        other = Player(self.name, self.is_human, self.strategy)
+        other.hand = list(self.hand)
+        other.penalty_points = self.penalty_points
+        other.alive = self.alive
+        return other
+
     def remove_card_from_hand(self, card):
-        if card in self.hand:
+        try:
             self.hand.remove(card)
+        except ValueError:
+            pass
 
 class Row:
+    __slots__ = ("cards", "tail", "penalty", "index")
+
     def __init__(self):
         self.cards = []
-        
+        self.tail = None
+        self.penalty = 0
+        # RowIndex, що тримає цей ряд; про кожен новий хвіст ряд повідомляє його сам
+        self.index = None
+
+    def copy(self):
+        other = Row()
+        other.cards = list(self.cards)
+        other.tail = self.tail
+        other.penalty = self.penalty
+        return other
+
     def add_card(self, card):
+        old_tail = self.tail
         self.cards.append(card)
-        
+        self.tail = card.value
+        self.penalty += card.penalty
+        if self.index is not None:
+            self.index.moved(self, old_tail)
+
     def reset_with_card(self, card):
-        old_cards = self.cards[:]
+        old_cards = self.cards
+        old_tail = self.tail
         self.cards = [card]
+        self.tail = card.value
+        self.penalty = card.penalty
+        if self.index is not None:
+            self.index.moved(self, old_tail)
         return old_cards
-        
+
+    def take(self, card):
+        # Повертає штраф забраного ряду без перерахунку карт
+        penalty = self.penalty
+        self.reset_with_card(card)
+        return penalty
+
+    @property
+    def is_full(self):
+        return len(self.cards) >= GameConfig.ROW_LIMIT
+
     @property
     def last_card_value(self):
-        if self.cards:
-            return self.cards[-1].value
-        return None 
\ No newline at end of file
+        return self.tail
+
+
+class RowIndex:
+    # Відсортовані хвости неповних рядів: пошук цільового ряду бісекцією.
+    # Сортується один раз на роздачу, далі ряди самі переставляють свій хвіст
+    __slots__ = ("source", "tails", "rows")
+
+    def __init__(self, rows):
+        self.source = rows
+        open_rows = sorted((r.tail, i) for i, r in enumerate(rows) if r.tail is not None and not r.is_full)
+        self.tails = [t for t, _ in open_rows]
+        self.rows = [rows[i] for _, i in open_rows]
+        for r in rows:
+            r.index = self
+
+    def moved(self, row, old_tail):
+        # Старий хвіст прибираємо, новий вставляємо бісекцією; повний ряд з індексу випадає
+        if old_tail is not None:
+            k = bisect_left(self.tails, old_tail)
+            while k < len(self.tails) and self.tails[k] == old_tail:
+                if self.rows[k] is row:
+                    del self.tails[k]
+                    del self.rows[k]
+                    break
+                k += 1
+        if not row.is_full:
+            k = bisect_left(self.tails, row.tail)
+            self.tails.insert(k, row.tail)
+            self.rows.insert(k, row)
+
+    def find(self, value):
+        k = bisect_left(self.tails, value)
+        return self.rows[k - 1] if k else None 
\ No newline at end of file
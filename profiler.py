@@ -0,0 +1,155 @@
+import json
+import time
+from collections import deque
+
+import pygame
+
+from config import GameConfig
+
+# Методи гри, які обгортаються таймером, коли профайлер увімкнено
+GAME_SECTIONS = (
+    "choose_bot_cards", "handle_card_placement_final", "animate_step", "end_round",
+    "draw_scene", "draw_rows", "draw_player_info", "draw_hand", "draw_reveal_cards", "draw_leaderboard",
+)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class FrameProfiler:
+    # Вимкнений профайлер коштує одну перевірку прапорця на ділянку; методи гри
+    # обгортаються лише поки він увімкнений
+    def __init__(self, game, window=300, trace_path=None):
+        self.game = game
+        self.window = window
+        self.enabled = False
+        # Кадр міряється лише від start_frame: увімкнений посеред кадру профайлер
+        # чекає наступного, а не рахує час від давно минулої позначки
+        self.recording = False
+        self.visible = False
+        self.history = {}
+        self.frame = {}
+        self.spans = []
+        self.frames = 0
+        self.drops = 0
+        self.overlay = None
+        self.overlay_rect = None
+        self.font = None
+        self.trace = None
+        self.trace_start = time.perf_counter()
+        self.last = self.frame_start = 0.0
+        if trace_path:
+            self.trace = open(trace_path, "w")
+            self.trace.write("[\n")
+            self.enable()
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.recording = False
+        for name in GAME_SECTIONS:
+            setattr(self.game, name, self._timed(name, getattr(self.game, name)))
+
+    def disable(self):
+        if not self.enabled or self.trace:
+            return
+        self.enabled = self.recording = False
+        self.frame = {}
+        for name in GAME_SECTIONS:
+            delattr(self.game, name)
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible:
+            self.enable()
+        else:
+            self.disable()
+
+    def _timed(self, name, method):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._record(name, start, time.perf_counter())
+        return timed
+
+    def _record(self, name, start, end):
+        if not self.recording:
+            return
+        self.frame[name] = self.frame.get(name, 0.0) + end - start
+        if self.trace:
+            self.spans.append((name, start, end))
+
+    def start_frame(self):
+        if self.enabled:
+            self.recording = True
+            self.frame_start = self.last = time.perf_counter()
+
+    def lap(self, name):
+        # Час від попередньої позначки в кадрі
+        if self.recording:
+            now = time.perf_counter()
+            self._record(name, self.last, now)
+            self.last = now
+
+    def end_frame(self):
+        if not self.recording:
+            return
+        total = time.perf_counter() - self.frame_start
+        self.frame["frame"] = total
+        if total > 1.0 / GameConfig.FPS:
+            self.drops += 1
+        for name, value in self.frame.items():
+            self.history.setdefault(name, deque(maxlen=self.window)).append(value * 1000)
+        if self.trace:
+            self._write_trace(total)
+        self.frame = {}
+        self.frames += 1
+
+    def _write_trace(self, total):
+        # Формат Chrome trace: відкривається в chrome://tracing, Perfetto чи speedscope
+        us = lambda t: round((t - self.trace_start) * 1e6, 1)
+        events = [{"name": "frame", "ph": "X", "pid": 0, "tid": 0, "ts": us(self.frame_start),
+                   "dur": round(total * 1e6, 1), "args": {"state": self.game.state, "frame": self.frames}}]
+        events += [{"name": name, "ph": "X", "pid": 0, "tid": 0, "ts": us(start), "dur": round((end - start) * 1e6, 1)}
+                   for name, start, end in self.spans]
+        for event in events:
+            self.trace.write(json.dumps(event) + ",\n")
+        self.spans = []
+
+    def summary(self):
+        return {name: (percentile(v, 0.5), percentile(v, 0.95), percentile(v, 0.99))
+                for name, v in self.history.items() if v}
+
+    def draw(self, renderer):
+        # Текст оверлею перебудовується раз на кілька кадрів, решту часу - лише blit
+        surface = renderer.screen
+        previous = self.overlay_rect
+        if self.overlay is None or self.frames % 10 == 0:
+            lines = [f"{'section':<28}{'p50':>7}{'p95':>7}{'p99':>7} ms"]
+            for name, (p50, p95, p99) in sorted(self.summary().items(), key=lambda x: -x[1][2]):
+                lines.append(f"{name:<28}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+            lines.append(f"drops >{1000 / GameConfig.FPS:.0f}ms: {self.drops}/{self.frames}")
+            self.font = self.font or pygame.font.SysFont("monospace", 14)
+            rendered = [self.font.render(line, True, GameConfig.WHITE) for line in lines]
+            width = max(r.get_width() for r in rendered) + 10
+            self.overlay = pygame.Surface((width, len(rendered) * 16 + 10), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 180))
+            for i, r in enumerate(rendered):
+                self.overlay.blit(r, (5, 5 + i * 16))
+            self.overlay_rect = self.overlay.get_rect(topright=(surface.get_width() - 5, 5))
+        # Напівпрозорий оверлей малюється поверх чистої ділянки, а не поверх себе ж
+        rect = self.overlay_rect if previous is None else self.overlay_rect.union(previous)
+        renderer.restore(rect)
+        surface.blit(self.overlay, self.overlay_rect)
+        return rect
+
+    def close(self):
+        if self.trace:
+            self.trace.write(json.dumps({"name": "end", "ph": "i", "pid": 0, "tid": 0, "ts": 0}) + "\n]\n")
+            self.trace.close()
+            self.trace = None
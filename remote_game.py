@@ -0,0 +1,161 @@
+from card import Card
+from config import GameConfig
+from main2 import Game
+from player import Player, Row
+from wire import MSG_SNAPSHOT, OP_PLACE, OP_REVEAL, OP_TAKE, VERSION, TableView, delta_events
+
+
+class RemoteGame(Game):
+    # Гра за мережевим столом: правила крутить сервер, тут лише показ, анімація й кліки.
+    # Місця повернуті так, щоб свій гравець завжди був players[0], як у локальній грі
+    def __init__(self, connection, name="Player 1", wire=VERSION):
+        super().__init__()
+        self.connection = connection
+        self.name = name
+        self.seat = 0
+        self.synced = False
+        # wire - версія двійкового формату, про яку просимо сервер; 0 - лише JSON
+        self.wire = wire
+        self.view = TableView()
+
+    def local(self, seat):
+        return self.players[(seat - self.seat) % len(self.players)]
+
+    def start_game(self, num_bots, human=True, strategies=None):
+        # Кнопка меню - розмір столу; вільні місця сервер віддасть ботам
+        self.connection.send(op="join", name=self.name, seats=num_bots + 1, wire=self.wire)
+        self.state = "lobby"
+
+    def place_card(self, player, card):
+        self.player_cards_placed[player] = card
+        self.connection.send(op="play", card=card.value)
+
+    def pick_row_for_player(self, row):
+        self.connection.send(op="row", row=self.rows.index(row))
+        self.selected_card = self.selected_player = None
+        self.state = "reveal"
+
+    def end_round(self):
+        # Після анімації стіл лишається на екрані, але ходити можна лише з новим станом від сервера
+        self.trick += 1
+        self.player_cards_placed = {}
+        self.state = "round"
+        self.synced = False
+
+    def human_can_place(self):
+        return self.synced and super().human_can_place()
+
+    def apply(self, message):
+        op = message["op"]
+        if op == "joined":
+            self.seat = message["seat"]
+        elif op == "state":
+            self.apply_state(message)
+        elif op == "wire":
+            self.apply_wire(message["data"])
+        elif op == "reveal":
+            placed = {}
+            for seat, value, penalty in message["cards"]:
+                player = self.local(seat)
+                # Карта з руки, якщо вона там є: за гравця, що не встиг, сервер міг
+                # зіграти іншу, і саме її анімація має прибрати з руки
+                placed[player] = next((c for c in player.hand if c.value == value), None) or Card(value, penalty)
+            self.player_cards_placed = placed
+            self.reveal_timer = 0
+            self.state = "reveal"
+        elif op == "pick_row":
+            self.selected_player = self.players[0]
+            self.selected_card = self.player_cards_placed.get(self.selected_player) or Card(*message["card"])
+            self.state = "pick_row"
+        elif op == "trick":
+            self.pending_placements = []
+            for seat, value, penalty, row, take in message["placements"]:
+                player = self.local(seat)
+                card = self.player_cards_placed.get(player)
+                if card is None or card.value != value:
+                    card = Card(value, penalty)
+                self.pending_placements.append((player, card, self.rows[row], take))
+            self.start_animation()
+        elif op == "over":
+            self.leaderboard = [tuple(entry) for entry in message["leaderboard"]]
+            self.state = "leaderboard"
+
+    def apply_state(self, message):
+        seats = message["players"]
+        n = len(seats)
+        names = [seats[(self.seat + i) % n][0] for i in range(n)]
+        if [p.name for p in self.players] != names:
+            self.players = [Player(name, is_human=i == 0) for i, name in enumerate(names)]
+        for i, player in enumerate(self.players):
+            _, player.penalty_points, player.alive, _ = seats[(self.seat + i) % n]
+        self.players[0].hand = [Card(v, pen) for v, pen in message["hand"]]
+        self.rows = []
+        for cards in message["rows"]:
+            row = Row()
+            for v, pen in cards:
+                row.add_card(Card(v, pen))
+            self.rows.append(row)
+        self._row_index = None
+        self.trick = message["trick"]
+        played = message["played"]
+        self.player_cards_placed = {}
+        if played is not None:
+            self.player_cards_placed[self.players[0]] = next(c for c in self.players[0].hand if c.value == played)
+        self.state = message["state"]
+        self.synced = True
+
+    def apply_wire(self, data):
+        # Ті самі повідомлення, що й у JSON, лише зібрані з двійкового знімка чи дельти
+        view = self.view
+        view.apply(data)
+        seats = range(len(view.names))
+        if data[1] == MSG_SNAPSHOT:
+            self.apply_state({
+                "state": view.state, "trick": view.trick, "played": None,
+                "players": [[view.names[i], view.points[i], bool(view.alive[i]), view.hand_sizes[i]] for i in seats],
+                "hand": [[v, view.penalties[v]] for v in view.hand],
+                "rows": [[[v, view.penalties[v]] for v in r] for r in view.rows],
+            })
+            return
+        cards, placements = [], []
+        for event in delta_events(data):
+            if event[0] == OP_REVEAL:
+                cards.append(event[1:])
+            elif event[0] == OP_PLACE or event[0] == OP_TAKE:
+                _, seat, row, value, penalty = event
+                placements.append((seat, value, penalty, row, event[0] == OP_TAKE))
+        if cards:
+            self.apply({"op": "reveal", "cards": cards})
+        elif placements:
+            self.apply({"op": "trick", "placements": placements})
+        elif view.state == "round":
+            # Хід без нової роздачі: ряди й рука вже змінились анімацією, лишились очки
+            n = len(self.players)
+            for i, player in enumerate(self.players):
+                seat = (self.seat + i) % n
+                player.penalty_points, player.alive = view.points[seat], bool(view.alive[seat])
+            self.trick = view.trick
+            self.player_cards_placed = {}
+            self.state = "round"
+            self.synced = True
+
+    def is_idle(self):
+        # Спимо, поки сервер мовчить; NET_MESSAGE розбудить цикл
+        if not self.connection.messages.empty():
+            return False
+        if self.state == "reveal":
+            return self.reveal_timer > GameConfig.REVEAL_DELAY
+        return self.state != "animate"
+
+    def update(self, events=()):
+        if self.state == "animate":
+            self.animate_step()
+            return
+        if self.state == "reveal":
+            self.reveal_timer += 1
+        # Поки йде анімація, решта повідомлень чекає в черзі
+        while self.state != "animate":
+            message = self.connection.receive()
+            if message is None:
+                break
+            self.apply(message)
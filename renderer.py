@@ -0,0 +1,104 @@
+import pygame
+
+from config import GameConfig
+
+
+def merge_rects(rects):
+    # Прямокутники, що перетинаються, зливаються в один, щоб не малювати двічі
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    # Статична частина сцени тримається в окремій поверхні і перемальовується лише
+    # при зміні стану гри; кожен кадр оновлюються тільки ділянки з рухомими елементами
+    def __init__(self, game, screen):
+        self.game = game
+        self.screen = screen
+        self.base = pygame.Surface(screen.get_size()).convert()
+        self.scene = None
+        self.items = {}
+        self.full_redraws = 0
+        self.partial_pixels = 0
+
+    def invalidate(self):
+        self.scene = None
+
+    def resize(self, screen):
+        self.screen = screen
+        self.base = pygame.Surface(screen.get_size()).convert()
+        self.items = {}
+        self.invalidate()
+
+    def render(self):
+        game = self.game
+        scene = game.scene_key()
+        previous = self.items
+        self.items = {key: (rect, draw) for key, rect, draw in game.dynamic_items()}
+
+        if scene != self.scene:
+            self.scene = scene
+            self.full_redraws += 1
+            game.draw_scene(self.base)
+            self.screen.blit(self.base, (0, 0))
+            for rect, draw in self.items.values():
+                draw(self.screen)
+            return [self.screen.get_rect()]
+
+        # Брудні ділянки: де елемент був і зник або змінився, і де він з'явився
+        dirty = [rect for key, (rect, _) in previous.items() if key not in self.items]
+        dirty += [rect for key, (rect, _) in self.items.items() if key not in previous]
+        return [self.restore(rect) for rect in merge_rects(dirty)]
+
+    def restore(self, rect):
+        # Повертає ділянку до стану кадру: статична основа плюс рухомі елементи над нею
+        rect = rect.clip(self.screen.get_rect())
+        self.screen.set_clip(rect)
+        self.screen.blit(self.base, rect, rect)
+        for item_rect, draw in self.items.values():
+            if item_rect.colliderect(rect):
+                draw(self.screen)
+        self.screen.set_clip(None)
+        self.partial_pixels += rect.w * rect.h
+        return rect
+
+
+class LayerCache:
+    # Шари сцени (ряди, рахунок, меню...) складаються в окремі поверхні один раз
+    # і збираються заново лише коли змінюється їхній ключ
+    def __init__(self):
+        self.layers = {}
+        self.rebuilds = 0
+
+    def get(self, name, key, build, area=None):
+        key = (key, GameConfig.ASSET_VERSION, GameConfig.WIDTH, GameConfig.HEIGHT)
+        entry = self.layers.get(name)
+        if entry is not None and entry[0] == key:
+            return entry[1], entry[2]
+        self.rebuilds += 1
+        canvas = pygame.Surface((GameConfig.WIDTH, GameConfig.HEIGHT), pygame.SRCALPHA)
+        build(canvas)
+        # Зберігаємо лише область шару, щоб не блітити весь екран
+        bounds = canvas.get_rect().clip(area) if area is not None else canvas.get_rect()
+        layer = canvas.subsurface(bounds).copy()
+        if pygame.display.get_surface():
+            layer = layer.convert_alpha()
+        self.layers[name] = (key, layer, bounds.topleft)
+        return layer, bounds.topleft
+
+    def blit(self, surface, name, key, build, area=None):
+        layer, pos = self.get(name, key, build, area)
+        surface.blit(layer, pos)
+
+    def clear(self):
+        self.layers.clear()
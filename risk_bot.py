@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+
+from bots import STRATEGIES, LowestCardBot
+from config import GameConfig
+from info_state import InfoState
+
+LIMIT = GameConfig.ROW_LIMIT
+# Очікуваний штраф карти, якої ще не бачили
+MEAN_PENALTY = sum(v * w for v, w in zip(GameConfig.PENALTY_VALUES, GameConfig.PENALTY_WEIGHTS)) / sum(GameConfig.PENALTY_WEIGHTS)
+
+# Ваги підібрані турнірами проти lowest і closest
+HOLD_WEIGHT = 0.5
+SHED_WEIGHT = 5.0
+
+_COMB = {}
+
+
+def unseen_counts(unseen):
+    # counts[v] - скільки невидимих карт мають значення менше за v
+    flags = np.unpackbits(np.frombuffer(unseen.to_bytes(14, "little"), np.uint8), bitorder="little")
+    return np.concatenate(([0], np.cumsum(flags)))
+
+
+def binomial_tail(n, p, need):
+    # P(X >= need) для X ~ Bin(n, p), окремо для кожного p
+    if n not in _COMB:
+        _COMB[n] = np.array([math.comb(n, k) for k in range(n + 1)], dtype=float)
+    k = np.arange(n + 1)
+    pmf = _COMB[n] * p[:, None]**k * (1 - p[:, None])**(n - k)
+    return (pmf * (k >= need[:, None])).sum(1)
+
+
+def score_cards(info, values, opponents):
+    # Очікуваний штраф за кожну карту руки, всі карти одразу; менше - краще
+    values = np.asarray(values)
+    tails = np.asarray(info.tails)
+    lengths = np.asarray(info.lengths)
+    row_penalty = np.asarray(info.row_penalty, dtype=float)
+    counts = unseen_counts(info.unseen)
+    total = max(int(counts[-1]), 1)
+    open_rows = lengths < LIMIT
+
+    # Цільовий ряд: найбільший хвіст серед менших за карту, повні не рахуються
+    gap = values[:, None] - tails[None, :]
+    fits = (gap > 0) & open_rows[None, :]
+    target = np.where(fits, gap, 111).argmin(1)
+    has_target = fits.any(1)
+    # Без цільового ряду беремо найдешевший
+    forced = row_penalty[open_rows].min() if open_rows.any() else row_penalty.min()
+    score = np.where(has_target, 0.001 * gap[np.arange(len(values)), target], forced)
+
+    # Шанс, що карта виявиться найменшою за столом: кожен суперник кладе одну з невидимих
+    lowest = (1 - counts[values] / total) ** opponents
+    if not open_rows.all():
+        # Є повний ряд: його забирає найменша карта ходу
+        score = lowest * row_penalty[np.flatnonzero(~open_rows)[0]] + (1 - lowest) * score
+
+    # Ряд заповниться за цей хід, якщо туди ляже достатньо карт суперників; тоді
+    # наступного ходу його забере найменша карта. Лишати в руці низьку карту - ризик
+    upper = np.where(open_rows[None, :] & (tails[None, :] > tails[:, None]), tails[None, :], 111).min(1)
+    p = (counts[upper] - counts[np.minimum(tails + 1, 111)]) / total
+    fill = binomial_tail(opponents, p, LIMIT - lengths - 1) * open_rows
+    if (~open_rows).sum() > 1:
+        full_next, expected = 1.0, row_penalty[~open_rows][1:].mean()
+    elif fill.sum() > 0:
+        full_next = 1 - np.prod(1 - fill)
+        expected = (fill * (row_penalty + opponents * p * MEAN_PENALTY)).sum() / fill.sum()
+    else:
+        full_next, expected = 0.0, 0.0
+    # Низькі карти з часом опиняються під усіма хвостами, тож їх краще скидати раніше
+    return score - HOLD_WEIGHT * full_next * lowest * expected - SHED_WEIGHT * (1 - values / 110)
+
+
+class RiskBot(LowestCardBot):
+    name = "risk"
+    tracks = True
+
+    def __init__(self, rng=None):
+        super().__init__(rng)
+        self.info = None
+
+    def choose_card(self, game, player):
+        info = self.info
+        if info is None:
+            # Без подій гри бачимо лише те, що зараз на столі
+            info = InfoState(game.players.index(player))
+            info.deal(game, fresh=True)
+        opponents = sum(1 for p in game.players if p.alive) - 1
+        score = score_cards(info, [c.value for c in player.hand], opponents)
+        return player.hand[int(score.argmin())]
+
+
+STRATEGIES[RiskBot.name] = RiskBot
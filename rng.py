@@ -0,0 +1,77 @@
+import numpy as np
+
+from config import GameConfig
+
+STREAM_DECK = 0
+STREAM_PENALTY = 1
+STREAM_TABLE = 2
+STREAM_RANDOM_BOT = 3  # випадкові ходи (карта і ряд) ботів пакетного симулятора
+STREAM_BOT = 16  # STREAM_BOT + номер місця
+
+
+def philox(seed, game, stream_id):
+    # Один лічильник Philox на (seed, номер гри, потік) - спільний для всіх симуляторів
+    bit_gen = np.random.Philox(key=seed & (1 << 128) - 1, counter=[0, 0, game, stream_id])
+    return np.random.Generator(bit_gen)
+
+
+_PENALTY_VALUES = np.asarray(GameConfig.PENALTY_VALUES)
+_PENALTY_CDF = np.cumsum(GameConfig.PENALTY_WEIGHTS) / sum(GameConfig.PENALTY_WEIGHTS)
+
+
+def draw_penalties(gen, n=110):
+    # Обернена функція розподілу: одне рівномірне число на карту
+    return _PENALTY_VALUES[np.searchsorted(_PENALTY_CDF, gen.random(n), side="right")]
+
+
+class Stream:
+    # Той самий інтерфейс, що й у модуля random, поверх лічильникового генератора
+    __slots__ = ("gen",)
+
+    def __init__(self, gen):
+        self.gen = gen
+
+    def random(self):
+        return float(self.gen.random())
+
+    def randrange(self, n):
+        return int(self.gen.integers(n))
+
+    def getrandbits(self, k):
+        return int.from_bytes(self.gen.bytes((k + 7) // 8), "little") >> (-k % 8)
+
+    def choice(self, seq):
+        return seq[int(self.gen.integers(len(seq)))]
+
+    def shuffle(self, items):
+        items[:] = [items[i] for i in self.gen.permutation(len(items))]
+
+    def sample(self, population, k):
+        return [population[i] for i in self.gen.choice(len(population), size=k, replace=False)]
+
+    def choices(self, population, weights=None, k=1):
+        p = None
+        if weights is not None:
+            p = np.asarray(weights, dtype=float)
+            p /= p.sum()
+        return [population[i] for i in self.gen.choice(len(population), size=k, p=p)]
+
+
+class GameStreams:
+    # Гра = (seed, номер гри); кожен потік - окремий лічильник Philox, тож N-ту гру
+    # шарду можна відтворити без прогону попередніх
+    def __init__(self, seed, game=0):
+        self.seed = seed
+        self.game = game
+        self.deck = self.stream(STREAM_DECK)
+        self.penalties = self.stream(STREAM_PENALTY)
+        self.table = self.stream(STREAM_TABLE)
+
+    def stream(self, stream_id):
+        return Stream(philox(self.seed, self.game, stream_id))
+
+    def bot(self, seat):
+        return self.stream(STREAM_BOT + seat)
+
+    def penalty_draw(self, n=110):
+        return draw_penalties(self.penalties.gen, n).tolist()
@@ -0,0 +1,266 @@
+import random
+from config import GameConfig
+from card import Card
+from player import Player, Row, RowIndex
+from info_state import InfoState
+
+
+class GameRules:
+    def __init__(self, rng=None, seed=None, game=0):
+        self.streams = None
+        if seed is not None:
+            # numpy потрібен лише для відтворюваних ігор
+            from rng import GameStreams
+            self.streams = GameStreams(seed, game)
+        self.rng = rng or (self.streams.table if self.streams else random)
+        self.players = []
+        self.rows = [Row() for _ in range(GameConfig.NUM_ROWS)]
+        self.deck = []
+        self.state = "menu"
+        self.selected_card = None
+        self.selected_player = None
+        self.leaderboard = []
+        self.player_cards_placed = {}
+        self.pending_placements = []
+        self.num_bots = 0
+        self.active_players = 0
+        self.trick = 0
+        self.eliminated_at = {}
+        self._row_index = None
+        self.recorder = None
+        self.trackers = []
+
+    def generate_deck(self):
+        # Штрафи на всю колоду тягнуться одним викликом
+        if self.streams:
+            penalties = self.streams.penalty_draw(110)
+        else:
+            penalties = self.rng.choices(GameConfig.PENALTY_VALUES, GameConfig.PENALTY_WEIGHTS, k=110)
+        self.deck = [Card(v, penalty) for v, penalty in zip(range(1, 111), penalties)]
+
+    def shuffle_deck(self):
+        (self.streams.deck if self.streams else self.rng).shuffle(self.deck)
+
+    def setup_players(self, human=True, strategies=None):
+        self.players = [Player("Player 1", is_human=True)] if human else []
+        for i in range(self.num_bots):
+            strategy = strategies[i] if strategies else None
+            if strategy is None:
+                # Типовий бот - оцінка ризику; numpy тягнеться лише коли він потрібен
+                from risk_bot import RiskBot
+                strategy = RiskBot(self.streams.bot(len(self.players)) if self.streams else None)
+            self.players.append(Player(f"Bot {i+1}", strategy=strategy))
+        self.active_players = len(self.players)
+        # Стратегії з tracks = True отримують свій InfoState, який гра оновлює подіями
+        self.trackers = []
+        for seat, p in enumerate(self.players):
+            if getattr(p.strategy, "tracks", False):
+                p.strategy.info = InfoState(seat)
+                self.trackers.append(p.strategy.info)
+
+    def start_game(self, num_bots, human=True, strategies=None):
+        self.num_bots = num_bots
+        self.state = "setup"
+        self.generate_deck()
+        self.shuffle_deck()
+        self.setup_players(human, strategies)
+        if self.recorder:
+            self.recorder.start_game(self)
+        self.start_new_play()
+
+    def start_new_play(self):
+        cards_needed = GameConfig.CARDS_PER_PLAYER * len(self.get_alive_players()) + GameConfig.NUM_ROWS
+        fresh = len(self.deck) < cards_needed
+        if fresh:
+            self.generate_deck()
+            self.shuffle_deck()
+        for p in self.players:
+            if p.alive:
+                p.hand = [self.deck.pop() for _ in range(GameConfig.CARDS_PER_PLAYER)]
+        self.rows = [Row() for _ in range(GameConfig.NUM_ROWS)]
+        for row in self.rows:
+            row.add_card(self.deck.pop())
+        self._row_index = None
+        self.state = "round"
+        self.player_cards_placed = {}
+        for t in self.trackers:
+            t.deal(self, fresh)
+
+    def get_alive_players(self):
+        return [p for p in self.players if p.alive]
+
+    def all_players_placed(self):
+        alive = self.get_alive_players()
+        return len(self.player_cards_placed) == len(alive)
+
+    def place_card(self, player, card):
+        self.player_cards_placed[player] = card
+        if self.all_players_placed():
+            self.handle_card_placement_prep()
+
+    def choose_bot_cards(self):
+        for p in self.get_alive_players():
+            if p not in self.player_cards_placed and not p.is_human:
+                chosen = p.choose_card(self)
+                if chosen:
+                    self.player_cards_placed[p] = chosen
+
+    def choose_row_for_bot(self, player, rows):
+        if player.strategy:
+            return player.strategy.choose_row(self, player, rows)
+        return self.rng.choice(rows)
+
+    def rows_to_choose(self):
+        # Наперед, як у handle_card_placement_final: які боти муситимуть вибирати ряд і з яких
+        placements = sorted(self.player_cards_placed.items(), key=lambda x: x[1].value)
+        index = self.row_index()
+        if any(row.is_full for row in self.rows):
+            placements = placements[1:]
+            available_rows = [r for r in self.rows if not r.is_full] or self.rows
+        else:
+            available_rows = self.rows
+        needed = []
+        for player, card in placements:
+            if index.find(card.value):
+                continue
+            if player.is_human:
+                break
+            needed.append((player, available_rows))
+        return needed
+
+    def handle_card_placement_prep(self):
+        self.state = "reveal"
+        if self.trackers:
+            for seat, p in enumerate(self.players):
+                card = self.player_cards_placed.get(p)
+                if card is not None:
+                    for t in self.trackers:
+                        t.reveal(seat, card)
+
+    def handle_card_placement_final(self):
+        if self.recorder:
+            self.recorder.trick(self)
+        placements = sorted(self.player_cards_placed.items(), key=lambda x: x[1].value)
+        self.pending_placements = []
+
+        # Знаходимо ряди з 5 картами
+        full_rows = [row for row in self.rows if row.is_full]
+        index = self.row_index()
+
+        if full_rows:
+            # Якщо є повний ряд, гравець з найменшою картою мусить його взяти
+            player, card = placements[0]
+            self.pending_placements.append((player, card, full_rows[0], True))
+            rest = placements[1:]
+            # Бот вибирає випадковий ряд, крім повних
+            available_rows = [r for r in self.rows if not r.is_full] or self.rows
+        else:
+            rest = placements
+            available_rows = self.rows
+
+        for player, card in rest:
+            placed_row = index.find(card.value)
+            if placed_row:
+                self.pending_placements.append((player, card, placed_row, False))
+            elif player.is_human:
+                self.state = "pick_row"
+                self.selected_card = card
+                self.selected_player = player
+                return
+            else:
+                chosen_row = self.choose_row_for_bot(player, available_rows)
+                if self.recorder:
+                    self.recorder.row(self, player, chosen_row)
+                self.pending_placements.append((player, card, chosen_row, True))
+
+        if self.pending_placements:
+            self.resolve_placements()
+
+    def can_place_card_in_rows(self, card):
+        # Ряд з мінімальною різницею - той, чий хвіст найбільший серед менших за карту.
+        # Повні ряди в індекс не потрапляють
+        return self.row_index().find(card.value)
+
+    def row_index(self):
+        # Індекс будується заново лише для нового набору рядів (нова роздача чи
+        # ряди, підставлені ззовні); ходи оновлюють його через Row.add_card/take
+        if self._row_index is None or self._row_index.source is not self.rows:
+            self._row_index = RowIndex(self.rows)
+        return self._row_index
+
+    def resolve_placements(self):
+        # Без рендера розміщення застосовуються одразу, без анімації
+        self.finish_placements()
+        self.end_round()
+
+    def finish_placements(self):
+        # Номери рядів для трекерів - один словник на хід, а не пошук у списку на кожну карту
+        numbers = {row: i for i, row in enumerate(self.rows)} if self.trackers else None
+        for player, card, row_obj, take_row in self.pending_placements:
+            if take_row:
+                player.penalty_points += row_obj.take(card)
+            else:
+                row_obj.add_card(card)
+            player.remove_card_from_hand(card)
+            if numbers:
+                self.track_row(numbers[row_obj], card, take_row)
+
+        self.pending_placements = []
+
+    def track_row(self, row, card, take_row):
+        for t in self.trackers:
+            if take_row:
+                t.take(row, card)
+            else:
+                t.place(row, card)
+
+    def pick_row_for_player(self, row):
+        if self.recorder:
+            self.recorder.row(self, self.selected_player, row)
+        self.selected_player.penalty_points += row.take(self.selected_card)
+        if self.trackers:
+            self.track_row(self.rows.index(row), self.selected_card, True)
+        self.selected_player.remove_card_from_hand(self.selected_card)
+        self.selected_card = None
+        self.selected_player = None
+        self.end_round()
+
+    def end_round(self):
+        self.trick += 1
+        for p in self.players:
+            if p.alive and p.penalty_points > GameConfig.MAX_PENALTY_POINTS:
+                p.alive = False
+                self.leaderboard.append((p.name, p.penalty_points))
+                self.eliminated_at[p.name] = self.trick
+
+        alive_count = sum(p.alive for p in self.players)
+        if alive_count <= 1:
+            self.state = "leaderboard"
+            if self.recorder:
+                self.recorder.end_game(self)
+            return
+
+        # Роздача триває, поки карти є в людини (або в ботів, якщо людина вибула)
+        alive = self.get_alive_players()
+        holders = [p for p in alive if p.is_human] or alive
+        still_have_cards = all(len(p.hand) > 0 for p in holders)
+        if not still_have_cards:
+            self.start_new_play()
+        else:
+            self.player_cards_placed = {}
+            self.state = "round"
+
+    def step(self):
+        if self.state == "round":
+            self.choose_bot_cards()
+            if self.all_players_placed():
+                self.handle_card_placement_prep()
+        elif self.state == "reveal":
+            self.handle_card_placement_final()
+
+    def play_until_over(self, max_steps=100000):
+        for _ in range(max_steps):
+            if self.state in ("leaderboard", "pick_row"):
+                break
+            self.step()
+        return self.state
@@ -0,0 +1,401 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+
+import risk_bot  # noqa: F401  типовий бот для вільних місць
+from config import GameConfig
+from rules import GameRules
+from wire import FRAME, FRAME_MARK, VERSION, WireWriter
+
+log = logging.getLogger(__name__)
+
+def parse_address(address):
+    # "host:port" - TCP, усе з "/" - шлях до unix-сокета
+    if "/" in address:
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def card_json(card):
+    return [card.value, card.penalty]
+
+
+class Client:
+    # Одне з'єднання; повільний клієнт, що не встигає читати, відключається
+    __slots__ = ("writer", "name", "table", "seat", "wire")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.name = "Player"
+        self.table = None
+        self.seat = None
+        # Стан столу двійковим форматом wire.py, якщо клієнт попросив про це в join
+        self.wire = False
+
+    def send(self, data):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > GameConfig.MAX_SEND_BUFFER:
+            transport.abort()
+            return
+        self.writer.write(data)
+
+    def send_frame(self, data):
+        # data - view на спільний буфер WireWriter; транспорт може поставити його
+        # в чергу без копії, а наступне повідомлення перепише ті самі байти
+        self.send(FRAME.pack(FRAME_MARK, len(data)) + data)
+
+
+class Table(GameRules):
+    # Стіл без рендера: ті самі стани round/reveal/pick_row/animate, що й у main2.Game.
+    # Карти людей приходять з мережі й лишаються прихованими, поки не походять усі;
+    # хто не встиг за таймер, за того ходить бот його місця
+    def __init__(self, server, table_id, seats):
+        super().__init__(seed=random.getrandbits(63))
+        self.server = server
+        self.id = table_id
+        self.seats = seats
+        self.lobby = []
+        self.clients = {}
+        self.row_choice = None
+        self.waiter = None
+        # Місця, що проспали свій таймер: за них бот ходить одразу, не затримуючи
+        # стіл, поки клієнт знову не надішле хід
+        self.away = set()
+        # Двійкові клієнти: знімок на кожну нову роздачу, між ними - дельти
+        self.writer = WireWriter()
+        self.wire = False
+        self.dealt = False
+
+    def setup_players(self, human=True, strategies=None):
+        # Спершу всі місця - боти, потім місця з клієнтами стають людськими
+        super().setup_players(False, strategies)
+        for seat, client in self.clients.items():
+            player = self.players[seat]
+            player.name = client.name
+            player.is_human = True
+
+    def wake(self):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def wait(self, ready, timeout):
+        # Чекає, поки ready() стане істинним або мине timeout; будить подія від клієнта
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not ready() and loop.time() < deadline:
+            self.waiter = loop.create_future()
+            timer = loop.call_at(deadline, self.wake)
+            try:
+                await self.waiter
+            finally:
+                timer.cancel()
+        self.waiter = None
+
+    def humans_waiting(self):
+        return [p for p in self.get_alive_players() if p.is_human and p not in self.player_cards_placed]
+
+    async def play_turns(self):
+        # Кожне місце має свій таймер: хто не встиг, за того ходить бот, а решта
+        # чекає лише на своїх, а не на найповільніше місце за столом
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadlines = {p: start if seat in self.away else start + self.server.turn_seconds
+                     for seat, p in enumerate(self.players)}
+        while True:
+            waiting = self.humans_waiting()
+            now = loop.time()
+            for p in waiting:
+                if deadlines[p] <= now:
+                    self.away.add(self.players.index(p))
+                    self.player_cards_placed[p] = p.strategy.choose_card(self, p)
+            waiting = self.humans_waiting()
+            if not waiting:
+                break
+            # Прокидаємось на найближчий таймер або коли походять усі
+            await self.wait(lambda: not self.humans_waiting(), min(deadlines[p] for p in waiting) - now)
+        # Хто пішов уже після ходу ботів - теж ходить ботом свого місця
+        for p in self.get_alive_players():
+            if p not in self.player_cards_placed:
+                self.player_cards_placed[p] = p.strategy.choose_card(self, p)
+
+    async def run(self):
+        server = self.server
+        await self.wait(lambda: len(self.lobby) == self.seats, server.lobby_seconds)
+        server.close_lobby(self)
+        self.clients = dict(enumerate(self.lobby))
+        if not self.clients:
+            # Усі пішли ще з лобі: гри не було
+            server.tables.pop(self.id, None)
+            return
+        for seat, client in self.clients.items():
+            client.seat = seat
+            client.send(self.encode({"op": "joined", "table": self.id, "seat": seat, "wire": client.wire}))
+        self.wire = any(client.wire for client in self.clients.values())
+        self.start_game(self.seats, human=False)
+
+        while self.state != "leaderboard" and self.clients:
+            if self.state == "round":
+                self.choose_bot_cards()
+                self.send_state()
+                await self.play_turns()
+                self.handle_card_placement_prep()
+                self.send_reveal()
+                await asyncio.sleep(server.reveal_seconds)
+            elif self.state == "reveal":
+                trick = self.trick
+                self.handle_card_placement_final()
+                if self.trick != trick:
+                    await asyncio.sleep(server.animate_seconds)
+            elif self.state == "pick_row":
+                player = self.selected_player
+                seat = self.players.index(player)
+                self.row_choice = None
+                client = self.clients.get(seat)
+                if client is not None and seat not in self.away:
+                    client.send(self.encode({"op": "pick_row", "card": card_json(self.selected_card)}))
+                    await self.wait(lambda: self.row_choice is not None or seat not in self.clients,
+                                    server.turn_seconds)
+                row = self.row_choice
+                if row is None:
+                    self.away.add(seat)
+                    row = player.strategy.choose_row(self, player, self.rows)
+                self.send_trick([(seat, self.selected_card, self.rows.index(row), True)])
+                self.pick_row_for_player(row)
+                await asyncio.sleep(server.animate_seconds)
+
+        self.broadcast({"op": "over", "leaderboard": self.leaderboard})
+        for client in self.clients.values():
+            client.table = client.seat = None
+        server.tables.pop(self.id, None)
+        server.games += 1
+
+    def start_new_play(self):
+        super().start_new_play()
+        self.dealt = True
+
+    def resolve_placements(self):
+        # Клієнти анімують хід самі: їм досить знати, яка карта в який ряд лягла
+        self.send_trick([(self.players.index(p), c, self.rows.index(row), take)
+                         for p, c, row, take in self.pending_placements])
+        self.server.tricks += 1
+        super().resolve_placements()
+
+    def encode(self, message):
+        return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+    def broadcast(self, message, frame=None):
+        # Двійкові клієнти отримують frame замість JSON, якщо він є
+        data = self.encode(message)
+        for client in self.clients.values():
+            if frame is not None and client.wire:
+                client.send_frame(frame)
+            else:
+                client.send(data)
+
+    def send_reveal(self):
+        cards = [(seat, self.player_cards_placed[p]) for seat, p in enumerate(self.players) if p in self.player_cards_placed]
+        frame = None
+        if self.wire:
+            w = self.writer
+            w.begin()
+            for seat, card in cards:
+                w.reveal(seat, card)
+            w.state(self.state)
+            frame = w.end(self.trick)
+        self.broadcast({"op": "reveal", "cards": [[seat, *card_json(c)] for seat, c in cards]}, frame)
+
+    def send_trick(self, placements):
+        frame = None
+        if self.wire:
+            w = self.writer
+            w.begin()
+            for seat, card, row, take in placements:
+                w.place(seat, row, card, take)
+            frame = w.end(self.trick)
+        self.broadcast({"op": "trick", "placements": [[seat, *card_json(c), row, take]
+                                                      for seat, c, row, take in placements]}, frame)
+
+    def send_state(self):
+        if self.wire:
+            if self.dealt:
+                for seat, client in self.clients.items():
+                    if client.wire:
+                        client.send_frame(self.writer.snapshot(self, seat))
+            else:
+                # Ряди й руки клієнт уже знає з дельт ходу: лишились очки, вибулі й стан
+                w = self.writer
+                w.begin()
+                w.scores(self)
+                w.state(self.state)
+                frame = w.end(self.trick)
+                for client in self.clients.values():
+                    if client.wire:
+                        client.send_frame(frame)
+        self.dealt = False
+        # Спільна частина стану однакова для всіх, рука - лише своя
+        shared = {
+            "op": "state", "state": self.state, "trick": self.trick,
+            "rows": [[card_json(c) for c in r.cards] for r in self.rows],
+            "players": [[p.name, p.penalty_points, p.alive, len(p.hand)] for p in self.players],
+        }
+        for seat, client in self.clients.items():
+            if client.wire:
+                continue
+            player = self.players[seat]
+            placed = self.player_cards_placed.get(player)
+            shared["hand"] = [card_json(c) for c in player.hand]
+            shared["played"] = placed.value if placed else None
+            client.send(self.encode(shared))
+
+    def play(self, client, value):
+        # Будь-який хід, навіть запізнілий, повертає місцю повний таймер
+        self.away.discard(client.seat)
+        player = self.players[client.seat]
+        if self.state != "round" or player not in self.humans_waiting():
+            return
+        card = next((c for c in player.hand if c.value == value), None)
+        if card is not None:
+            self.player_cards_placed[player] = card
+            self.wake()
+
+    def pick(self, client, index):
+        self.away.discard(client.seat)
+        if self.state == "pick_row" and self.players[client.seat] is self.selected_player and 0 <= index < len(self.rows):
+            self.row_choice = self.rows[index]
+            self.wake()
+
+    def leave(self, client):
+        if client in self.lobby:
+            self.lobby.remove(client)
+        if self.clients.get(client.seat) is client:
+            # Місце того, хто пішов, до кінця гри займає бот
+            del self.clients[client.seat]
+            self.players[client.seat].is_human = False
+        self.wake()
+
+
+class TableServer:
+    # Усі столи живуть в одному циклі asyncio: кожен стіл - корутина, що спить
+    # на таймерах і ходах клієнтів, тож тисячі столів не займають потоків
+    def __init__(self, lobby_seconds=None, turn_seconds=None, reveal_seconds=None, animate_seconds=None):
+        self.lobby_seconds = GameConfig.LOBBY_SECONDS if lobby_seconds is None else lobby_seconds
+        self.turn_seconds = GameConfig.TURN_SECONDS if turn_seconds is None else turn_seconds
+        self.reveal_seconds = GameConfig.REVEAL_SECONDS if reveal_seconds is None else reveal_seconds
+        self.animate_seconds = GameConfig.ANIMATE_SECONDS if animate_seconds is None else animate_seconds
+        self.tables = {}
+        self.lobbies = {}
+        self.ids = itertools.count(1)
+        # asyncio тримає задачі лише слабкими посиланнями: без цієї множини стіл
+        # може зникнути посеред гри, а його виняток - загубитись
+        self.tasks = set()
+        self.clients = 0
+        self.tricks = 0
+        self.games = 0
+
+    def join(self, client, seats):
+        seats = max(2, min(int(seats), 10))
+        table = self.lobbies.get(seats)
+        if table is None or len(table.lobby) >= seats:
+            table = self.lobbies[seats] = Table(self, next(self.ids), seats)
+            self.tables[table.id] = table
+            self.spawn(table.run())
+        client.table = table
+        table.lobby.append(client)
+        table.wake()
+
+    def spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.finished)
+        return task
+
+    def finished(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("table task %s failed", task.get_name(), exc_info=task.exception())
+
+    def close_lobby(self, table):
+        if self.lobbies.get(table.seats) is table:
+            del self.lobbies[table.seats]
+
+    def dispatch(self, client, message):
+        op = message.get("op")
+        table = client.table
+        if op == "join" and table is None:
+            client.name = str(message.get("name", client.name))[:32]
+            client.wire = message.get("wire") == VERSION
+            self.join(client, message.get("seats", GameConfig.TABLE_SEATS))
+        elif op == "play" and table is not None and client.seat is not None:
+            table.play(client, message.get("card"))
+        elif op == "row" and table is not None and client.seat is not None:
+            table.pick(client, message.get("row", -1))
+
+    async def handle(self, reader, writer):
+        client = Client(writer)
+        self.clients += 1
+        try:
+            async for line in reader:
+                self.dispatch(client, json.loads(line))
+        except (ConnectionError, ValueError, AttributeError, TypeError):
+            pass
+        finally:
+            self.clients -= 1
+            if client.table is not None:
+                client.table.leave(client)
+            writer.close()
+
+    async def start(self, address):
+        kind, target = parse_address(address)
+        # Довга черга прийому: під навантаженням клієнти під'єднуються сотнями одразу
+        if kind == "unix":
+            return await asyncio.start_unix_server(self.handle, target, backlog=4096)
+        return await asyncio.start_server(self.handle, *target, backlog=4096)
+
+    async def report(self, every, tick=0.05):
+        # Запізнення короткого сну - наскільки цикл не встигає за столами
+        loop = asyncio.get_running_loop()
+        lag, next_report = 0.0, loop.time() + every
+        while True:
+            start = loop.time()
+            await asyncio.sleep(tick)
+            lag = max(lag, loop.time() - start - tick)
+            if loop.time() >= next_report:
+                print(f"clients {self.clients}  tables {len(self.tables)}  tricks {self.tricks}  "
+                      f"games {self.games}  max loop lag {lag * 1000:.0f} ms", flush=True)
+                lag, next_report = 0.0, next_report + every
+
+
+async def serve(address, report_every=0, **timers):
+    server = TableServer(**timers)
+    listener = await server.start(address)
+    if report_every:
+        server.spawn(server.report(report_every))
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Samurai Frog table server")
+    parser.add_argument("address", nargs="?", default=GameConfig.SERVER_ADDRESS,
+                        help="host:port or a unix socket path")
+    parser.add_argument("--lobby", type=float, help="seconds to wait for players before bots fill the seats")
+    parser.add_argument("--turn", type=float, help="seconds a player has to play a card or pick a row")
+    parser.add_argument("--reveal", type=float, help="seconds the revealed cards stay on the table")
+    parser.add_argument("--animate", type=float, help="seconds between tricks for client animations")
+    parser.add_argument("--report", type=float, default=0, help="print load stats every N seconds")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.address, args.report, lobby_seconds=args.lobby, turn_seconds=args.turn,
+                          reveal_seconds=args.reveal, animate_seconds=args.animate))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
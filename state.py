@@ -0,0 +1,168 @@
+import struct
+from config import GameConfig
+
+FULL_ROW = GameConfig.ROW_LIMIT
+CARD_BYTES = 14  # 110 значень карт у бітовій масці
+
+
+def to_bits(values):
+    bits = 0
+    for v in values:
+        bits |= 1 << v
+    return bits
+
+
+def iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def cheapest_row(state, player, candidates):
+    return min(candidates, key=lambda i: state.row_penalty[i])
+
+
+class GameState:
+    # Незмінний компактний стан роздачі: копія безкоштовна, хеш і байти дешеві
+    __slots__ = ("penalties", "rows", "row_penalty", "hands", "points", "alive", "seen", "_hash")
+
+    def __init__(self, penalties, rows, row_penalty, hands, points, alive, seen=0):
+        self.penalties = penalties
+        self.rows = rows
+        self.row_penalty = row_penalty
+        self.hands = hands
+        self.points = points
+        self.alive = alive
+        self.seen = seen
+        self._hash = None
+
+    @classmethod
+    def from_game(cls, game):
+        penalties = bytearray(111)
+        cards = list(game.deck)
+        for p in game.players:
+            cards.extend(p.hand)
+        for r in game.rows:
+            cards.extend(r.cards)
+        for c in cards:
+            penalties[c.value] = c.penalty
+        rows = tuple(bytes(c.value for c in r.cards) for r in game.rows)
+        seen = 0
+        for r in rows:
+            seen |= to_bits(r)
+        return cls(
+            bytes(penalties),
+            rows,
+            tuple(sum(penalties[v] for v in r) for r in rows),
+            tuple(to_bits(c.value for c in p.hand) for p in game.players),
+            tuple(p.penalty_points for p in game.players),
+            to_bits(i for i, p in enumerate(game.players) if p.alive),
+            seen,
+        )
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.rows, self.hands, self.points, self.alive))
+        return self._hash
+
+    def __eq__(self, other):
+        return (isinstance(other, GameState) and self.rows == other.rows and self.hands == other.hands
+                and self.points == other.points and self.alive == other.alive)
+
+    @property
+    def num_players(self):
+        return len(self.hands)
+
+    def tail(self, row):
+        return self.rows[row][-1]
+
+    def is_alive(self, player):
+        return bool(self.alive >> player & 1)
+
+    def hand_values(self, player):
+        return list(iter_bits(self.hands[player]))
+
+    def target_row(self, value):
+        best, best_diff = None, None
+        for i, r in enumerate(self.rows):
+            if len(r) >= FULL_ROW:
+                continue
+            diff = value - r[-1]
+            if diff > 0 and (best_diff is None or diff < best_diff):
+                best, best_diff = i, diff
+        return best
+
+    def play_trick(self, cards, choose_row=cheapest_row):
+        # cards[i] - значення карти гравця i, 0 якщо гравець не грає
+        order = sorted((v, i) for i, v in enumerate(cards) if v)
+        full = [i for i, r in enumerate(self.rows) if len(r) >= FULL_ROW]
+        available = [i for i, r in enumerate(self.rows) if len(r) < FULL_ROW] or list(range(len(self.rows)))
+
+        # Ряди для всіх карт рахуються по стану до ходу, як у GameRules
+        moves = []
+        for k, (value, player) in enumerate(order):
+            if k == 0 and full:
+                moves.append((value, player, full[0], True))
+                continue
+            row = self.target_row(value)
+            if row is None:
+                moves.append((value, player, choose_row(self, player, available), True))
+            else:
+                moves.append((value, player, row, False))
+
+        rows = list(self.rows)
+        row_penalty = list(self.row_penalty)
+        hands = list(self.hands)
+        points = list(self.points)
+        seen = self.seen
+        for value, player, row, take in moves:
+            pen = self.penalties[value]
+            hands[player] &= ~(1 << value)
+            seen |= 1 << value
+            if take:
+                points[player] += row_penalty[row]
+                rows[row] = bytes((value,))
+                row_penalty[row] = pen
+            else:
+                rows[row] += bytes((value,))
+                row_penalty[row] += pen
+
+        alive = self.alive
+        for i in iter_bits(alive):
+            if points[i] > GameConfig.MAX_PENALTY_POINTS:
+                alive &= ~(1 << i)
+        return GameState(self.penalties, tuple(rows), tuple(row_penalty), tuple(hands),
+                         tuple(points), alive, seen)
+
+    def to_bytes(self):
+        out = bytearray(struct.pack("<BBH", len(self.hands), len(self.rows), self.alive))
+        out += self.penalties
+        for r in self.rows:
+            out.append(len(r))
+            out += r
+        for hand, pts in zip(self.hands, self.points):
+            out += struct.pack("<H", pts)
+            out += hand.to_bytes(CARD_BYTES, "little")
+        out += self.seen.to_bytes(CARD_BYTES, "little")
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        num_players, num_rows, alive = struct.unpack_from("<BBH", data)
+        pos = 4
+        penalties = bytes(data[pos:pos + 111])
+        pos += 111
+        rows = []
+        for _ in range(num_rows):
+            n = data[pos]
+            rows.append(bytes(data[pos + 1:pos + 1 + n]))
+            pos += 1 + n
+        hands, points = [], []
+        for _ in range(num_players):
+            points.append(struct.unpack_from("<H", data, pos)[0])
+            hands.append(int.from_bytes(data[pos + 2:pos + 2 + CARD_BYTES], "little"))
+            pos += 2 + CARD_BYTES
+        seen = int.from_bytes(data[pos:pos + CARD_BYTES], "little")
+        return cls(penalties, tuple(rows), tuple(sum(penalties[v] for v in r) for r in rows),
+                   tuple(hands), tuple(points), alive, seen)
@@ -2,6 +2,12 @@ import pytest
 from main2 import Game
 from player import Player, Row
 from card import Card
+from config import GameConfig
+
+@pytest.fixture(autouse=True)
+def asset_cache(tmp_path, monkeypatch):
+    # Тести, що вантажать картинки, пишуть кеш атласу в тимчасову теку, а не в робочу копію
+    monkeypatch.setattr(GameConfig, "ASSET_CACHE_DIR", str(tmp_path / "asset_cache"))
 
 def test_row_with_five_cards():
     # Створюємо гру
@@ -83,5 +89,894 @@ def test_multiple_players_with_full_row():
     assert first_placement[3] == True  # take_row має бути True
     assert first_placement[2] == full_row  # має бути повний ряд
 
+def test_headless_rules_play_to_the_end():
+    import random
+    import subprocess
+    import sys
+    from rules import GameRules
+
+    # Правила імпортуються без pygame і без дисплея
+    out = subprocess.run([sys.executable, "-c", "import sys, rules; print('pygame' in sys.modules)"],
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+    game = GameRules(rng=random.Random(1))
+    game.start_game(4, human=False)
+    assert game.play_until_over() == "leaderboard"
+    assert sum(p.alive for p in game.players) <= 1
+
+def test_row_index_follows_rows_without_rebuilding():
+    import random
+    from rules import GameRules
+    game = GameRules(rng=random.Random(3))
+    game.start_game(6, human=False)
+    # Об'єкти тримаються живими, щоб id не повторювались
+    indexes, deals = {}, {}
+    while game.state != "leaderboard":
+        index = game.row_index()
+        indexes[id(index)] = index
+        deals[id(game.rows)] = game.rows
+        # Після кожного ходу - ті самі хвости, що дало б сортування відкритих рядів
+        open_rows = sorted((r for r in game.rows if not r.is_full), key=lambda r: r.tail)
+        assert index.tails == [r.tail for r in open_rows] and index.rows == open_rows
+        game.step()
+    # Індекс будується раз на роздачу, а не щоходу
+    assert len(indexes) == len(deals) and game.trick > 2 * len(deals)
+
+def test_batch_matches_scalar_rules():
+    from batch_sim import BatchSimulator, ReferenceGame
+    from rules import GameRules
+
+    def to_values(cards):
+        return {c.value for c in cards}
+    games = list(range(40))
+    for num_players in (2, 5, 10):
+        sim = BatchSimulator(3, games, num_players)
+        # Перша роздача - та сама, що в GameRules з тим самим сідом і номером гри
+        for i in (0, 7):
+            rules = GameRules(seed=3, game=i)
+            rules.start_game(num_players, human=False)
+            assert [to_values(p.hand) for p in rules.players] == [set(map(int, h.nonzero()[0])) for h in sim.hands[i]]
+            assert [r.tail for r in rules.rows] == list(sim.row_tail[i])
+            assert all(sim.penalties[i, c.value] == c.penalty for p in rules.players for c in p.hand)
+        sim.run()
+        assert sim.done.all()
+        for i in games:
+            # Та сама гра, зіграна скалярними правилами з тими ж потоками
+            game = ReferenceGame(3, i, num_players)
+            game.start_game(num_players, human=False)
+            assert game.play_until_over() == "leaderboard"
+            assert [p.penalty_points for p in game.players] == list(sim.points[i])
+            assert [p.alive for p in game.players] == list(sim.alive[i])
+            assert game.trick == sim.trick[i]
+
+def test_tournament_games_are_reproducible():
+    from tournament import play_game, run_tournament
+
+    table = ["random", "lowest", "random", "lowest"]
+    assert play_game(table, 7, 3) == play_game(table, 7, 3)
+
+    stats = run_tournament(["random", "lowest"], games=20, seats=3, workers=2)
+    assert stats["random"].seats + stats["lowest"].seats == 60
+
+def test_compact_state_follows_rules():
+    import random
+    from bots import ClosestFitBot, HighestCardBot, LowestCardBot
+    from rules import GameRules
+    from state import GameState
+
+    # Ці боти беруть найдешевший ряд, як і GameState.play_trick за замовчуванням
+    bots = [HighestCardBot(), LowestCardBot(), ClosestFitBot(), HighestCardBot()]
+    game = GameRules(rng=random.Random(3))
+    game.start_game(4, human=False, strategies=bots)
+    checked = 0
+    while game.state == "round":
+        before = GameState.from_game(game)
+        assert GameState.from_bytes(before.to_bytes()) == before
+        game.choose_bot_cards()
+        cards = [game.player_cards_placed[p].value if p in game.player_cards_placed else 0
+                 for p in game.players]
+        expected = before.play_trick(cards)
+        trick = game.trick
+        game.handle_card_placement_prep()
+        game.handle_card_placement_final()
+        assert game.trick == trick + 1
+        after = GameState.from_game(game)
+        assert after.points == expected.points
+        if all(len(p.hand) < 10 for p in game.get_alive_players()):
+            assert after == expected
+            checked += 1
+    assert checked > 10
+
+def test_monte_carlo_bot_respects_budget():
+    import random
+    from bots import RandomBot
+    from monte_carlo import MonteCarloBot
+    from rules import GameRules
+
+    game = GameRules(rng=random.Random(2))
+    game.start_game(9, human=False, strategies=[RandomBot(random.Random(i)) for i in range(9)])
+    player = game.players[0]
+    # Фіксована кількість розкладів: той самий хід на будь-якій машині
+    cards = []
+    for _ in range(2):
+        bot = MonteCarloBot(random.Random(1), budget=None, samples=25)
+        cards.append(bot.choose_card(game, player))
+        assert bot.last_samples == 25
+    assert cards[0] is cards[1] and cards[0] in player.hand
+    # Вичерпаний бюджет - жодного розкладу і запасний хід, найменша карта
+    bot = MonteCarloBot(random.Random(1), budget=0)
+    assert bot.choose_card(game, player) is min(player.hand, key=lambda c: c.value)
+    assert bot.last_samples == 0
+
+def test_endgame_solver_and_bounded_table():
+    from endgame import EndgameSolver, TranspositionTable
+    from state import GameState, to_bits
+
+    table = TranspositionTable(capacity=2)
+    table.put("a", 1.0)
+    table.put("b", 2.0)
+    assert table.get("a") == 1.0
+    table.put("c", 3.0)
+    assert table.get("b") is None and len(table) == 2
+
+    penalties = bytearray(111)
+    for v in range(1, 111):
+        penalties[v] = 1
+    penalties[40] = 5
+    # Карта 5 нижча за всі хвости рядів, тож з нею гравцю 0 доведеться брати ряд
+    state = GameState(bytes(penalties), (b"\x0a", b"\x14", b"\x1e", b"\x28"), (1, 1, 1, 5),
+                      (to_bits([5, 41]), to_bits([3, 50])), (0, 0), 0b11)
+    solver = EndgameSolver(TranspositionTable(capacity=100))
+    values = solver.solve(state, 0)
+    assert solver.solve(state, 0) == values
+    assert solver.table.hit_rate > 0
+    assert set(values) == {5, 41}
+    assert values[41] < values[5]
+    assert solver.nodes > 0 and solver.nodes_per_second > 0
+
+def test_seeded_games_are_reproducible():
+    from rules import GameRules
+
+    def play(seed, index):
+        game = GameRules(seed=seed, game=index)
+        game.start_game(5, human=False)
+        deck = [(c.value, c.penalty) for c in game.deck]
+        game.play_until_over()
+        return deck, [p.penalty_points for p in game.players], game.trick
+
+    # Гру номер 40 можна відтворити напряму, без попередніх
+    assert play(11, 40) == play(11, 40)
+    assert play(11, 40) != play(11, 41)
+
+def test_game_log_replays_and_seeks(tmp_path):
+    from game_log import GameLogWriter, ReplayGame, read_log, record_games, replay_points
+    from rules import GameRules
+
+    path = tmp_path / "games.log"
+    # Недограна гра при закритті не пишеться, тож журнал можна дописувати далі
+    writer = GameLogWriter(path)
+    game = GameRules(seed=1)
+    game.recorder = writer
+    game.start_game(3, human=False)
+    for _ in range(5):
+        game.step()
+    writer.close()
+    record_games(path, 5, 3, seed=9)
+    records = list(read_log(path))
+    assert len(records) == 5
+    # Пакетне перегравання дає ті самі штрафи, що й скалярне
+    assert replay_points(records) == [[p.penalty_points for p in ReplayGame(r).run().players] for r in records]
+    for record in records:
+        game = GameRules(seed=9, game=record.game)
+        game.start_game(3, human=False)
+        game.play_until_over()
+        replay = ReplayGame(record).run()
+        assert [p.penalty_points for p in replay.players] == [p.penalty_points for p in game.players]
+        assert replay.trick == game.trick == len(record.tricks)
+
+    replay = ReplayGame(records[0]).seek(8)
+    rows = [r.tail for r in replay.rows]
+    assert replay.seek(12).seek(8).trick == 8
+    assert [r.tail for r in replay.seek(12).seek(8).rows] == rows
+
+def test_analytics_resume_and_merge(tmp_path, monkeypatch):
+    import os
+    from analytics import Aggregates
+    from game_log import record_games
+
+    record_games(tmp_path / "a.log", 6, 3, seed=1)
+    record_games(tmp_path / "b.log", 4, 3, seed=2)
+    first = Aggregates(str(tmp_path / "first"))
+    # Збій після запису таблиць, але до перемикання checkpoint: пачка не рахується двічі
+    def crash(src, dst):
+        raise OSError("crash")
+    with monkeypatch.context() as m:
+        m.setattr(os, "replace", crash)
+        with pytest.raises(OSError):
+            first.ingest(str(tmp_path / "a.log"), every=4)
+    first = Aggregates(str(tmp_path / "first"))
+    assert first.tables["games"][0] == 0
+    first.ingest(str(tmp_path / "a.log"), every=4)
+    # Повторний прогін того ж журналу нічого не додає
+    Aggregates(str(tmp_path / "first")).ingest(str(tmp_path / "a.log"))
+    assert Aggregates(str(tmp_path / "first")).tables["games"][0] == 6
+
+    second = Aggregates(str(tmp_path / "second"))
+    second.ingest(str(tmp_path / "b.log"))
+    merged = Aggregates(str(tmp_path / "first"))
+    merged.merge(second)
+    assert merged.tables["games"][0] == 10
+    assert merged.tables["plays"].sum() == merged.tables["trick_plays"].sum()
+    assert merged.tables["takes"].sum() <= merged.tables["plays"].sum()
+
+def test_card_faces_are_cached():
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from config import GameConfig
+    from card import CardFaceCache
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    GameConfig.init_fonts()
+    GameConfig.init_images()
+    cache = CardFaceCache(2)
+    first = cache.get(10, 1, False, True)
+    assert cache.get(10, 1, False, True) is first
+    # Рубашка однакова для всіх карт
+    assert cache.get(20, 3, False, False) is cache.get(30, 5, False, False)
+    cache.get(40, 2, True, True)
+    assert len(cache.faces) == 2 and cache.hits == 2
+    # Стиснуті для перевертання карти теж рендеряться один раз на ширину
+    flips = CardFaceCache(64)
+    half = flips.get_flip(10, 1, True, GameConfig.FLIP_WIDTHS // 2)
+    assert half.get_width() == GameConfig.CARD_WIDTH // 2
+    misses = flips.misses
+    for _ in range(3):
+        assert flips.get_flip(10, 1, True, GameConfig.FLIP_WIDTHS // 2) is half
+    assert flips.misses == misses
+    assert flips.get_flip(10, 1, True, GameConfig.FLIP_WIDTHS) is flips.get(10, 1, False, True)
+    # Нові шрифти скидають кеш
+    GameConfig.init_fonts()
+    assert cache.get(10, 1, False, True) is not first
+    pygame.quit()
+
+def test_dirty_renderer_matches_full_redraw(monkeypatch):
+    import os, random
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main2
+    from renderer import DirtyRenderer
+    from config import GameConfig
+    main2.init_display()
+    rnd = random.Random(1)
+    mouse = [0, 0]
+    monkeypatch.setattr(pygame.mouse, "get_pos", lambda: tuple(mouse))
+    game = main2.Game(seed=5)
+    renderer = DirtyRenderer(game, main2.SCREEN)
+    reference = pygame.Surface(main2.SCREEN.get_size())
+    game.start_game(2)
+    for frame in range(200):
+        # Миша стрибає по екрану, людина час від часу ходить
+        mouse[:] = rnd.randrange(GameConfig.WIDTH), rnd.randrange(GameConfig.HEIGHT)
+        if game.human_can_place() and rnd.random() < 0.1:
+            game.place_card(game.players[0], rnd.choice(game.players[0].hand))
+        elif game.state == "pick_row":
+            game.pick_row_for_player(rnd.choice(game.rows))
+        game.update([])
+        renderer.render()
+        game.draw(reference)
+        assert pygame.image.tobytes(reference, "RGB") == pygame.image.tobytes(main2.SCREEN, "RGB")
+    assert renderer.full_redraws < 200
+    pygame.quit()
+
+def test_static_layers_rebuild_only_on_change():
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main2
+    main2.init_display()
+    game = main2.Game(seed=3)
+    game.start_game(2)
+    game.draw()
+    rebuilds = game.layers.rebuilds
+    game.draw()
+    assert game.layers.rebuilds == rebuilds
+    # Змінились лише очки - перебудовується тільки шар з рахунком
+    hud = game.layers.layers["hud"][1]
+    rows = game.layers.layers["rows"][1]
+    game.players[1].penalty_points += 5
+    game.draw()
+    assert game.layers.rebuilds == rebuilds + 1
+    assert game.layers.layers["hud"][1] is not hud and game.layers.layers["rows"][1] is rows
+    pygame.quit()
+
+def test_frame_profiler_trace_and_overlay(tmp_path):
+    import os, json
+    import time
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main2
+    from renderer import DirtyRenderer
+    from profiler import FrameProfiler
+    main2.init_display()
+    game = main2.Game(seed=9)
+    renderer = DirtyRenderer(game, main2.SCREEN)
+    # Вимкнений профайлер не чіпає методів гри
+    idle = FrameProfiler(game)
+    idle.toggle()
+    idle.toggle()
+    assert "draw_scene" not in vars(game)
+    # F3 посеред кадру: недоміряний кадр відкидається, а не пише в історію секунди від нуля
+    idle.start_frame()
+    idle.toggle()
+    game.draw_scene(main2.SCREEN)
+    idle.lap("events")
+    idle.end_frame()
+    assert idle.frames == 0 and not idle.history and not idle.frame
+    before = time.perf_counter()
+    idle.start_frame()
+    idle.lap("events")
+    idle.end_frame()
+    # Наступний кадр міряється від свого start_frame
+    assert idle.frames == 1 and idle.history["frame"][0] <= (time.perf_counter() - before) * 1000
+    idle.toggle()
+    profiler = FrameProfiler(game, trace_path=tmp_path / "trace.json")
+    profiler.visible = True
+    game.start_game(9, human=False)
+    for frame in range(150):
+        profiler.start_frame()
+        game.update([])
+        profiler.lap("update")
+        rects = renderer.render()
+        profiler.lap("render")
+        rects.append(profiler.draw(renderer))
+        profiler.end_frame()
+    profiler.close()
+    summary = profiler.summary()
+    assert {"frame", "update", "render", "animate_step", "draw_scene"} <= set(summary)
+    assert all(p50 <= p95 <= p99 for p50, p95, p99 in summary.values())
+    events = json.loads((tmp_path / "trace.json").read_text())
+    assert sum(e["name"] == "frame" for e in events) == 150
+    pygame.quit()
+
+def test_game_timing_does_not_depend_on_frame_rate():
+    from timestep import FixedStep
+    from main2 import Game
+    results = []
+    for fps in (144, 20):
+        game = Game(seed=21)
+        game.start_game(3, human=False)
+        stepper = FixedStep(hz=30)
+        stepper.advance(0.0)
+        # Десять секунд гри: кадри рівномірні, але логіка має зробити ті самі 300 кроків
+        steps = 0
+        for frame in range(1, 10 * fps + 1):
+            for _ in range(stepper.advance(frame / fps)):
+                game.update()
+                steps += 1
+            assert 0 <= stepper.alpha < 1
+        results.append((steps, game.state, game.trick, [p.penalty_points for p in game.players]))
+    assert results[0] == results[1]
+    assert results[0][0] == 300
+
+def test_animation_tweens_land_where_rows_are_drawn():
+    from main2 import Game
+    game = Game(seed=4)
+    game.start_game(9, human=False)
+    manager = game.animation_manager
+    checked = 0
+    while game.state != "leaderboard" and checked < 20:
+        if game.state != "animate":
+            game.update()
+            continue
+        while not manager.update():
+            pass
+        landed = {(card.value, x, y) for _, card, x, y, _, _ in manager.items()}
+        _, game.pending_placements = manager.get_results()
+        game.finish_placements()
+        # Після анімації картка лежить там, куди її поклав рушій правил
+        expected = set()
+        for i, row in enumerate(game.rows):
+            rect = game.layout().rows[i]
+            expected |= {(c.value, rect.x + 20, rect.y + 10 + j*(GameConfig.CARD_HEIGHT//2)) for j, c in enumerate(row.cards)}
+        assert landed <= expected
+        game.end_round()
+        checked += 1
+    # Слоти беруться з пулу, а не виділяються щоразу
+    assert manager.capacity == 32 and checked == 20
+
+def test_layout_hit_testing_matches_rects():
+    from layout import BUTTON, HAND, ROW, Layout
+    layout = Layout(4, 10, 6, 7)
+    for kind, rects in ((ROW, layout.rows), (HAND, layout.hand), (BUTTON, layout.buttons)):
+        for x in range(-5, GameConfig.WIDTH + 5, 7):
+            for y in range(-5, GameConfig.HEIGHT + 5, 7):
+                expected = next((i for i, r in enumerate(rects) if r.collidepoint(x, y)), None)
+                assert layout.hit((x, y), kind) == expected
+    # Малювання і анімація беруть місця карт з тієї ж розкладки
+    assert layout.row_slot(2, 0) == (layout.rows[2].x + 20, layout.rows[2].y + 10)
+
+def test_idle_only_while_waiting_for_the_human():
+    from main2 import Game
+    game = Game(seed=8)
+    assert game.is_idle()
+    game.start_game(3)
+    game.update()
+    # Боти вже походили, чекаємо лише на людину
+    assert game.state == "round" and game.is_idle()
+    game.place_card(game.players[0], game.players[0].hand[0])
+    assert game.state == "reveal" and not game.is_idle()
+    while game.state in ("reveal", "animate"):
+        assert not game.is_idle()
+        game.update()
+    game.update()
+    assert game.state in ("round", "pick_row") and game.is_idle()
+
+def test_asset_cache_matches_png_decode(tmp_path):
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from assets import AssetLoader, SPRITES
+    pygame.init()
+    pygame.display.set_mode((GameConfig.WIDTH, GameConfig.HEIGHT))
+    cold = AssetLoader(cache_dir=tmp_path).start()
+    cold.install()
+    frog = pygame.image.tobytes(GameConfig.FROG_IMAGES[3], "RGBA")
+    background = pygame.image.tobytes(GameConfig.BACKGROUND_IMG, "RGB")
+    warm = AssetLoader(cache_dir=tmp_path)
+    warm.install()
+    assert not cold.from_cache and warm.from_cache
+    # З кешу - ті самі пікселі, що й з PNG
+    assert pygame.image.tobytes(GameConfig.FROG_IMAGES[3], "RGBA") == frog
+    assert pygame.image.tobytes(GameConfig.BACKGROUND_IMG, "RGB") == background
+    assert pygame.image.tobytes(GameConfig.CARD_BACK_IMG, "RGB") == pygame.image.tobytes(pygame.image.load("card_back.png"), "RGB")
+    # Інший розмір вікна - інший ключ; кілька останніх ключів лишаються в кеші
+    AssetLoader(cache_dir=tmp_path, size=(600, 400)).load()
+    assert len(os.listdir(tmp_path)) == 6
+    assert AssetLoader(cache_dir=tmp_path).load() and len(os.listdir(tmp_path)) == 6
+    for width in range(300, 300 + 50 * (GameConfig.ASSET_CACHE_KEYS - 1), 50):
+        AssetLoader(cache_dir=tmp_path, size=(width, 200)).load()
+    assert len(os.listdir(tmp_path)) == 3 * GameConfig.ASSET_CACHE_KEYS
+    # Витіснено найдавніше використаний ключ (600x400), а не основний розмір
+    current, old = AssetLoader(cache_dir=tmp_path), AssetLoader(cache_dir=tmp_path, size=(600, 400))
+    current.load()
+    old.load()
+    assert current.from_cache and not old.from_cache
+    assert len(warm.result[2]) == len(SPRITES)
+    pygame.quit()
+
+def test_layout_scales_to_window_and_render_scale():
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main2
+    try:
+        main2.init_display(size=(800, 480))
+        game = main2.Game(seed=2)
+        game.start_game(9)
+        game.update()
+        layout = game.layout()
+        screen = main2.SCREEN.get_rect()
+        assert GameConfig.CARD_WIDTH == 42
+        assert all(screen.contains(r) for r in layout.rows + layout.hand + layout.buttons)
+        assert GameConfig.CARD_BACK_IMG.get_size() == (GameConfig.CARD_WIDTH, GameConfig.CARD_HEIGHT)
+        # Малюємо вдвічі меншим буфером і розтягуємо у вікно
+        main2.init_display(size=(1200, 800), render_scale=0.5)
+        assert main2.SCREEN.get_size() == (600, 400) and main2.WINDOW.get_size() == (1200, 800)
+        assert main2.to_screen((1199, 799)) == (599, 399)
+        game.on_resize()
+        game.draw()
+        main2.present([main2.SCREEN.get_rect()])
+        assert main2.WINDOW.get_at((600, 400)) == main2.SCREEN.get_at((300, 200))
+    finally:
+        main2.init_display(size=(1200, 800), render_scale=1.0)
+        pygame.quit()
+
+def test_bots_think_on_the_pool_without_blocking_updates():
+    import threading
+    import time
+    from bot_pool import BotPool
+    from bots import LowestCardBot
+    from main2 import Game
+
+    class SlowBot(LowestCardBot):
+        def __init__(self, barrier=None, release=None):
+            super().__init__()
+            self.barrier = barrier
+            self.release = release
+
+        def choose_card(self, game, player):
+            if self.barrier:
+                # Пройти бар'єр можна лише вчотирьох: боти мусять думати одночасно
+                self.barrier.wait()
+            if self.release:
+                self.release.wait()
+            return max(player.hand, key=lambda c: c.value)
+
+    game = Game(seed=4)
+    game.bots = BotPool(workers=4, deadline=5.0)
+    barrier, release = threading.Barrier(4, timeout=5), threading.Event()
+    game.start_game(4, strategies=[SlowBot(barrier, release) for _ in range(4)])
+    game.update()
+    # Кадр не чекає на ботів: вони ще думають, стан лишається "round"
+    assert game.state == "round" and not game.is_idle()
+    game.place_card(game.players[0], game.players[0].hand[0])
+    game.update()
+    assert game.state == "round"
+    release.set()
+    while game.state == "round":
+        game.update()
+        time.sleep(0.005)
+    assert all(c.value == max(c2.value for c2 in p.hand) for p, c in game.player_cards_placed.items() if not p.is_human)
+    assert game.bots.missed == 0
+
+    # Бот, що не встиг, грає дешевий хід - найменшу карту
+    release = threading.Event()
+    game = Game(seed=4)
+    game.bots = BotPool(workers=2, deadline=0.05)
+    game.start_game(1, strategies=[SlowBot(release=release)])
+    bot = game.players[1]
+    while bot not in game.player_cards_placed:
+        game.update()
+        time.sleep(0.01)
+    release.set()
+    assert game.player_cards_placed[bot].value == min(c.value for c in bot.hand)
+    assert game.bots.missed == 1
+    game.bots.shutdown()
+
+    # Прострочений пошук ще триває: новий для того ж бота не запускається,
+    # а коли прострочених забагато, дешевий хід отримують і інші
+    pool = BotPool(workers=2, deadline=0)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+        return "slow"
+
+    pool.submit("a", slow, lambda: "cheap")
+    started.wait()
+    assert pool.poll() == {"a": "cheap"} and "a" in pool.zombies
+    started.clear()
+    pool.submit("a", slow, lambda: "cheap")
+    pool.submit("b", slow, lambda: "cheap")
+    assert pool.poll() == {"a": "cheap", "b": "cheap"}
+    assert not started.is_set() and pool.missed == 3
+    release.set()
+    pool.zombies["a"].result()
+    pool.deadline = 5.0
+    pool.submit("a", lambda: "fast", lambda: "cheap")
+    pool.tasks["a"][0].result()
+    assert pool.poll() == {"a": "fast"} and not pool.zombies
+    pool.shutdown()
+
+def test_bot_snapshot_does_not_share_the_table():
+    from main2 import Game
+    from monte_carlo import MonteCarloBot
+    game = Game(seed=5)
+    game.start_game(3, strategies=[MonteCarloBot(game.streams.bot(i + 1), budget=None, samples=5) for i in range(3)])
+    view = game.snapshot()
+    rows = [[c.value for c in r.cards] for r in view.rows]
+    hands = [[c.value for c in p.hand] for p in view.players]
+    tails = view.players[1].strategy.info.tails[:]
+    # Головний потік грає далі: людина ходить, ряди ростуть
+    human = game.players[0]
+    game.place_card(human, human.hand[0])
+    game.rows[0].add_card(human.hand.pop())
+    game.players[1].strategy.info.place(0, game.rows[0].cards[-1])
+    assert [[c.value for c in r.cards] for r in view.rows] == rows
+    assert [[c.value for c in p.hand] for p in view.players] == hands
+    assert view.players[1].strategy.info.tails == tails and not view.player_cards_placed
+    # Вибір бота з копії - карта з його справжньої руки
+    assert view.players[1].choose_card(view) in game.players[1].hand
+
+def test_info_state_follows_the_table():
+    from info_state import ALL_CARDS
+    from rules import GameRules
+    from monte_carlo import MonteCarloBot
+    from state import iter_bits, to_bits
+    game = GameRules(seed=6)
+    # Фіксована кількість вибірок, а не бюджет за часом: гра та сама на будь-якій машині
+    bots = [MonteCarloBot(game.streams.bot(i), budget=None, samples=4) for i in range(4)]
+    game.start_game(4, human=False, strategies=bots)
+    # Незалежна модель того, що мав бачити кожен бот
+    rows, seen, played, dealt, deck_size, penalty = None, 0, [], [], 0, {}
+    tricks = 0
+    while game.state != "leaderboard":
+        if game.rows is not rows:
+            # Нова роздача; зі свіжою колодою все бачене повертається в гру
+            if rows is None or len(game.deck) > deck_size:
+                seen = 0
+            rows = game.rows
+            seen |= to_bits(r.cards[0].value for r in rows)
+            played = [0] * len(game.players)
+            dealt = [to_bits(c.value for c in p.hand) if p.alive else 0 for p in game.players]
+            penalty.update((c.value, c.penalty) for p in game.get_alive_players() for c in p.hand)
+            penalty.update((r.cards[0].value, r.cards[0].penalty) for r in rows)
+        deck_size = len(game.deck)
+        if game.state == "reveal":
+            for seat, p in enumerate(game.players):
+                card = game.player_cards_placed.get(p)
+                if card is not None:
+                    seen |= 1 << card.value
+                    played[seat] |= 1 << card.value
+        elif not game.player_cards_placed:
+            # Початок ходу: стан кожного бота - рівно такий, як у моделі і на столі
+            for seat, p in enumerate(game.players):
+                info = p.strategy.info
+                assert info.seen == seen
+                assert info.unseen == ALL_CARDS & ~seen & ~dealt[seat]
+                assert info.played == played
+                assert all(info.penalties[v] == penalty[v] for v in iter_bits(seen | dealt[seat]))
+                assert info.tails == [r.tail for r in game.rows]
+                assert info.row_penalty == [r.penalty for r in game.rows]
+                assert info.lengths == [len(r.cards) for r in game.rows]
+                for card in p.hand if p.alive else ():
+                    row = info.target(card.value)
+                    assert (game.rows[row] if row is not None else None) is game.can_place_card_in_rows(card)
+                    if row is not None:
+                        low = info.tails[row]
+                        assert info.unseen_between(low, card.value) == sum(1 for v in iter_bits(info.unseen) if low < v < card.value)
+            tricks += 1
+        game.step()
+    assert tricks == game.trick
+
+def test_risk_bot_is_default_and_beats_random():
+    import numpy as np
+    from rules import GameRules
+    from risk_bot import RiskBot, score_cards
+    from tournament import play_game
+    game = GameRules(seed=5)
+    game.start_game(9, human=False)
+    assert all(isinstance(p.strategy, RiskBot) for p in game.players)
+    for p in game.players:
+        info = p.strategy.info
+        values = [c.value for c in p.hand]
+        before = (info.unseen, info.tails[:], info.lengths[:])
+        # Уся рука оцінюється одним викликом, і це ті самі числа, що й по одній карті
+        score = score_cards(info, values, 8)
+        assert score.shape == (len(values),)
+        assert np.allclose(score, [score_cards(info, [v], 8)[0] for v in values])
+        assert p.choose_card(game) is p.hand[int(score.argmin())] is p.choose_card(game)
+        assert (info.unseen, info.tails, info.lengths) == before
+
+    totals = {"risk": 0, "random": 0}
+    for index in range(20):
+        for name, penalty, _, _ in play_game(["risk", "random", "risk", "random"], 3, index):
+            totals[name] += penalty
+    assert totals["risk"] < totals["random"]
+
+def test_network_table_plays_to_the_end(tmp_path):
+    import asyncio
+    import json
+    import socket
+    import threading
+    import time
+    from remote_game import RemoteGame
+    from net_client import Connection
+    from server import TableServer
+    from wire import MSG_SNAPSHOT, VERSION
+
+    address = str(tmp_path / "table.sock")
+    loop = asyncio.new_event_loop()
+    server = TableServer(lobby_seconds=0.05, turn_seconds=0.05, reveal_seconds=0, animate_seconds=0)
+    listener = loop.run_until_complete(server.start(address))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        # Спершу з двійковим форматом, потім старий клієнт лише з JSON
+        for games, wire in enumerate((VERSION, 0), 1):
+            game = RemoteGame(Connection(address), wire=wire)
+            snapshots, frames = [], []
+            apply_state, apply_wire = game.apply_state, game.apply_wire
+
+            def checked(message):
+                # Після анімації локальні ряди мають збігатися з тим, що прислав сервер
+                # (якщо тільки це не нова роздача і сам гравець ще в грі)
+                own = game.players[0] if game.trick else None
+                if (own and message["players"][game.seat][2]
+                        and [c.value for c in own.hand] == [v for v, _ in message["hand"]]):
+                    snapshots.append([[c.value for c in r.cards] for r in game.rows] ==
+                                     [[v for v, _ in r] for r in message["rows"]])
+                apply_state(message)
+
+            def checked_wire(data):
+                # Дельта після ходу: ряди, що склала анімація, - ті самі, що в TableView
+                apply_wire(data)
+                frames.append(data[1])
+                if game.synced and game.state == "round" and data[1] != MSG_SNAPSHOT:
+                    snapshots.append([[c.value for c in r.cards] for r in game.rows] == [list(r) for r in game.view.rows])
+                    snapshots.append([c.value for c in game.players[0].hand] == list(game.view.hand))
+            game.apply_state, game.apply_wire = checked, checked_wire
+
+            game.start_game(2)
+            # Другий гравець мовчить: за нього ходить бот після таймера
+            silent = socket.socket(socket.AF_UNIX)
+            silent.connect(address)
+            silent.sendall(json.dumps({"op": "join", "name": "silent", "seats": 3}).encode() + b"\n")
+            deadline = time.time() + 60
+            while game.state != "leaderboard" and time.time() < deadline:
+                game.update()
+                if game.human_can_place():
+                    game.place_card(game.players[0], game.players[0].hand[0])
+                elif game.state == "pick_row":
+                    game.pick_row_for_player(game.rows[0])
+                time.sleep(0.001)
+            assert game.state == "leaderboard" and game.leaderboard
+            assert len(game.players) == 3 and {"silent", "Player 1"} <= {p.name for p in game.players}
+            assert snapshots and all(snapshots)
+            # Двійковий клієнт отримує знімки на роздачу й дельти на кожен хід
+            assert (MSG_SNAPSHOT in frames and frames.count(MSG_SNAPSHOT) * 5 < len(frames)) if wire else not frames
+            assert server.games == games and not server.tables
+            silent.close()
+            game.connection.close()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        listener.close()
+
+def test_table_plays_for_clients_that_leave_or_stall():
+    import asyncio
+    import json
+    from server import Client, Table, TableServer
+
+    class Writer:
+        def __init__(self, on_write=None):
+            self.transport = self
+            self.sent = []
+            self.on_write = on_write
+
+        def is_closing(self):
+            return False
+
+        def get_write_buffer_size(self):
+            return 0
+
+        def write(self, data):
+            self.sent.append(json.loads(data))
+            if self.on_write:
+                self.on_write(self.sent[-1])
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        server = TableServer(lobby_seconds=0, turn_seconds=0.001, reveal_seconds=0, animate_seconds=0)
+        table = Table(server, 1, 3)
+
+        def leave(message):
+            # Другий клієнт іде, коли боти вже походили, а він ще ні
+            if message["op"] == "state":
+                loop.call_soon(table.leave, quitter)
+                quitter.writer.on_write = None
+
+        stays, quitter = Client(Writer()), Client(Writer(leave))
+        table.lobby = [stays, quitter]
+        task = server.spawn(table.run())
+        await task
+        return table, stays.writer.sent, server
+
+    table, sent, server = asyncio.run(scenario())
+    reveals = [m for m in sent if m["op"] == "reveal"]
+    # За того, хто пішов, ходить бот: у кожному ході карти всіх живих, гра доходить до кінця
+    assert reveals and len(reveals[0]["cards"]) == 3
+    assert sent[-1]["op"] == "over" and table.state == "leaderboard"
+    assert server.games == 1 and not server.tasks
+
+    async def stalled():
+        loop = asyncio.get_running_loop()
+        server = TableServer(lobby_seconds=0, turn_seconds=0.05, reveal_seconds=0, animate_seconds=0)
+        table = Table(server, 2, 3)
+
+        def answer(message):
+            # Активний гравець ходить одразу; другий спить і за нього ходить бот
+            if message["op"] == "state" and message["hand"] and message["players"][0][2]:
+                loop.call_soon(table.play, active, message["hand"][0][0])
+            elif message["op"] == "pick_row":
+                loop.call_soon(table.pick, active, 0)
+
+        active, sleeper = Client(Writer(answer)), Client(Writer())
+        table.lobby = [active, sleeper]
+        timeouts = []
+        wait = table.wait
+
+        async def timed_wait(ready, timeout):
+            await wait(ready, timeout)
+            timeouts.append(not ready())
+        table.wait = timed_wait
+        await server.spawn(table.run())
+        # Порожнє лобі: гра не починалась і не рахується
+        await server.spawn(Table(server, 3, 3).run())
+        return table, server, timeouts
+
+    table, server, timeouts = asyncio.run(stalled())
+    # Таймер сплив лише в лобі й на першому ході - далі за сонне місце бот ходить одразу
+    assert table.state == "leaderboard" and table.trick > 5
+    assert timeouts.count(True) == 2 and table.away == {1}
+    assert server.games == 1 and not server.tables
+
+def test_wire_snapshots_and_deltas_mirror_the_table():
+    import pytest
+    from wire import NO_SEAT, TableView, WireTable, game_json
+    for seat in (1, NO_SEAT):
+        view = TableView()
+        checks = []
+
+        def send(data):
+            view.apply(data)
+            # Після кожного повідомлення клієнт бачить той самий стіл
+            assert view.trick == table.trick and view.state == table.state
+            assert [list(r) for r in view.rows] == [[c.value for c in r.cards] for r in table.rows]
+            assert [view.row_penalty(i) for i in range(len(view.rows))] == [r.penalty for r in table.rows]
+            assert view.points == [p.penalty_points for p in table.players]
+            assert list(view.alive) == [p.alive for p in table.players]
+            assert list(view.hand_sizes) == [len(p.hand) if p.alive else 0 for p in table.players]
+            if seat != NO_SEAT:
+                assert list(view.hand) == [c.value for c in table.players[seat].hand]
+            if table.state == "reveal":
+                assert list(view.reveal) == [table.player_cards_placed[p].value if p in table.player_cards_placed else 0
+                                             for p in table.players]
+            checks.append((bytes(data)[1], len(data), len(game_json(table))))
+
+        table = WireTable(send, seat=seat, seed=11)
+        table.start_game(3, human=False)
+        table.play_until_over()
+        assert view.state == "leaderboard" and view.names == [p.name for p in table.players]
+        deltas = [size for kind, size, _ in checks if kind == 2]
+        # Хід на чотирьох - десятки байтів, у рази менше за JSON усього столу
+        assert max(deltas) < 40 and sum(deltas) * 10 < sum(naive for _, _, naive in checks)
+    with pytest.raises(ValueError):
+        TableView().apply(b"\x09\x01\x00\x00")
+
+
+def test_queued_wire_frames_survive_buffer_reuse():
+    import asyncio
+    import socket
+    from rules import GameRules
+    from server import Client
+    from wire import FRAME, MSG_SNAPSHOT, TableView, WireWriter
+
+    game = GameRules(seed=8)
+    game.start_game(3, human=False)
+    wire = WireWriter()
+    expected = []
+
+    def read_all(sock, size):
+        data = bytearray()
+        while len(data) < size:
+            data += sock.recv(65536)
+        return bytes(data)
+
+    async def scenario():
+        ours, theirs = socket.socketpair()
+        for sock, option in ((ours, socket.SO_SNDBUF), (theirs, socket.SO_RCVBUF)):
+            sock.setsockopt(socket.SOL_SOCKET, option, 4096)
+        _, writer = await asyncio.open_unix_connection(sock=ours)
+        client = Client(writer)
+        # Той самий буфер WireWriter перезаписується кожним кадром, поки попередні чекають у черзі
+        while game.state != "leaderboard":
+            frame = wire.snapshot(game, len(expected) % 3)
+            expected.append(bytes(frame))
+            client.send_frame(frame)
+            game.step()
+        assert writer.transport.get_write_buffer_size() > 0
+        size = sum(FRAME.size + len(f) for f in expected)
+        data = await asyncio.get_running_loop().run_in_executor(None, read_all, theirs, size)
+        writer.close()
+        theirs.close()
+        return data
+
+    data = asyncio.run(scenario())
+    received, pos = [], 0
+    while pos < len(data):
+        _, size = FRAME.unpack_from(data, pos)
+        received.append(data[pos + FRAME.size:pos + FRAME.size + size])
+        pos += FRAME.size + size
+    assert received == expected
+    view = TableView()
+    for frame in received:
+        assert frame[1] == MSG_SNAPSHOT
+        view.apply(frame)
+    assert view.names == [p.name for p in game.players]
+
 if __name__ == "__main__":
-    test_multiple_players_with_full_row() 
\ No newline at end of file
+    test_multiple_players_with_full_row()
@@ -0,0 +1,33 @@
+import time
+
+from config import GameConfig
+
+
+class FixedStep:
+    # Логіка гри крокує з фіксованою частотою незалежно від частоти кадрів;
+    # залишок часу між кроками (alpha) йде на інтерполяцію при малюванні
+    def __init__(self, hz=None, max_steps=5):
+        self.step = 1.0 / (hz or GameConfig.LOGIC_HZ)
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last = None
+
+    def advance(self, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.last is None:
+            self.last = now
+        # Після довгої паузи (перетягування вікна, відладчик) не наздоганяємо все одразу
+        self.accumulator += min(now - self.last, self.step * self.max_steps)
+        self.last = now
+        steps = int(self.accumulator / self.step)
+        self.accumulator -= steps * self.step
+        return steps
+
+    def reset(self):
+        # Після простою час очікування не перетворюється на кроки логіки
+        self.accumulator = 0.0
+        self.last = None
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.step
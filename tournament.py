@@ -0,0 +1,122 @@
+import argparse
+import itertools
+import math
+import multiprocessing
+import time
+
+import endgame  # noqa: F401  реєструє стратегії montecarlo і endgame
+import risk_bot  # noqa: F401  реєструє стратегію risk
+from bots import STRATEGIES, make_bot
+from rules import GameRules
+
+SHARD_SIZE = 50
+
+
+def play_game(strategies, seed, index):
+    game = GameRules(seed=seed, game=index)
+    bots = [make_bot(name, game.streams.bot(i)) for i, name in enumerate(strategies)]
+    game.start_game(len(strategies), human=False, strategies=bots)
+    game.play_until_over()
+    return [
+        (name, p.penalty_points, p.alive, game.eliminated_at.get(p.name))
+        for name, p in zip(strategies, game.players)
+    ]
+
+
+def play_shard(shard):
+    pair, seats, seed, indices = shard
+    results = []
+    for index in indices:
+        # Місця чергуються між стратегіями і зсуваються від гри до гри
+        table = [pair[(seat + index) % len(pair)] for seat in range(seats)]
+        results.append(play_game(table, seed, index))
+    return results
+
+
+def make_shards(strategies, games, seats, base_seed):
+    # Кожна гра однозначно задана (seed, номер гри), шарди - це просто діапазони номерів
+    for m, pair in enumerate(itertools.combinations(strategies, 2)):
+        first = m * games
+        for start in range(0, games, SHARD_SIZE):
+            yield pair, seats, base_seed, range(first + start, first + min(start + SHARD_SIZE, games))
+
+
+class Stats:
+    def __init__(self):
+        self.seats = 0
+        self.wins = 0
+        self.penalty = 0.0
+        self.penalty_sq = 0.0
+        self.outs = 0
+        self.turns = 0.0
+        self.turns_sq = 0.0
+
+    def add(self, penalty, won, turn):
+        self.seats += 1
+        self.wins += won
+        self.penalty += penalty
+        self.penalty_sq += penalty * penalty
+        if turn is not None:
+            self.outs += 1
+            self.turns += turn
+            self.turns_sq += turn * turn
+
+    @staticmethod
+    def mean_ci(total, total_sq, n):
+        if not n:
+            return float("nan"), float("nan")
+        mean = total / n
+        var = max(total_sq / n - mean * mean, 0.0)
+        return mean, 1.96 * math.sqrt(var / n)
+
+    def win_rate_ci(self):
+        # Інтервал Вілсона для частки перемог
+        n, p, z = self.seats, self.wins / self.seats, 1.96
+        centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+        half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return centre - half, centre + half
+
+
+def run_tournament(strategies, games, seats, workers, base_seed=0):
+    stats = {name: Stats() for name in strategies}
+    shards = list(make_shards(strategies, games, seats, base_seed))
+    with multiprocessing.Pool(workers) as pool:
+        for results in pool.imap_unordered(play_shard, shards):
+            for game in results:
+                for name, penalty, won, turn in game:
+                    stats[name].add(penalty, won, turn)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin tournament between bot strategies")
+    parser.add_argument("strategies", nargs="*", default=list(STRATEGIES),
+                        help=f"strategies to pit against each other ({', '.join(STRATEGIES)})")
+    parser.add_argument("--games", type=int, default=1000, help="games per pairing")
+    parser.add_argument("--seats", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if len(args.strategies) < 2:
+        parser.error("need at least two strategies")
+    for name in args.strategies:
+        if name not in STRATEGIES:
+            parser.error(f"unknown strategy {name!r}")
+
+    start = time.perf_counter()
+    stats = run_tournament(args.strategies, args.games, args.seats, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+
+    total = len(list(itertools.combinations(args.strategies, 2))) * args.games
+    print(f"{total} games on {args.workers} workers in {elapsed:.2f}s ({total / elapsed:.0f} games/s)")
+    print(f"{'strategy':<10} {'win rate (95% CI)':<22} {'penalty':<16} {'out at trick':<16}")
+    for name, s in sorted(stats.items(), key=lambda x: -x[1].wins / max(x[1].seats, 1)):
+        lo, hi = s.win_rate_ci()
+        pen, pen_ci = s.mean_ci(s.penalty, s.penalty_sq, s.seats)
+        turn, turn_ci = s.mean_ci(s.turns, s.turns_sq, s.outs)
+        print(f"{name:<10} {s.wins / s.seats:.3f} [{lo:.3f}, {hi:.3f}]   "
+              f"{pen:6.1f} ±{pen_ci:4.1f}    {turn:6.1f} ±{turn_ci:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+import argparse
+import json
+import struct
+import time
+
+from bots import make_bot
+from rules import GameRules
+
+VERSION = 1
+BUFFER_SIZE = 4096
+NO_SEAT = 255  # глядач: знімок без руки
+
+# Повідомлення: повний знімок (при вході і на кожну нову роздачу) або дельта
+MSG_SNAPSHOT = 1
+MSG_DELTA = 2
+
+# Події дельти; значення карти і штраф - по байту
+OP_REVEAL = 1      # місце, карта, штраф
+OP_PLACE = 2       # місце, ряд, карта, штраф
+OP_TAKE = 3        # місце, ряд, карта, штраф: ряд забрано, карта лягла першою
+OP_POINTS = 4      # місце, штрафні очки (u16)
+OP_ELIMINATED = 5  # місце
+OP_STATE = 6       # код стану
+
+STATES = ("menu", "setup", "round", "reveal", "pick_row", "animate", "leaderboard", "lobby")
+STATE_CODES = {name: i for i, name in enumerate(STATES)}
+
+_HEADER = struct.Struct("<BBH")   # версія, тип, номер ходу
+_TABLE = struct.Struct("<BBBB")   # стан, своє місце, гравців, рядів
+_SEAT = struct.Struct("<HBBB")    # очки, живий, карт у руці, довжина імені
+_CARD = struct.Struct("<BBBBB")
+_REVEAL = struct.Struct("<BBBB")
+_POINTS = struct.Struct("<BBH")
+_BYTE2 = struct.Struct("<BB")
+_EVENTS = {OP_REVEAL: _REVEAL, OP_PLACE: _CARD, OP_TAKE: _CARD, OP_POINTS: _POINTS,
+           OP_ELIMINATED: _BYTE2, OP_STATE: _BYTE2}
+
+# У потоці разом з JSON-рядками: нульовий байт (рядок так не починається) і довжина
+FRAME = struct.Struct("<BH")
+FRAME_MARK = 0
+
+
+class WireWriter:
+    # Усі повідомлення пакуються в один наперед виділений буфер; повертається view
+    # на нього, дійсний лише до наступного повідомлення. Хто тримає дані довше
+    # (черга транспорту asyncio під зворотним тиском), мусить скопіювати їх сам
+    def __init__(self, size=BUFFER_SIZE):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.pos = 0
+        # Останні надіслані очки й живі - дельта містить лише зміни
+        self.points = []
+        self.alive = []
+
+    def snapshot(self, game, seat=NO_SEAT):
+        buf = self.buffer
+        _HEADER.pack_into(buf, 0, VERSION, MSG_SNAPSHOT, game.trick)
+        _TABLE.pack_into(buf, _HEADER.size, STATE_CODES[game.state], seat, len(game.players), len(game.rows))
+        pos = _HEADER.size + _TABLE.size
+        for p in game.players:
+            name = p.name.encode()[:255]
+            _SEAT.pack_into(buf, pos, p.penalty_points, p.alive, len(p.hand) if p.alive else 0, len(name))
+            pos += _SEAT.size
+            buf[pos:pos + len(name)] = name
+            pos += len(name)
+        for r in game.rows:
+            buf[pos] = len(r.cards)
+            pos = self._cards(r.cards, pos + 1)
+        hand = game.players[seat].hand if seat != NO_SEAT else ()
+        buf[pos] = len(hand)
+        pos = self._cards(hand, pos + 1)
+        placed = game.player_cards_placed
+        revealed = game.state == "reveal"
+        for p in game.players:
+            card = placed.get(p) if revealed else None
+            buf[pos] = card.value if card else 0
+            buf[pos + 1] = card.penalty if card else 0
+            pos += 2
+        self.points = [p.penalty_points for p in game.players]
+        self.alive = [p.alive for p in game.players]
+        self.pos = pos
+        return self.view[:pos]
+
+    def _cards(self, cards, pos):
+        buf = self.buffer
+        for c in cards:
+            buf[pos] = c.value
+            buf[pos + 1] = c.penalty
+            pos += 2
+        return pos
+
+    def begin(self):
+        self.pos = _HEADER.size
+
+    def reveal(self, seat, card):
+        _REVEAL.pack_into(self.buffer, self.pos, OP_REVEAL, seat, card.value, card.penalty)
+        self.pos += _REVEAL.size
+
+    def place(self, seat, row, card, take):
+        _CARD.pack_into(self.buffer, self.pos, OP_TAKE if take else OP_PLACE, seat, row, card.value, card.penalty)
+        self.pos += _CARD.size
+
+    def scores(self, game):
+        for seat, p in enumerate(game.players):
+            if p.penalty_points != self.points[seat]:
+                self.points[seat] = p.penalty_points
+                _POINTS.pack_into(self.buffer, self.pos, OP_POINTS, seat, p.penalty_points)
+                self.pos += _POINTS.size
+            if self.alive[seat] and not p.alive:
+                self.alive[seat] = False
+                _BYTE2.pack_into(self.buffer, self.pos, OP_ELIMINATED, seat)
+                self.pos += _BYTE2.size
+
+    def state(self, name):
+        _BYTE2.pack_into(self.buffer, self.pos, OP_STATE, STATE_CODES[name])
+        self.pos += _BYTE2.size
+
+    def end(self, trick):
+        # Номер ходу - вже після події, тож заголовок пишеться останнім
+        _HEADER.pack_into(self.buffer, 0, VERSION, MSG_DELTA, trick)
+        return self.view[:self.pos]
+
+
+class TableView:
+    # Стан столу на боці клієнта: ряди й рука - значення карт у bytearray,
+    # штрафи - у таблиці за значенням, як в InfoState. Дельти змінюють їх на місці
+    __slots__ = ("seat", "trick", "state", "names", "points", "alive", "hand_sizes",
+                 "rows", "hand", "reveal", "penalties")
+
+    def __init__(self):
+        self.seat = NO_SEAT
+        self.trick = 0
+        self.state = "menu"
+        self.names = []
+        self.points = []
+        self.alive = bytearray()
+        self.hand_sizes = bytearray()
+        self.rows = []
+        self.hand = bytearray()
+        self.reveal = bytearray()
+        self.penalties = bytearray(111)
+
+    def apply(self, data):
+        data = memoryview(data)
+        version, kind, self.trick = _HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError(f"unsupported wire version {version}")
+        if kind == MSG_SNAPSHOT:
+            self._snapshot(data)
+        elif kind == MSG_DELTA:
+            self._delta(data)
+        else:
+            raise ValueError(f"unknown wire message {kind}")
+
+    def _snapshot(self, data):
+        state, self.seat, players, rows = _TABLE.unpack_from(data, _HEADER.size)
+        self.state = STATES[state]
+        pos = _HEADER.size + _TABLE.size
+        if len(self.points) != players:
+            self.names = [""] * players
+            self.points = [0] * players
+            self.alive = bytearray(players)
+            self.hand_sizes = bytearray(players)
+            self.reveal = bytearray(players)
+        if len(self.rows) != rows:
+            self.rows = [bytearray() for _ in range(rows)]
+        for seat in range(players):
+            self.points[seat], self.alive[seat], self.hand_sizes[seat], size = _SEAT.unpack_from(data, pos)
+            pos += _SEAT.size
+            name = data[pos:pos + size]
+            if name != self.names[seat].encode():
+                self.names[seat] = bytes(name).decode()
+            pos += size
+        for row in self.rows:
+            pos = self._cards(data, pos + 1, data[pos], row)
+        pos = self._cards(data, pos + 1, data[pos], self.hand)
+        reveal, penalties = self.reveal, self.penalties
+        for seat in range(players):
+            reveal[seat] = data[pos]
+            penalties[data[pos]] = data[pos + 1]
+            pos += 2
+
+    def _cards(self, data, pos, count, out):
+        del out[:]
+        penalties = self.penalties
+        for _ in range(count):
+            out.append(data[pos])
+            penalties[data[pos]] = data[pos + 1]
+            pos += 2
+        return pos
+
+    def _delta(self, data):
+        pos, end = _HEADER.size, len(data)
+        while pos < end:
+            op = data[pos]
+            if op == OP_PLACE or op == OP_TAKE:
+                seat, value = data[pos + 1], data[pos + 3]
+                row = self.rows[data[pos + 2]]
+                self.penalties[value] = data[pos + 4]
+                if op == OP_TAKE:
+                    del row[:]
+                row.append(value)
+                self.reveal[seat] = 0
+                self.hand_sizes[seat] -= 1
+                if seat == self.seat:
+                    i = self.hand.find(value)
+                    if i >= 0:
+                        del self.hand[i]
+                pos += _CARD.size
+            elif op == OP_REVEAL:
+                self.reveal[data[pos + 1]] = data[pos + 2]
+                self.penalties[data[pos + 2]] = data[pos + 3]
+                pos += _REVEAL.size
+            elif op == OP_POINTS:
+                self.points[data[pos + 1]] = _POINTS.unpack_from(data, pos)[2]
+                pos += _POINTS.size
+            elif op == OP_ELIMINATED:
+                self.alive[data[pos + 1]] = 0
+                self.hand_sizes[data[pos + 1]] = 0
+                pos += _BYTE2.size
+            elif op == OP_STATE:
+                self.state = STATES[data[pos + 1]]
+                pos += _BYTE2.size
+            else:
+                raise ValueError(f"corrupt wire delta at byte {pos}")
+
+    def row_penalty(self, row):
+        return sum(self.penalties[v] for v in self.rows[row])
+
+
+def delta_events(data):
+    # Події дельти по одній - для клієнта, що їх анімує; TableView.apply застосовує їх на місці
+    pos, end = _HEADER.size, len(data)
+    while pos < end:
+        event = _EVENTS.get(data[pos])
+        if event is None:
+            raise ValueError(f"corrupt wire delta at byte {pos}")
+        yield event.unpack_from(data, pos)
+        pos += event.size
+
+
+class WireTable(GameRules):
+    # Стіл без мережі, що після кожної події віддає повідомлення для місця seat
+    # у send: знімок на старті й на кожну нову роздачу, між ними - дельти
+    def __init__(self, send, seat=NO_SEAT, **kwargs):
+        super().__init__(**kwargs)
+        self.send = send
+        self.seat = seat
+        self.writer = WireWriter()
+        self.dealt = False
+
+    def start_new_play(self):
+        super().start_new_play()
+        self.dealt = True
+
+    def start_game(self, num_bots, human=True, strategies=None):
+        super().start_game(num_bots, human, strategies)
+        self.sync()
+
+    def sync(self):
+        if self.dealt:
+            self.dealt = False
+            self.send(self.writer.snapshot(self, self.seat))
+        else:
+            self.writer.scores(self)
+            self.writer.state(self.state)
+            self.send(self.writer.end(self.trick))
+
+    def handle_card_placement_prep(self):
+        super().handle_card_placement_prep()
+        w = self.writer
+        w.begin()
+        for seat, p in enumerate(self.players):
+            card = self.player_cards_placed.get(p)
+            if card is not None:
+                w.reveal(seat, card)
+        self.sync()
+
+    def handle_card_placement_final(self):
+        super().handle_card_placement_final()
+        if self.state == "pick_row":
+            # Ряд вибирає людина: ряди ще не змінились, клієнту досить нового стану
+            self.writer.begin()
+            self.sync()
+
+    def finish_placements(self):
+        # Індекси рядів - до розміщення: нова роздача замінить self.rows
+        w = self.writer
+        w.begin()
+        for p, c, row, take in self.pending_placements:
+            w.place(self.players.index(p), self.rows.index(row), c, take)
+        super().finish_placements()
+
+    def pick_row_for_player(self, row):
+        w = self.writer
+        w.begin()
+        w.place(self.players.index(self.selected_player), self.rows.index(row), self.selected_card, True)
+        super().pick_row_for_player(row)
+
+    def end_round(self):
+        super().end_round()
+        self.sync()
+
+
+def game_json(game):
+    # Наївна синхронізація: усі атрибути Game, що потрібні клієнту, на кожну подію
+    return json.dumps({
+        "state": game.state,
+        "trick": game.trick,
+        "rows": [[[c.value, c.penalty] for c in r.cards] for r in game.rows],
+        "players": [{"name": p.name, "is_human": p.is_human, "penalty_points": p.penalty_points,
+                     "alive": p.alive, "hand": [[c.value, c.penalty] for c in p.hand]}
+                    for p in game.players],
+        "player_cards_placed": {p.name: [c.value, c.penalty] for p, c in game.player_cards_placed.items()},
+        "leaderboard": game.leaderboard,
+    }).encode()
+
+
+def play(games, num_bots, seed, table_factory):
+    start = time.perf_counter()
+    for index in range(games):
+        table = table_factory(seed, index)
+        # Дешеві детерміновані боти, щоб час гри не губив час кодування
+        table.start_game(num_bots, human=False, strategies=[make_bot("lowest") for _ in range(num_bots)])
+        table.play_until_over()
+    return time.perf_counter() - start
+
+
+def benchmark(games, num_bots, seed=0, repeats=3):
+    # Ті самі ігри тричі: без синхронізації, з двійковими дельтами, з JSON усього столу;
+    # вартість кодування - різниця часу на одне повідомлення
+    binary, naive = [], []
+
+    def collecting(seed, index):
+        table = WireTable(None, seat=0, seed=seed, game=index)
+        table.send = lambda data: (binary.append(bytes(data)), naive.append(game_json(table)))
+        return table
+
+    def silent(seed, index):
+        return WireTable(lambda data: None, seat=0, seed=seed, game=index)
+
+    def as_json(seed, index):
+        table = WireTable(None, seat=0, seed=seed, game=index)
+        table.send = lambda data: game_json(table)
+        return table
+
+    play(games, num_bots, seed, collecting)
+    count = len(binary)
+    plain = min(play(games, num_bots, seed, lambda s, i: GameRules(seed=s, game=i)) for _ in range(repeats))
+    wire = min(play(games, num_bots, seed, silent) for _ in range(repeats))
+    plain_json = min(play(games, num_bots, seed, as_json) for _ in range(repeats))
+
+    start = time.perf_counter()
+    view = TableView()
+    for data in binary:
+        view.apply(data)
+    wire_decode = time.perf_counter() - start
+    start = time.perf_counter()
+    for data in naive:
+        json.loads(data)
+    json_decode = time.perf_counter() - start
+
+    return {
+        "messages": count,
+        "wire_bytes": sum(map(len, binary)) / count,
+        "json_bytes": sum(map(len, naive)) / count,
+        "wire_encode_us": max(wire - plain, 0) / count * 1e6,
+        "json_encode_us": max(plain_json - plain, 0) / count * 1e6,
+        "wire_decode_us": wire_decode / count * 1e6,
+        "json_decode_us": json_decode / count * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the binary sync format with plain JSON")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--bots", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    r = benchmark(args.games, args.bots, args.seed)
+    print(f"{r['messages']} messages from {args.games} games")
+    print(f"wire: {r['wire_bytes']:6.1f} bytes/message  encode {r['wire_encode_us']:5.1f} us  "
+          f"decode {r['wire_decode_us']:5.1f} us")
+    print(f"json: {r['json_bytes']:6.1f} bytes/message  encode {r['json_encode_us']:5.1f} us  "
+          f"decode {r['json_decode_us']:5.1f} us")
+
+
+if __name__ == "__main__":
+    main()